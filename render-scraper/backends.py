@@ -0,0 +1,306 @@
+"""
+Shared cache backends
+Lets one scraper process publish the cache to any number of API-only workers
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+from collections import deque
+from typing import AsyncIterator, List, Dict, Optional, Any
+
+from cache import SNAPSHOT_KINDS
+from persistence import decode_snapshot
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional: only needed with a redis:// backend URL
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# "all" scrapes and serves in one process; "scraper" only writes the shared
+# backend; "api" only serves what the scraper publishes
+ROLE = os.environ.get("ROLE", "all")
+# e.g. redis://localhost:6379/0 or mmap:///dev/shm/livegoal-cache; unset
+# keeps the cache process-local
+CACHE_BACKEND_URL = os.environ.get("CACHE_BACKEND_URL")
+CACHE_BACKEND_PREFIX = os.environ.get("CACHE_BACKEND_PREFIX", "livegoal")
+
+# Seconds between generation checks of a mapped-file backend
+MMAP_POLL_INTERVAL = 0.1
+# Publishes whose changes stay in a mapped-file announcement, so readers
+# that skip a few generations can still continue without a reload
+MMAP_RECENT_PUBLISHES = 16
+
+
+class CacheBackend:
+    """Shared store for the scraper's cache plus change notifications
+    
+    The writer stores a full encoded snapshot with every update and
+    announces the change records; readers load the snapshot once, then
+    follow the announcements, reloading whenever they miss one.
+    """
+    
+    async def publish(self, snapshot: bytes, epoch: str, version: int, changes: List[Dict[str, Any]]):
+        """Store a new snapshot and announce its change records"""
+        raise NotImplementedError
+    
+    async def load(self) -> Optional[Dict[str, Any]]:
+        """Get the latest exported cache, None if nothing was published yet"""
+        raise NotImplementedError
+    
+    def subscribe(self) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield None once listening, then {"epoch", "version", "changes"} announcements"""
+        raise NotImplementedError
+    
+    async def close(self):
+        pass
+
+
+class RedisBackend(CacheBackend):
+    """Backend on Redis or any server speaking its protocol (Valkey, KeyDB, ...)"""
+    
+    def __init__(self, url: str, prefix: str = CACHE_BACKEND_PREFIX):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for a redis:// cache backend")
+        self._client = aioredis.from_url(url)
+        self._snapshot_key = f"{prefix}:snapshot"
+        self._channel = f"{prefix}:changes"
+    
+    async def publish(self, snapshot: bytes, epoch: str, version: int, changes: List[Dict[str, Any]]):
+        message = json.dumps({"epoch": epoch, "version": version, "changes": changes}, separators=(",", ":"))
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.set(self._snapshot_key, snapshot)
+            pipe.publish(self._channel, message)
+            await pipe.execute()
+    
+    async def load(self) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self._snapshot_key)
+        return decode_snapshot(raw) if raw else None
+    
+    async def subscribe(self) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self._channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "subscribe":
+                    # Confirmed: everything published from now on reaches us
+                    yield None
+                elif message.get("type") == "message":
+                    yield json.loads(message["data"])
+        finally:
+            await pubsub.unsubscribe(self._channel)
+            await pubsub.aclose()
+    
+    async def close(self):
+        await self._client.aclose()
+
+
+class MmapBackend(CacheBackend):
+    """Backend on a memory-mapped file, for processes on one machine
+    
+    The file starts with a fixed header (magic, generation, message and
+    snapshot lengths) followed by the latest announcement, which carries the
+    changes of the last few publishes, and the snapshot.
+    The generation works as a seqlock: the writer makes it odd before
+    writing and even again after, so a reader that sees the same even
+    generation before and after copying a region got a consistent copy.
+    Readers notice new data by polling the generation; on /dev/shm none of
+    this touches the disk.
+    """
+    
+    MAGIC = b"LGHM"
+    HEADER = struct.Struct("<4s4xQQQ")
+    GENERATION_OFFSET = 8
+    # Grow the file in steps so most publishes reuse the mapping
+    GROW_STEP = 1 << 20
+    
+    def __init__(self, path: str):
+        self._path = path
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._generation = 0
+        self._epoch: Optional[str] = None
+        self._recent: deque = deque(maxlen=MMAP_RECENT_PUBLISHES)
+    
+    async def publish(self, snapshot: bytes, epoch: str, version: int, changes: List[Dict[str, Any]]):
+        if epoch != self._epoch:
+            self._epoch = epoch
+            self._recent.clear()
+        self._recent.append(changes)
+        recent = [change for batch in self._recent for change in batch]
+        message = json.dumps({"epoch": epoch, "version": version, "changes": recent}, separators=(",", ":")).encode("utf-8")
+        await asyncio.to_thread(self._write, message, snapshot)
+    
+    def _write(self, message: bytes, snapshot: bytes):
+        size = self.HEADER.size + len(message) + len(snapshot)
+        if self._map is None:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._map_file(size)
+            magic, generation, _, _ = self.HEADER.unpack_from(self._map)
+            # Continue the previous writer's count so readers never see it go back
+            self._generation = generation + generation % 2 if magic == self.MAGIC else 0
+        elif size > len(self._map):
+            self._map.close()
+            self._map_file(size)
+        
+        self._generation += 1
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, self._generation, len(message), len(snapshot))
+        start = self.HEADER.size
+        self._map[start:start + len(message)] = message
+        start += len(message)
+        self._map[start:start + len(snapshot)] = snapshot
+        self._generation += 1
+        struct.pack_into("<Q", self._map, self.GENERATION_OFFSET, self._generation)
+    
+    def _map_file(self, size: int):
+        # Never shrink: readers may still map the old length
+        size = max(os.fstat(self._fd).st_size, -(-size // self.GROW_STEP) * self.GROW_STEP)
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+    
+    def _read(self, with_snapshot: bool):
+        """(generation, message, snapshot) from a consistent copy, None if nothing is published"""
+        # Bounded in case a writer died mid-write and left the generation odd
+        for _ in range(10000):
+            if self._map is None or len(self._map) < self.HEADER.size:
+                if not self._open_reader():
+                    return None
+            
+            magic, generation, message_size, snapshot_size = self.HEADER.unpack_from(self._map)
+            if magic != self.MAGIC:
+                return None
+            if generation % 2:
+                # Mid-write; it only takes a memcpy
+                continue
+            
+            end = self.HEADER.size + message_size + snapshot_size
+            if end > len(self._map):
+                # The writer grew the file
+                self._map.close()
+                self._map = None
+                continue
+            
+            start = self.HEADER.size
+            message = self._map[start:start + message_size]
+            snapshot = self._map[start + message_size:end] if with_snapshot else None
+            if struct.unpack_from("<Q", self._map, self.GENERATION_OFFSET)[0] == generation:
+                return generation, message, snapshot
+        return None
+    
+    def _open_reader(self) -> bool:
+        try:
+            with open(self._path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < self.HEADER.size:
+                    return False
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    async def load(self) -> Optional[Dict[str, Any]]:
+        def read():
+            result = self._read(with_snapshot=True)
+            return decode_snapshot(result[2]) if result else None
+        return await asyncio.to_thread(read)
+    
+    async def subscribe(self) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        # _read may spin while the writer holds the seqlock, so keep it off the loop
+        result = await asyncio.to_thread(self._read, False)
+        seen = result[0] if result else 0
+        yield None
+        
+        while True:
+            await asyncio.sleep(MMAP_POLL_INTERVAL)
+            result = await asyncio.to_thread(self._read, False)
+            if result and result[0] != seen:
+                seen = result[0]
+                # Skipped generations show up as a version gap and force a reload
+                yield json.loads(result[1])
+    
+    async def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def create_backend(url: Optional[str] = CACHE_BACKEND_URL) -> Optional[CacheBackend]:
+    """Backend for a URL, None for a process-local cache"""
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url.startswith("mmap://"):
+        return MmapBackend(url[len("mmap://"):])
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+def _pre_encode(cache):
+    # Like the writer, so the first request after an update doesn't encode inline
+    for kind in SNAPSHOT_KINDS:
+        cache.get_snapshot(kind)
+
+
+def _load(cache, data: Dict[str, Any]):
+    """Reload the replica and pre-encode its snapshots; runs in a worker thread"""
+    cache.load(data)
+    _pre_encode(cache)
+
+
+def _apply(cache, changes: List[Dict[str, Any]]) -> bool:
+    """Apply announced changes and pre-encode snapshots; runs in a worker thread"""
+    if not cache.apply_changes(changes):
+        return False
+    _pre_encode(cache)
+    return True
+
+
+async def follow(backend: CacheBackend, cache, on_changes) -> None:
+    """Keep a replica cache in sync with the backend until cancelled
+    
+    `on_changes` receives each batch of change records applied, so they
+    can be pushed to this worker's own clients; after a full reload it
+    gets a single "reset" record instead.
+    """
+    delay = 1.0
+    
+    async def reload():
+        data = await backend.load()
+        if data is None:
+            return
+        changed = (data["epoch"], data["version"]) != (cache.get_epoch(), cache.get_version())
+        await asyncio.to_thread(_load, cache, data)
+        logger.info(f"Loaded shared cache version {data['version']} ({len(data['matches'])} matches)")
+        if changed:
+            on_changes([{"op": "reset", "version": data["version"]}])
+    
+    while True:
+        try:
+            async for message in backend.subscribe():
+                if message is None:
+                    # Listening now, so nothing published after this load is missed
+                    await reload()
+                    delay = 1.0
+                    continue
+                
+                version = cache.get_version()
+                if message["epoch"] != cache.get_epoch() or not await asyncio.to_thread(_apply, cache, message["changes"]):
+                    await reload()
+                else:
+                    # Announcements may repeat changes this cache already has
+                    on_changes([change for change in message["changes"] if change["version"] > version])
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Shared cache sync error: {e}")
+        
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
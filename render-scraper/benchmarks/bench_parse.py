@@ -0,0 +1,58 @@
+"""
+Match list parsing: fast lxml parser vs BeautifulSoup fallback
+
+Parses synthetic Flashscore pages of several sizes with both parsers,
+checks they produce the same matches and reports the mean time per page,
+next to parsing the equivalent data feed (SCRAPE_MODE=feed).
+
+Usage (from render-scraper/):
+    python benchmarks/bench_parse.py [--rows 50 500 2000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastparse import parse_matches_fast  # noqa: E402
+from feed import parse_feed  # noqa: E402
+from scraper import FlashscoreScraper  # noqa: E402
+from benchmarks.fixtures import make_feed, make_html  # noqa: E402
+
+
+def timed(parse, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parse(html)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(sizes, repeat):
+    scraper = FlashscoreScraper()
+    print(f"{'rows':>6}{'bytes':>10}{'bs4 ms':>10}{'fast ms':>10}{'speedup':>10}{'feed bytes':>12}{'feed ms':>10}")
+    
+    for rows in sizes:
+        html = make_html(rows)
+        slow, expected = timed(scraper._parse_matches_bs4, html, repeat)
+        fast, actual = timed(parse_matches_fast, html, repeat)
+        
+        if actual != expected:
+            raise SystemExit(f"Parsers disagree on the {rows}-row page")
+        
+        feed = make_feed(rows)
+        feed_time, _ = timed(parse_feed, feed, repeat)
+        
+        print(
+            f"{rows:>6}{len(html):>10}{slow * 1000:>10.1f}{fast * 1000:>10.1f}{slow / fast:>9.1f}x"
+            f"{len(feed):>12}{feed_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,102 @@
+"""
+MatchCache read latency under a concurrent writer
+
+Reader threads hammer the getters while a writer applies scrape-sized
+updates (far more often than the real 15 s cycle), then p50/p99/max read
+latency is reported. Note that readers still share the GIL with the writer.
+
+Usage (from render-scraper/):
+    python benchmarks/cache_contention.py [--matches 2000] [--readers 4] [--seconds 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cache import MatchCache  # noqa: E402
+from benchmarks.fixtures import make_matches, tick  # noqa: E402
+
+READS = (
+    ("get_live_matches", lambda cache: cache.get_live_matches()),
+    ("get_all_matches", lambda cache: cache.get_all_matches()),
+    ("get_leagues", lambda cache: cache.get_leagues()),
+    ("get_match", lambda cache: cache.get_match("m00001")),
+    ("get_snapshot", lambda cache: cache.get_snapshot("today")),
+)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(match_count: int, readers: int, seconds: float, write_interval: float):
+    """Read latencies in ns by getter, and the number of writes applied"""
+    cache = MatchCache()
+    matches = make_matches(match_count)
+    cache.update_matches(matches)
+    
+    stop = threading.Event()
+    latencies = {name: [] for name, _ in READS}
+    writes = [0]
+    
+    def writer():
+        rng = random.Random(7)
+        current = matches
+        while not stop.is_set():
+            current = tick(current, rng)
+            cache.update_matches(current)
+            writes[0] += 1
+            stop.wait(write_interval)
+    
+    def reader(seed):
+        rng = random.Random(seed)
+        local = {name: [] for name, _ in READS}
+        while not stop.is_set():
+            name, read = rng.choice(READS)
+            start = time.perf_counter_ns()
+            read(cache)
+            local[name].append(time.perf_counter_ns() - start)
+        for name, samples in local.items():
+            latencies[name].extend(samples)
+    
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, writes[0]
+
+
+def run(match_count: int, readers: int, seconds: float, write_interval: float):
+    latencies, writes = measure(match_count, readers, seconds, write_interval)
+    
+    print(f"{match_count} matches, {readers} readers, {writes} writes in {seconds:.1f}s")
+    print(f"{'read':<18}{'count':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        print(
+            f"{name:<18}{len(samples):>10}"
+            f"{percentile(samples, 0.50) / 1000:>10.1f}"
+            f"{percentile(samples, 0.99) / 1000:>10.1f}"
+            f"{max(samples) / 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-interval", type=float, default=0.05)
+    args = parser.parse_args()
+    run(args.matches, args.readers, args.seconds, args.write_interval)
@@ -0,0 +1,148 @@
+"""
+Synthetic match data for offline benchmarks
+Produces matches shaped like FlashscoreScraper output
+"""
+
+import os
+import random
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List
+
+from models import Match, Team
+
+STATUSES = ("SCHEDULED", "LIVE", "HT", "FT")
+# Named page sizes: a quiet morning, a normal day, and a peak day
+CORPUS_ROWS = {"small": 50, "typical": 600, "peak": 2000}
+# Recorded pages (<name>.html) placed here replace the synthetic ones
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+EMPTY_LOGO = "https://www.flashscore.com/res/image/empty-logo-team-share.gif"
+
+
+def make_matches(count: int, leagues: int = 60, seed: int = 1) -> List[Match]:
+    """Build `count` matches spread over `leagues` leagues"""
+    rng = random.Random(seed)
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    matches = []
+    
+    for i in range(count):
+        league = i % leagues
+        status = rng.choice(STATUSES)
+        started = status != "SCHEDULED"
+        home, away = f"Home Team {i}", f"Away Team {i}"
+        matches.append(Match(
+            id=f"m{i:05d}",
+            home=Team(f"team_h{i}", home, home[:3].upper(), EMPTY_LOGO),
+            away=Team(f"team_a{i}", away, away[:3].upper(), EMPTY_LOGO),
+            home_score=rng.randint(0, 3) if started else None,
+            away_score=rng.randint(0, 3) if started else None,
+            status=status,
+            minute=rng.randint(1, 90) if status == "LIVE" else (45 if status == "HT" else None),
+            start_time=(day + timedelta(minutes=15 * rng.randint(40, 90))).isoformat(),
+            league_id=f"league_{league}",
+            league_name=f"League {league}",
+            country=f"Country {league % 25}"
+        ))
+    
+    return matches
+
+
+def tick(matches: List[Match], rng: random.Random, changed: int = 20) -> List[Match]:
+    """Return a copy of `matches` with a few scores/minutes changed, like one scrape cycle"""
+    result = list(matches)
+    for index in rng.sample(range(len(result)), min(changed, len(result))):
+        match = result[index]
+        result[index] = match._replace(
+            status="LIVE",
+            home_score=(match.home_score or 0) + rng.randint(0, 1),
+            away_score=match.away_score or 0,
+            minute=min(90, (match.minute or 0) + 1),
+        )
+    return result
+
+
+def make_html(rows: int, per_league: int = 12, seed: int = 1) -> str:
+    """Build a Flashscore-like match list page with `rows` match rows"""
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Flashscore</title></head><body><div id="live-table">',
+             '<div class="sportName soccer">']
+    
+    for i in range(rows):
+        if i % per_league == 0:
+            league = i // per_league
+            parts.append(
+                '<div class="event__header"><div class="icon--flag event__title">'
+                f'<img class="flag" alt="Country {league % 25}">'
+                f'<div class="event__titleBox"><span class="event__title--type">COUNTRY {league % 25}</span>'
+                f'<span class="event__title--name">League {league}</span></div></div></div>'
+            )
+        
+        status = rng.choice(STATUSES)
+        modifier = {"LIVE": " event__match--live", "HT": " event__match--live"}.get(status, "")
+        if status == "SCHEDULED":
+            stage = f'<div class="event__time">{rng.randint(12, 22)}:{rng.choice(("00", "15", "30", "45"))}</div>'
+            scores = '<div class="event__score event__score--home">-</div><div class="event__score event__score--away">-</div>'
+        else:
+            text = {"LIVE": f"{rng.randint(1, 90)}'", "HT": "Half Time", "FT": "Finished"}[status]
+            stage = f'<div class="event__stage"><div class="event__stage--block">{text}</div></div>'
+            scores = (
+                f'<div class="event__score event__score--home">{rng.randint(0, 4)}</div>'
+                f'<div class="event__score event__score--away">{rng.randint(0, 4)}</div>'
+            )
+        
+        parts.append(
+            f'<div id="g_1_{i:08x}" title="Click for match detail!" class="event__match event__match--twoLine{modifier}">'
+            '<div class="event__check"></div>'
+            f'{stage}'
+            f'<img class="event__logo event__logo--home" alt="Home Team {i}" src="/res/image/data/h{i % 400}.png">'
+            f'<div class="event__participant event__participant--home">Home Team {i}</div>'
+            f'<img class="event__logo event__logo--away" alt="Away Team {i}" src="/res/image/data/a{i % 400}.png">'
+            f'<div class="event__participant event__participant--away">Away Team {i}</div>'
+            f'{scores}'
+            '<div class="event__part event__part--home">(0)</div><div class="event__part event__part--away">(0)</div>'
+            '<svg class="event__icon"><use xlink:href="#icon"></use></svg>'
+            '</div>'
+        )
+    
+    parts.append("</div></div></body></html>")
+    return "".join(parts)
+
+
+def make_feed(rows: int, per_league: int = 12, seed: int = 1) -> str:
+    """Build a Flashscore-like list feed (~ records, ¬ fields, ÷ values)"""
+    rng = random.Random(seed)
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    records = ["SA÷1¬~"]
+    
+    for i in range(rows):
+        if i % per_league == 0:
+            league = i // per_league
+            records.append(f"ZA÷COUNTRY {league % 25}: League {league}¬ZEE÷lg{league:05d}¬ZY÷Country {league % 25}¬~")
+        
+        status = rng.choice(STATUSES)
+        stage_type, detail = {
+            "SCHEDULED": ("1", "1"), "LIVE": ("2", rng.choice(("12", "13"))), "HT": ("2", "38"), "FT": ("3", "3"),
+        }[status]
+        kickoff = int((day + timedelta(minutes=15 * rng.randint(40, 90))).timestamp())
+        fields = [
+            f"AA÷{i:08x}", f"AD÷{kickoff}", f"AB÷{stage_type}", f"AC÷{detail}",
+            f"AE÷Home Team {i}", f"AF÷Away Team {i}",
+            f"PX÷h{i:07x}", f"PY÷a{i:07x}", f"OA÷h{i % 400}.png", f"OB÷a{i % 400}.png",
+        ]
+        if status != "SCHEDULED":
+            fields += [f"AG÷{rng.randint(0, 4)}", f"AH÷{rng.randint(0, 4)}"]
+        records.append("¬".join(fields) + "¬~")
+    
+    return "".join(records)
+
+
+def load_corpus() -> Dict[str, str]:
+    """Page HTML by corpus name, recorded pages taking precedence over synthetic ones"""
+    corpus = {}
+    for name, rows in CORPUS_ROWS.items():
+        path = os.path.join(CORPUS_DIR, f"{name}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                corpus[name] = f.read()
+        else:
+            corpus[name] = make_html(rows)
+    return corpus
@@ -0,0 +1,66 @@
+"""
+Event loop responsiveness while a large page is parsed
+
+Runs a ticker on the event loop (standing in for request handlers) while
+FlashscoreScraper.parse() handles a big synthetic page with each parse
+pool mode, and reports the worst delay the ticker saw.
+
+Usage (from render-scraper/):
+    python benchmarks/loop_latency.py [--rows 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scraper import FlashscoreScraper, create_parse_pool  # noqa: E402
+from benchmarks.fixtures import make_html  # noqa: E402
+
+TICK = 0.001
+
+
+async def measure(kind: str, html: str):
+    pool = create_parse_pool(kind, workers=1)
+    scraper = FlashscoreScraper(parse_pool=pool)
+    # Warm up workers so process start-up is not measured
+    await scraper.parse(make_html(5))
+    
+    worst = 0.0
+    done = asyncio.Event()
+    
+    async def ticker():
+        nonlocal worst
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            worst = max(worst, time.perf_counter() - start - TICK)
+    
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 5)
+    start = time.perf_counter()
+    matches = await scraper.parse(html)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    if pool:
+        pool.shutdown()
+    
+    print(f"{kind:<8}{len(matches):>8}{elapsed * 1000:>12.1f}{worst * 1000:>14.1f}")
+
+
+async def main(rows: int):
+    html = make_html(rows)
+    print(f"{'pool':<8}{'matches':>8}{'parse ms':>12}{'max lag ms':>14}")
+    for kind in ("inline", "thread", "process"):
+        await measure(kind, html)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
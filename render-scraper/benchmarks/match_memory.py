@@ -0,0 +1,81 @@
+"""
+Memory held per stored match: API dicts vs shared Match records
+
+Builds several days of parsed matches (the same teams playing again, as
+with SCRAPE_TARGETS covering other days), each row with its own string
+copies like parser output. Compares keeping them as API dicts, as the
+cache used to, with the records the cache now stores after passing them
+through TeamRegistry. Reports traced bytes per match, live allocations
+and objects the garbage collector tracks.
+
+Usage (from render-scraper/):
+    python benchmarks/match_memory.py [--matches 2000] [--days 3]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import Match, Team, TeamRegistry  # noqa: E402
+from benchmarks.fixtures import make_matches  # noqa: E402
+
+
+def _copy(value):
+    # A distinct string object with the same text, as each parsed row has
+    return "".join(list(value)) if isinstance(value, str) else value
+
+
+def parsed_days(count: int, days: int):
+    """Matches for `days` days with private string copies per row"""
+    for day in range(days):
+        for match in make_matches(count, seed=day + 1):
+            yield Match(
+                *(_copy(value) for value in match._replace(
+                    id=f"{match.id}-{day}",
+                    home=Team(*(_copy(value) for value in match.home)),
+                    away=Team(*(_copy(value) for value in match.away)),
+                ))
+            )
+
+
+def measure(build):
+    gc.collect()
+    tracked_before = len(gc.get_objects())
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracked = len(gc.get_objects()) - tracked_before
+    return kept, size, blocks, tracked
+
+
+def run(count: int, days: int):
+    total = count * days
+    
+    def as_dicts():
+        return [match.to_dict() for match in parsed_days(count, days)]
+    
+    def as_records():
+        registry = TeamRegistry()
+        return registry, [registry.match(match) for match in parsed_days(count, days)]
+    
+    print(f"{total} matches ({days} days of {count})")
+    print(f"{'storage':<12}{'bytes/match':>14}{'allocations':>13}{'gc objects':>12}")
+    for name, build in (("dicts", as_dicts), ("records", as_records)):
+        kept, size, blocks, tracked = measure(build)
+        print(f"{name:<12}{size / total:>14.0f}{blocks:>13}{tracked:>12}")
+        del kept
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=3)
+    args = parser.parse_args()
+    run(args.matches, args.days)
@@ -0,0 +1,216 @@
+"""
+Offline benchmark and regression suite
+
+Runs every hot path against the page corpus (small, typical and a
+2,000-row peak day; recorded pages in benchmarks/corpus/ replace the
+synthetic ones): parsing, update_matches, cache getters under a concurrent
+writer, and end-to-end API throughput against a fake scraper. Nothing
+touches the network.
+
+Save a baseline once, then compare later runs against it; the run exits
+with status 1 when any result is worse than the baseline by more than the
+threshold.
+
+Usage (from render-scraper/):
+    python benchmarks/suite.py [--quick] [--save baseline.json]
+    python benchmarks/suite.py --compare baseline.json [--threshold 0.25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# The API benchmark imports main; keep it from touching the disk, and its
+# clients all share one address, so don't rate limit them
+os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+os.environ.setdefault("RATE_LIMIT_RPS", "0")
+
+import httpx  # noqa: E402
+
+from cache import MatchCache  # noqa: E402
+from fastparse import parse_matches_fast  # noqa: E402
+from feed import parse_feed  # noqa: E402
+from scraper import FlashscoreScraper  # noqa: E402
+from benchmarks.fixtures import CORPUS_ROWS, load_corpus, make_feed, make_matches, tick  # noqa: E402
+from benchmarks.cache_contention import measure, percentile  # noqa: E402
+
+# Units where a bigger number is better; everything else is a duration or size
+HIGHER_IS_BETTER = {"req/s"}
+
+
+class Result(NamedTuple):
+    name: str
+    value: float
+    unit: str
+
+
+def best_of(function, repeat: int) -> float:
+    """Fastest of `repeat` calls in seconds; the minimum is the least noisy estimate"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_parsing(corpus: Dict[str, str], repeat: int) -> List[Result]:
+    scraper = FlashscoreScraper()
+    results = []
+    for name, html in corpus.items():
+        results.append(Result(f"parse.fast.{name}", best_of(lambda: parse_matches_fast(html), repeat) * 1000, "ms"))
+        feed = make_feed(CORPUS_ROWS[name])
+        results.append(Result(f"parse.feed.{name}", best_of(lambda: parse_feed(feed), repeat) * 1000, "ms"))
+    # The fallback parser only matters while it stays usable on a normal day
+    html = corpus["typical"]
+    results.append(Result("parse.bs4.typical", best_of(lambda: scraper._parse_matches_bs4(html), max(1, repeat // 3)) * 1000, "ms"))
+    return results
+
+
+def bench_updates(repeat: int) -> List[Result]:
+    results = []
+    for name, rows in CORPUS_ROWS.items():
+        matches = make_matches(rows)
+        results.append(Result(
+            f"update.cold.{name}", best_of(lambda: MatchCache().update_matches(matches), repeat) * 1000, "ms"
+        ))
+        
+        cache = MatchCache()
+        cache.update_matches(matches)
+        rng = random.Random(3)
+        cycles = [tick(matches, rng) for _ in range(repeat)]
+        cycle = iter(cycles)
+        results.append(Result(
+            f"update.tick.{name}", best_of(lambda: cache.update_matches(next(cycle)), repeat) * 1000, "ms"
+        ))
+        results.append(Result(f"update.unchanged.{name}", best_of(lambda: cache.update_matches(cycles[-1]), repeat) * 1000, "ms"))
+    return results
+
+
+def bench_getters(seconds: float, readers: int = 4) -> List[Result]:
+    """p99 of each getter on a peak day while a writer applies a change every 50 ms"""
+    latencies, _ = measure(CORPUS_ROWS["peak"], readers, seconds, 0.05)
+    return [
+        Result(f"getter.p99.{name}", percentile(samples, 0.99) / 1000, "us")
+        for name, samples in latencies.items() if samples
+    ]
+
+
+async def _api_throughput(seconds: float, clients: int) -> List[Result]:
+    import main
+    
+    # Fake scraper: a peak day, updated every second like a live scrape
+    matches = make_matches(CORPUS_ROWS["peak"])
+    main.apply_scrape(matches)
+    stop = asyncio.Event()
+    
+    async def fake_scraper():
+        rng = random.Random(11)
+        current = matches
+        while not stop.is_set():
+            current = tick(current, rng)
+            main.hub.publish(await asyncio.to_thread(main.apply_scrape, current))
+            try:
+                await asyncio.wait_for(stop.wait(), 1.0)
+            except asyncio.TimeoutError:
+                pass
+    
+    routes = (
+        ("today", "/api/today", {"accept-encoding": "gzip"}),
+        ("live", "/api/live", {"accept-encoding": "gzip"}),
+        ("matches", "/api/matches?status=LIVE", {}),
+        ("match", "/api/match/m00001", {}),
+    )
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        scraper_task = asyncio.create_task(fake_scraper())
+        for name, path, headers in routes:
+            count = 0
+            deadline = time.perf_counter() + seconds
+            
+            async def worker():
+                nonlocal count
+                while time.perf_counter() < deadline:
+                    response = await client.get(path, headers=headers)
+                    response.raise_for_status()
+                    count += 1
+            
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(clients)))
+            results.append(Result(f"api.rps.{name}", count / (time.perf_counter() - start), "req/s"))
+        stop.set()
+        await scraper_task
+    return results
+
+
+def bench_api(seconds: float, clients: int = 8) -> List[Result]:
+    """In-process ASGI requests per second with a fake scraper updating the cache"""
+    return asyncio.run(_api_throughput(seconds, clients))
+
+
+def compare(results: List[Result], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print results next to the baseline and return the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':<34}{'value':>12}{'baseline':>12}{'change':>9}")
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous:
+            print(f"{result.name:<34}{result.value:>12.2f}{'-':>12}{'new':>9}  {result.unit}")
+            continue
+        change = result.value / previous - 1
+        worse = -change if result.unit in HIGHER_IS_BETTER else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(result.name)
+        print(f"{result.name:<34}{result.value:>12.2f}{previous:>12.2f}{change * 100:>8.0f}%  {result.unit}{flag}")
+    return regressions
+
+
+def run(quick: bool) -> List[Result]:
+    repeat = 3 if quick else 10
+    seconds = 0.5 if quick else 2.0
+    corpus = load_corpus()
+    
+    results = []
+    for title, bench in (
+        ("parsing", lambda: bench_parsing(corpus, repeat)),
+        ("update_matches", lambda: bench_updates(repeat)),
+        ("getters under a writer", lambda: bench_getters(seconds)),
+        ("API throughput", lambda: bench_api(seconds)),
+    ):
+        print(f"Running {title}...", file=sys.stderr)
+        results.extend(bench())
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, shorter timed runs")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+    
+    results = run(args.quick)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"results": {result.name: result.value for result in results}}, f, indent=2)
+        print(f"Saved baseline to {args.save}", file=sys.stderr)
+    
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
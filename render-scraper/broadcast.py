@@ -0,0 +1,98 @@
+"""
+Broadcast hub for pushing match changes to connected clients
+Fans out cache change records to SSE / WebSocket subscribers
+"""
+
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any, Set
+
+logger = logging.getLogger(__name__)
+
+# Published batches buffered per client before its backlog is replaced by a reset
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscriber:
+    """Single push client with a bounded queue of change batches"""
+    
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+        # Set while a reset that replaced the backlog is still unread
+        self.resetting = False
+    
+    def offer(self, changes: List[Dict[str, Any]]) -> bool:
+        """Queue a batch without blocking, False if the client is hopelessly behind
+        
+        A full queue is replaced by a single reset, so the client reloads
+        the match list instead of working through the backlog. Only a
+        client that hasn't even read that reset by the next batch fails.
+        """
+        if self.resetting:
+            return False
+        try:
+            self._queue.put_nowait(changes)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait([{"op": "reset", "version": changes[-1]["version"]}])
+            self.resetting = True
+        return True
+    
+    def drop(self):
+        """Discard pending events and wake the consumer so it disconnects"""
+        self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+    
+    async def get(self, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """Wait for the next batch of changes, None once dropped
+        
+        Raises asyncio.TimeoutError when nothing arrives within `timeout`.
+        """
+        changes = await asyncio.wait_for(self._queue.get(), timeout)
+        self.resetting = False
+        return changes
+
+
+class BroadcastHub:
+    """Fans out change records to all subscribers
+    
+    Must be used from the event loop thread. Each publish queues one batch
+    per subscriber; a subscriber that falls behind gets a reset instead of
+    blocking the publisher, and is dropped only if it is still behind on the
+    next publish, so one stalled socket cannot delay the others.
+    """
+    
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self.dropped_total = 0
+    
+    def subscribe(self) -> Subscriber:
+        """Register a new subscriber"""
+        subscriber = Subscriber(self._queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a subscriber"""
+        self._subscribers.discard(subscriber)
+    
+    def publish(self, changes: List[Dict[str, Any]]):
+        """Push change records to every subscriber"""
+        if not changes or not self._subscribers:
+            return
+        
+        for subscriber in list(self._subscribers):
+            if not subscriber.offer(changes):
+                logger.warning("Dropping slow push subscriber")
+                subscriber.drop()
+                self._subscribers.discard(subscriber)
+                self.dropped_total += 1
+    
+    def get_subscriber_count(self) -> int:
+        """Get number of connected subscribers"""
+        return len(self._subscribers)
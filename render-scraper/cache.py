@@ -3,102 +3,748 @@ In-memory cache for scraped match data
 Handles caching with different TTLs for live/scheduled/finished matches
 """
 
+import bisect
 import logging
+import time
+import uuid
+from collections import Counter, OrderedDict
 from datetime import datetime, timezone
 from threading import Lock
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, NamedTuple, Set, Tuple
+
+from models import Match, TeamRegistry
+from snapshots import ResponseSnapshot, encode_json
 
 logger = logging.getLogger(__name__)
 
+# Number of match deltas kept for incremental (/api/changes) clients
+CHANGE_LOG_SIZE = 5000
+
+LIVE_STATUSES = ("LIVE", "HT")
+FINISHED_STATUSES = ("FT", "POSTPONED", "CANCELLED")
+
+# Seconds a match may go unseen by the scraper before it is evicted
+STATUS_TTLS = {
+    "LIVE": 30 * 60,
+    "HT": 30 * 60,
+    "SCHEDULED": 12 * 3600,
+    "FT": 3 * 3600,
+    "POSTPONED": 3 * 3600,
+    "CANCELLED": 3 * 3600,
+}
+DEFAULT_TTL = 6 * 3600
+
+# Hard retention budget; finished matches are evicted first, least recently seen first
+MAX_ENTRIES = 20000
+MAX_BYTES = 32 * 1024 * 1024
+
+SNAPSHOT_KINDS = ("live", "today", "leagues")
+
+
+class CacheState(NamedTuple):
+    """Immutable view of the cache
+    
+    A published state is never modified (apart from the lazily filled
+    `snapshots` memo), so readers can use it without locking.
+    """
+    version: int
+    matches: Dict[str, Match]
+    # match ID -> match, in insertion order
+    live: Dict[str, Match]
+    # league ID -> {"id", "name", "country", "matches": {match ID: None}}
+    leagues: Dict[str, Dict[str, Any]]
+    # Secondary indexes: key -> {match ID: None}
+    by_status: Dict[str, Dict[str, None]]
+    by_country: Dict[str, Dict[str, None]]
+    by_team: Dict[str, Dict[str, None]]
+    # Sorted (kickoff timestamp, match ID) pairs and the reverse lookup
+    kickoffs: List[Tuple[float, str]]
+    kickoff_at: Dict[str, float]
+    changes: Tuple[Dict[str, Any], ...]
+    last_update: Optional[str]
+    snapshots: Dict[str, ResponseSnapshot]
+
+
+EMPTY_STATE = CacheState(0, {}, {}, {}, {}, {}, {}, [], {}, (), None, {})
+
+
+def index_key(value: Optional[str]) -> Optional[str]:
+    """Normalize a country/team name for index lookups"""
+    if not value:
+        return None
+    return " ".join(value.split()).casefold()
+
+
+def parse_kickoff(value: Optional[str]) -> Optional[float]:
+    """Parse an ISO 8601 kickoff time to a UTC timestamp"""
+    if not value:
+        return None
+    try:
+        kickoff = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=timezone.utc)
+    return kickoff.timestamp()
+
+
+def team_keys(match: Optional[Match]) -> Set[str]:
+    keys = set()
+    if match is not None:
+        for team in (match.home, match.away):
+            key = index_key(team.name)
+            if key:
+                keys.add(key)
+    return keys
+
+
+class StateBuilder:
+    """Copy-on-write editor producing the next CacheState
+    
+    Only the containers touched by an edit are copied, so an update costs
+    O(matches) for the top-level copies plus O(changed) index work.
+    """
+    
+    def __init__(self, state: CacheState):
+        self._state = state
+        self.matches = dict(state.matches)
+        self.live = dict(state.live)
+        self.leagues = dict(state.leagues)
+        self.by_status = dict(state.by_status)
+        self.by_country = dict(state.by_country)
+        self.by_team = dict(state.by_team)
+        self.kickoffs = list(state.kickoffs)
+        self.kickoff_at = dict(state.kickoff_at)
+        # (index name, key) pairs whose bucket already belongs to this builder
+        self._copied: Set[Tuple[str, str]] = set()
+    
+    def _bucket(self, name: str, index: Dict[str, Dict[str, None]], key: str) -> Dict[str, None]:
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = {}
+        elif (name, key) not in self._copied:
+            bucket = dict(bucket)
+        index[key] = bucket
+        self._copied.add((name, key))
+        return bucket
+    
+    def _reindex(self, name: str, index: Dict[str, Dict[str, None]], match_id: str,
+                 old_keys: Iterable[str], new_keys: Iterable[str]):
+        old_keys, new_keys = set(old_keys), set(new_keys)
+        for key in old_keys - new_keys:
+            bucket = self._bucket(name, index, key)
+            bucket.pop(match_id, None)
+            if not bucket:
+                del index[key]
+        for key in new_keys - old_keys:
+            self._bucket(name, index, key)[match_id] = None
+    
+    def _league_for_write(self, league_id: str, match: Match) -> Dict[str, Any]:
+        league = self.leagues.get(league_id)
+        if league is None:
+            league = {
+                "id": league_id,
+                "name": match.league_name or "Unknown",
+                "country": match.country,
+                "matches": {}
+            }
+        elif ("leagues", league_id) not in self._copied:
+            league = {**league, "matches": dict(league["matches"])}
+        self.leagues[league_id] = league
+        self._copied.add(("leagues", league_id))
+        return league
+    
+    def _set_kickoff(self, match_id: str, kickoff: Optional[float]):
+        old = self.kickoff_at.get(match_id)
+        if old == kickoff:
+            return
+        if old is not None:
+            position = bisect.bisect_left(self.kickoffs, (old, match_id))
+            del self.kickoffs[position]
+            del self.kickoff_at[match_id]
+        if kickoff is not None:
+            bisect.insort(self.kickoffs, (kickoff, match_id))
+            self.kickoff_at[match_id] = kickoff
+    
+    def put(self, match: Match):
+        """Insert or replace a match and update every index"""
+        match_id = match.id
+        previous = self.matches.get(match_id)
+        
+        # Store match
+        self.matches[match_id] = match
+        
+        # Update live index
+        if match.status in LIVE_STATUSES:
+            self.live[match_id] = match
+        else:
+            self.live.pop(match_id, None)
+        
+        # Move between leagues if the scraper reassigned it
+        old_league_id = previous.league_id if previous else None
+        league_id = match.league_id
+        if old_league_id and old_league_id != league_id and old_league_id in self.leagues:
+            old_league = self._league_for_write(old_league_id, previous)
+            old_league["matches"].pop(match_id, None)
+            if not old_league["matches"]:
+                del self.leagues[old_league_id]
+        
+        # Update league index
+        if league_id:
+            self._league_for_write(league_id, match)["matches"][match_id] = None
+        
+        self._reindex("status", self.by_status, match_id,
+                      filter(None, [previous and previous.status]), filter(None, [match.status]))
+        self._reindex("country", self.by_country, match_id,
+                      filter(None, [previous and index_key(previous.country)]),
+                      filter(None, [index_key(match.country)]))
+        self._reindex("team", self.by_team, match_id, team_keys(previous), team_keys(match))
+        self._set_kickoff(match_id, parse_kickoff(match.start_time))
+    
+    def remove(self, match_id: str):
+        """Drop a match from the state and every index"""
+        previous = self.matches.pop(match_id, None)
+        if previous is None:
+            return
+        
+        self.live.pop(match_id, None)
+        
+        league_id = previous.league_id
+        if league_id and league_id in self.leagues:
+            league = self._league_for_write(league_id, previous)
+            league["matches"].pop(match_id, None)
+            if not league["matches"]:
+                del self.leagues[league_id]
+        
+        self._reindex("status", self.by_status, match_id, filter(None, [previous.status]), [])
+        self._reindex("country", self.by_country, match_id,
+                      filter(None, [index_key(previous.country)]), [])
+        self._reindex("team", self.by_team, match_id, team_keys(previous), [])
+        self._set_kickoff(match_id, None)
+    
+    def build(self, version: int, changes: Tuple[Dict[str, Any], ...], last_update: Optional[str]) -> CacheState:
+        """Produce the new immutable state"""
+        return CacheState(
+            version=version,
+            matches=self.matches,
+            live=self.live,
+            leagues=self.leagues,
+            by_status=self.by_status,
+            by_country=self.by_country,
+            by_team=self.by_team,
+            kickoffs=self.kickoffs,
+            kickoff_at=self.kickoff_at,
+            changes=changes,
+            last_update=last_update,
+            snapshots={}
+        )
+
 
 class MatchCache:
-    """Thread-safe in-memory cache for match data"""
+    """Thread-safe in-memory cache for match data
     
-    def __init__(self):
-        self._matches: Dict[str, Dict[str, Any]] = {}
-        self._leagues: Dict[str, Dict[str, Any]] = {}
-        self._last_update: Optional[str] = None
-        self._lock = Lock()
+    Writers build a new CacheState and swap it in with a single attribute
+    assignment; readers take no lock and always see a consistent state.
+    """
     
-    def update_matches(self, matches: List[Dict[str, Any]]):
-        """Update cache with new match data"""
-        with self._lock:
+    def __init__(
+        self,
+        change_log_size: int = CHANGE_LOG_SIZE,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self._state = EMPTY_STATE._replace(snapshots={})
+        self._change_log_size = change_log_size
+        self._ttls = {**STATUS_TTLS, **(ttls or {})}
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # Writer-only bookkeeping: match ID -> last time seen, least recent first
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        # Approximate encoded size per match
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._evictions: Counter = Counter()
+        # One shared record per team across all stored matches
+        self._teams = TeamRegistry()
+        # Distinguishes versions (and ETags) of different process lifetimes
+        self._epoch = uuid.uuid4().hex[:8]
+        # Serializes writers only
+        self._write_lock = Lock()
+        # Readers only lock to avoid encoding the same snapshot concurrently
+        self._build_locks = {kind: Lock() for kind in SNAPSHOT_KINDS}
+        self._latest_snapshots: Dict[str, ResponseSnapshot] = {}
+    
+    def update_matches(self, matches: List[Match], removed: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Update cache with new match data and return the recorded changes
+        
+        `removed` lists IDs the caller replaced with other ones (e.g. a
+        merged fixture re-keyed); they are removed in the same version run.
+        """
+        with self._write_lock:
+            state = self._state
+            version = state.version
+            changes = []
+            updated: Dict[str, Match] = {}
+            
+            now = time.time()
+            
             for match in matches:
-                match_id = match.get("id")
+                match_id = match.id
                 if not match_id:
                     continue
                 
-                # Store match
-                self._matches[match_id] = match
+                self._seen[match_id] = now
+                self._seen.move_to_end(match_id)
+                
+                previous = updated.get(match_id) or state.matches.get(match_id)
+                if match.start_time is None and previous is not None:
+                    # Live and finished rows show no kickoff; keep the one already known
+                    match = match._replace(start_time=previous.start_time)
+                # Skip matches identical to the cached copy (a tuple comparison)
+                if match == previous:
+                    continue
+                data = match.to_dict()
+                change = self._diff(previous, data)
+                if change is None:
+                    continue
+                
+                version += 1
+                change["version"] = version
+                changes.append(change)
+                updated[match_id] = self._teams.match(match)
+                
+                size = len(encode_json(data))
+                self._total_bytes += size - self._sizes.get(match_id, 0)
+                self._sizes[match_id] = size
+            
+            evicted = self._select_evictions(state, updated, now) if matches else {}
+            for match_id in removed:
+                if match_id in self._seen and match_id not in updated:
+                    evicted.setdefault(match_id, "replaced")
+            for match_id, reason in evicted.items():
+                version += 1
+                changes.append({"id": match_id, "op": "remove", "version": version})
+                del self._seen[match_id]
+                self._total_bytes -= self._sizes.pop(match_id, 0)
+                self._evictions[reason] += 1
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} matches: {dict(Counter(evicted.values()))}")
+            
+            last_update = datetime.now(timezone.utc).isoformat()
+            
+            if not changes:
+                # Nothing changed: keep structures (and encoded snapshots)
+                self._state = state._replace(last_update=last_update)
+                return changes
+            
+            builder = StateBuilder(state)
+            for match in updated.values():
+                builder.put(match)
+            for match_id in evicted:
+                builder.remove(match_id)
+            
+            log = state.changes + tuple(changes)
+            if len(log) > self._change_log_size:
+                log = log[-self._change_log_size:]
+            
+            self._state = builder.build(version, log, last_update)
+            if len(self._teams) > 2 * len(builder.matches) + 1000:
+                self._teams.retain(builder.matches.values())
+            logger.debug(
+                f"Cache updated: {len(builder.matches)} matches, {len(builder.leagues)} leagues, "
+                f"{len(changes)} changes (version {version})"
+            )
+        
+        return changes
+    
+    def _select_evictions(self, state: CacheState, updated: Dict[str, Match], now: float) -> Dict[str, str]:
+        """Pick matches to evict, mapped to the reason ("ttl", "rollover" or "budget")
+        
+        Only called when a scrape delivered data, so a broken scraper or an
+        empty poll never empties the cache.
+        """
+        midnight = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ).timestamp()
+        evicted: Dict[str, str] = {}
+        
+        def current_status(match_id: str) -> Optional[str]:
+            match = updated.get(match_id) or state.matches.get(match_id)
+            return match.status if match else None
+        
+        for match_id, seen in self._seen.items():
+            status = current_status(match_id)
+            
+            # Per-status TTL since the scraper last reported the match
+            if now - seen > self._ttls.get(status, DEFAULT_TTL):
+                evicted[match_id] = "ttl"
+                continue
+            
+            # Day rollover: drop earlier days' matches the scraper no longer shows
+            if seen < midnight and status not in LIVE_STATUSES:
+                # Matches in `updated` were just seen, so the stored kickoff is current
+                kickoff = state.kickoff_at.get(match_id)
+                if kickoff is not None and kickoff < midnight:
+                    evicted[match_id] = "rollover"
+        
+        entries = len(self._seen) - len(evicted)
+        size = self._total_bytes - sum(self._sizes.get(match_id, 0) for match_id in evicted)
+        if entries <= self._max_entries and size <= self._max_bytes:
+            return evicted
+        
+        # Over budget: finished matches first, then anything not live, LRU order
+        for allowed in (FINISHED_STATUSES, None):
+            for match_id in self._seen:
+                if entries <= self._max_entries and size <= self._max_bytes:
+                    return evicted
+                if match_id in evicted:
+                    continue
+                status = current_status(match_id)
+                if status in LIVE_STATUSES or (allowed and status not in allowed):
+                    continue
+                evicted[match_id] = "budget"
+                entries -= 1
+                size -= self._sizes.get(match_id, 0)
+        
+        if entries > self._max_entries or size > self._max_bytes:
+            logger.warning(f"Cache over budget with live matches only: {entries} matches, {size} bytes")
+        return evicted
+    
+    @staticmethod
+    def _diff(previous: Optional[Match], match: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a change record between the cached match and incoming API dict, None if equal"""
+        if previous is None:
+            return {"id": match["id"], "op": "add", "fields": match}
+        
+        previous = previous.to_dict()
+        fields = {
+            key: value for key, value in match.items()
+            if previous.get(key) != value
+        }
+        # Keys dropped by the scraper are reported as null
+        for key in previous.keys() - match.keys():
+            fields[key] = None
+        
+        if not fields:
+            return None
+        return {"id": match["id"], "op": "update", "fields": fields}
+    
+    def export(self) -> Dict[str, Any]:
+        """Plain-data copy of the cache for persisting to disk"""
+        with self._write_lock:
+            state = self._state
+            seen = dict(self._seen)
+        return {
+            "epoch": self._epoch,
+            "version": state.version,
+            "last_update": state.last_update,
+            "matches": [match.to_dict() for match in state.matches.values()],
+            "seen": seen,
+            "changes": list(state.changes),
+        }
+    
+    def restore(self, data: Dict[str, Any]) -> int:
+        """Load an exported cache and return the number of matches restored
+        
+        Keeps the saved epoch, version and change log so clients resume
+        where they left off. Restored matches carry `"stale": true` until
+        the scraper reports them again; matches whose TTL ran out while the
+        process was down are dropped. Both are recorded as changes.
+        """
+        now = time.time()
+        with self._write_lock:
+            if self._state.matches:
+                logger.warning("Cache already has data, not restoring snapshot")
+                return 0
+            
+            builder = StateBuilder(EMPTY_STATE)
+            version = data["version"]
+            changes = []
+            seen_at = data.get("seen", {})
+            
+            for match_data in data["matches"]:
+                match = Match.from_dict(match_data)._replace(stale=True)
+                seen = seen_at.get(match.id, 0.0)
+                version += 1
+                
+                if now - seen > self._ttls.get(match.status, DEFAULT_TTL):
+                    changes.append({"id": match.id, "op": "remove", "version": version})
+                    self._evictions["ttl"] += 1
+                    continue
                 
-                # Update league index
-                league_id = match.get("leagueId")
-                if league_id:
-                    if league_id not in self._leagues:
-                        self._leagues[league_id] = {
-                            "id": league_id,
-                            "name": match.get("leagueName", "Unknown"),
-                            "country": match.get("country", ""),
-                            "matches": []
-                        }
-                    
-                    # Add match ID to league (avoid duplicates)
-                    if match_id not in self._leagues[league_id]["matches"]:
-                        self._leagues[league_id]["matches"].append(match_id)
-            
-            self._last_update = datetime.now(timezone.utc).isoformat()
-            logger.debug(f"Cache updated: {len(self._matches)} matches, {len(self._leagues)} leagues")
-    
-    def get_all_matches(self) -> List[Dict[str, Any]]:
+                changes.append({"id": match.id, "op": "update", "fields": {"stale": True}, "version": version})
+                builder.put(self._teams.match(match))
+                self._seen[match.id] = seen
+                self._sizes[match.id] = len(encode_json(match.to_dict()))
+            
+            # Eviction walks _seen least recently seen first
+            self._seen = OrderedDict(sorted(self._seen.items(), key=lambda item: item[1]))
+            self._total_bytes = sum(self._sizes.values())
+            self._epoch = data["epoch"]
+            
+            log = tuple(data.get("changes", ())) + tuple(changes)
+            self._state = builder.build(version, log[-self._change_log_size:], data.get("last_update"))
+            self._latest_snapshots.clear()
+        
+        return len(builder.matches)
+    
+    def load(self, data: Dict[str, Any]):
+        """Replace the whole cache with an exported one (replica side)"""
+        builder = StateBuilder(EMPTY_STATE)
+        for match_data in data["matches"]:
+            builder.put(self._teams.match(Match.from_dict(match_data)))
+        
+        with self._write_lock:
+            self._epoch = data["epoch"]
+            log = tuple(data.get("changes", ()))[-self._change_log_size:]
+            self._state = builder.build(data["version"], log, data.get("last_update"))
+            self._latest_snapshots.clear()
+    
+    def apply_changes(self, changes: List[Dict[str, Any]], last_update: Optional[str] = None) -> bool:
+        """Replay change records from another cache (replica side)
+        
+        Returns False, changing nothing, when the records don't continue
+        from the current version; the caller must then load() a full copy.
+        """
+        with self._write_lock:
+            state = self._state
+            changes = [change for change in changes if change["version"] > state.version]
+            if not changes:
+                return True
+            if changes[0]["version"] != state.version + 1:
+                return False
+            
+            builder = StateBuilder(state)
+            for change in changes:
+                if change["op"] == "remove":
+                    builder.remove(change["id"])
+                    continue
+                data = change["fields"]
+                if change["op"] == "update":
+                    previous = builder.matches.get(change["id"])
+                    if previous is None:
+                        return False
+                    # Dropped keys arrive as null, which from_dict treats as unset
+                    data = {**previous.to_dict(), **data}
+                builder.put(self._teams.match(Match.from_dict(data)))
+            
+            log = (state.changes + tuple(changes))[-self._change_log_size:]
+            self._state = builder.build(changes[-1]["version"], log, last_update or state.last_update)
+        return True
+    
+    def get_state(self) -> CacheState:
+        """Get the current immutable state"""
+        return self._state
+    
+    def get_changes(self, since: int) -> Dict[str, Any]:
+        """Get changes recorded after version `since`
+        
+        `reset` is set when the requested version is no longer covered by the
+        change log (or comes from another process lifetime); clients must then
+        reload the full match list.
+        """
+        state = self._state
+        log = state.changes
+        oldest = log[0]["version"] if log else state.version + 1
+        if since > state.version or (since < oldest - 1 and since < state.version):
+            return {"version": state.version, "reset": True, "changes": []}
+        
+        # Versions in the log are consecutive
+        start = max(0, since - oldest + 1)
+        return {"version": state.version, "reset": False, "changes": list(log[start:])}
+    
+    def get_version(self) -> int:
+        """Get current change version"""
+        return self._state.version
+    
+    def get_epoch(self) -> str:
+        """Get the ID of the cache lifetime versions belong to"""
+        return self._epoch
+    
+    def get_all_matches(self) -> List[Match]:
         """Get all cached matches"""
-        with self._lock:
-            return list(self._matches.values())
+        return list(self._state.matches.values())
     
-    def get_live_matches(self) -> List[Dict[str, Any]]:
+    def get_live_matches(self) -> List[Match]:
         """Get only live and half-time matches"""
-        with self._lock:
-            return [
-                match for match in self._matches.values()
-                if match.get("status") in ("LIVE", "HT")
-            ]
+        return list(self._state.live.values())
     
-    def get_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+    def get_match(self, match_id: str) -> Optional[Match]:
         """Get single match by ID"""
-        with self._lock:
-            return self._matches.get(match_id)
+        return self._state.matches.get(match_id)
+    
+    def find_matches(
+        self,
+        statuses: Optional[List[str]] = None,
+        league_id: Optional[str] = None,
+        country: Optional[str] = None,
+        team: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        state: Optional[CacheState] = None,
+    ) -> List[Match]:
+        """Find matches by status, league, country, team and kickoff range
+        
+        The most selective index drives the scan and the others are O(1)
+        membership checks, so the cost is proportional to the result rather
+        than the cache size. Results are ordered by kickoff time. `state`
+        pins the search to a state taken earlier with get_state().
+        """
+        if state is None:
+            state = self._state
+        candidates: List[Any] = []
+        
+        if statuses:
+            status_ids: Dict[str, None] = {}
+            for status in statuses:
+                status_ids.update(state.by_status.get(status.upper(), {}))
+            candidates.append(status_ids)
+        if league_id:
+            candidates.append(state.leagues.get(league_id, {}).get("matches", {}))
+        if country:
+            candidates.append(state.by_country.get(index_key(country), {}))
+        if team:
+            candidates.append(state.by_team.get(index_key(team), {}))
+        
+        timed = start is not None or end is not None
+        if timed:
+            low = 0 if start is None else bisect.bisect_left(state.kickoffs, (start, ""))
+            high = len(state.kickoffs) if end is None else bisect.bisect_right(state.kickoffs, (end, "\uffff"))
+            in_range = [match_id for _, match_id in state.kickoffs[low:high]]
+        
+        if not candidates:
+            driver = in_range if timed else list(state.matches)
+        else:
+            driver = min(candidates, key=len)
+            if timed and len(in_range) < len(driver):
+                driver = in_range
+        
+        result = []
+        for match_id in driver:
+            if any(match_id not in index for index in candidates):
+                continue
+            if timed:
+                kickoff = state.kickoff_at.get(match_id)
+                if kickoff is None or (start is not None and kickoff < start) or (end is not None and kickoff > end):
+                    continue
+            match = state.matches.get(match_id)
+            if match is not None:
+                result.append(match)
+        
+        result.sort(key=lambda match: state.kickoff_at.get(match.id, float("inf")))
+        return result
+    
+    def get_next_kickoff(self, after: float, status: str = "SCHEDULED") -> Optional[float]:
+        """Earliest kickoff at or after `after` among matches with a status"""
+        state = self._state
+        with_status = state.by_status.get(status, {})
+        kickoffs = state.kickoffs
+        for index in range(bisect.bisect_left(kickoffs, (after, "")), len(kickoffs)):
+            kickoff, match_id = kickoffs[index]
+            if match_id in with_status:
+                return kickoff
+        return None
     
     def get_leagues(self) -> List[Dict[str, Any]]:
         """Get all leagues with their matches"""
-        with self._lock:
-            result = []
-            for league_id, league in self._leagues.items():
-                league_data = {
-                    "id": league["id"],
-                    "name": league["name"],
-                    "country": league["country"],
-                    "matches": [
-                        self._matches[mid] 
-                        for mid in league["matches"] 
-                        if mid in self._matches
-                    ]
-                }
-                if league_data["matches"]:
-                    result.append(league_data)
-            return result
+        return self._league_list(self._state)
+    
+    @staticmethod
+    def _league_list(state: CacheState) -> List[Dict[str, Any]]:
+        result = []
+        for league in state.leagues.values():
+            league_data = {
+                "id": league["id"],
+                "name": league["name"],
+                "country": league["country"],
+                "matches": [
+                    state.matches[mid]
+                    for mid in league["matches"]
+                    if mid in state.matches
+                ]
+            }
+            if league_data["matches"]:
+                result.append(league_data)
+        return result
+    
+    def get_snapshot(self, kind: str) -> ResponseSnapshot:
+        """Get the pre-encoded response for "live", "today" or "leagues"
+        
+        Snapshots are built on first use and reused until the cache version
+        changes, so reads cost the same however many matches are cached.
+        While one thread encodes a new version, other readers are served the
+        previous snapshot instead of encoding the same payload in parallel.
+        """
+        state = self._state
+        snapshot = state.snapshots.get(kind)
+        if snapshot is not None:
+            return snapshot
+        
+        build_lock = self._build_locks.get(kind)
+        if build_lock is None:
+            raise ValueError(f"Unknown snapshot kind: {kind}")
+        
+        if not build_lock.acquire(blocking=False):
+            previous = self._latest_snapshots.get(kind)
+            if previous is not None:
+                return previous
+            build_lock.acquire()
+        
+        try:
+            # Another thread may have finished this version meanwhile
+            snapshot = state.snapshots.get(kind)
+            if snapshot is not None:
+                return snapshot
+            
+            if kind == "live":
+                items_key, items = "matches", [match.to_dict() for match in state.live.values()]
+            elif kind == "today":
+                items_key, items = "matches", [match.to_dict() for match in state.matches.values()]
+            else:
+                items_key, items = "leagues", [
+                    {**league, "matches": [match.to_dict() for match in league["matches"]]}
+                    for league in self._league_list(state)
+                ]
+            
+            # No last_update: scrapes that change nothing move it without a new version
+            payload = {
+                items_key: items,
+                "count": len(items),
+                "version": state.version,
+            }
+            snapshot = ResponseSnapshot(payload, state.version, f'"{kind}-{self._epoch}-{state.version}"')
+            state.snapshots[kind] = snapshot
+            self._latest_snapshots[kind] = snapshot
+            return snapshot
+        finally:
+            build_lock.release()
     
     def get_match_count(self) -> int:
         """Get total number of cached matches"""
-        with self._lock:
-            return len(self._matches)
+        return len(self._state.matches)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and eviction counters"""
+        state = self._state
+        return {
+            "matches": len(state.matches),
+            "live": len(state.live),
+            "leagues": len(state.leagues),
+            "bytes": self._total_bytes,
+            "evictions": dict(self._evictions),
+        }
     
     def get_last_update(self) -> Optional[str]:
         """Get last update timestamp"""
-        with self._lock:
-            return self._last_update
+        return self._state.last_update
     
     def clear(self):
         """Clear all cached data"""
-        with self._lock:
-            self._matches.clear()
-            self._leagues.clear()
-            self._last_update = None
+        with self._write_lock:
+            # Bump the version so change feed clients reset and ETags change
+            self._state = EMPTY_STATE._replace(version=self._state.version + 1, snapshots={})
+            self._latest_snapshots.clear()
+            self._seen.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
@@ -0,0 +1,233 @@
+"""
+Match detail enrichment
+Fetches events and statistics for requested and popular live matches, coalesced and cached per match status
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # Optional: without it /api/match returns the row alone
+    httpx = None
+
+import metrics
+from cache import LIVE_STATUSES
+from feed import DETAIL_FEED_BASE, FEED_SIGN, INCIDENTS_FEED, STATISTICS_FEED, parse_incidents, parse_statistics
+from models import Match
+
+logger = logging.getLogger(__name__)
+
+# Detail fetches in flight at once, across client requests and the background refresh
+ENRICH_CONCURRENCY = int(os.environ.get("ENRICH_CONCURRENCY", "4"))
+# How long /api/match waits for a detail fetch before answering without it (seconds)
+ENRICH_WAIT = float(os.environ.get("ENRICH_WAIT", "3"))
+# Detail lifetimes by match status (seconds); a score or status change
+# invalidates them straight away
+ENRICH_TTL_LIVE = float(os.environ.get("ENRICH_TTL_LIVE", "30"))
+ENRICH_TTL_SCHEDULED = float(os.environ.get("ENRICH_TTL_SCHEDULED", "900"))
+ENRICH_TTL_FINISHED = float(os.environ.get("ENRICH_TTL_FINISHED", "21600"))
+# Live matches requested within ENRICH_POPULAR_WINDOW seconds are refreshed
+# in the background, the ENRICH_POPULAR_MAX most requested first
+ENRICH_POPULAR_WINDOW = float(os.environ.get("ENRICH_POPULAR_WINDOW", "600"))
+ENRICH_POPULAR_MAX = int(os.environ.get("ENRICH_POPULAR_MAX", "20"))
+# After a failed fetch a match's details aren't fetched again for this long (seconds)
+ENRICH_RETRY_AFTER = float(os.environ.get("ENRICH_RETRY_AFTER", "30"))
+ENRICH_TIMEOUT = 10.0
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def details_ttl(status: str) -> float:
+    if status in LIVE_STATUSES:
+        return ENRICH_TTL_LIVE
+    if status == "SCHEDULED":
+        return ENRICH_TTL_SCHEDULED
+    return ENRICH_TTL_FINISHED
+
+
+def _stamp(match: Match) -> Tuple[str, Optional[int], Optional[int]]:
+    """What makes fetched details outdated the moment it changes"""
+    return match.status, match.home_score, match.away_score
+
+
+class DetailEntry(NamedTuple):
+    details: Dict[str, Any]
+    stamp: Tuple[str, Optional[int], Optional[int]]
+    expires: float
+
+
+class Enricher:
+    """Per-match details on demand, with one fetch per match at a time
+    
+    Concurrent requests for the same match share one fetch, fetches for
+    different matches share ENRICH_CONCURRENCY slots, and results are kept
+    until their status-dependent TTL runs out or the match's score or
+    status changes. Popular live matches are refreshed in the background so
+    their clients find details ready. A match whose fetch failed is not
+    fetched again for ENRICH_RETRY_AFTER seconds, so an unreachable feed
+    doesn't make every request wait.
+    """
+    
+    def __init__(self, sign: Callable[[], str] = lambda: FEED_SIGN, concurrency: int = ENRICH_CONCURRENCY, client=None):
+        self._sign = sign
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._client = client
+        self._entries: Dict[str, DetailEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Match id -> time until which a failed fetch isn't retried
+        self._failed: Dict[str, float] = {}
+        # Match id -> last request time and number of requests
+        self._requested: Dict[str, float] = {}
+        self._requests: Counter = Counter()
+        self.lookups: Counter = Counter()
+    
+    @property
+    def available(self) -> bool:
+        return self._client is not None or httpx is not None
+    
+    @staticmethod
+    def enrichable(match: Match) -> bool:
+        # Prefixed ids come from other sports' pages or other providers
+        return ":" not in match.id
+    
+    def _lookup(self, result: str):
+        self.lookups[result] += 1
+        metrics.ENRICH_LOOKUPS.labels(result).inc()
+    
+    async def get(self, match: Match, wait: float = ENRICH_WAIT) -> Optional[Dict[str, Any]]:
+        """Details for a match, None if none could be had within `wait` seconds
+        
+        A slow fetch keeps running after the timeout, so the next request
+        finds its result. Outdated details are returned (marked stale) when
+        a fresh fetch fails, is still running or is backing off after a failure.
+        """
+        if not self.enrichable(match) or not self.available:
+            return None
+        self._requested[match.id] = time.monotonic()
+        self._requests[match.id] += 1
+        
+        entry = self._entries.get(match.id)
+        if entry is not None and entry.stamp == _stamp(match) and entry.expires > time.monotonic():
+            self._lookup("hit")
+            return entry.details
+        if self._failed.get(match.id, 0.0) > time.monotonic():
+            self._lookup("backoff")
+            return None if entry is None else {**entry.details, "stale": True}
+        
+        self._lookup("coalesced" if match.id in self._inflight else "miss")
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.refresh(match)), wait)
+        except Exception as e:
+            if not isinstance(e, asyncio.TimeoutError):
+                logger.warning(f"Details for {match.id} unavailable: {str(e) or type(e).__name__}")
+            if entry is None:
+                return None
+            return {**entry.details, "stale": True}
+    
+    def refresh(self, match: Match) -> asyncio.Task:
+        """The fetch for a match, joining the one in flight if there is one"""
+        task = self._inflight.get(match.id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(match))
+            self._inflight[match.id] = task
+            task.add_done_callback(lambda done: self._finished(match.id, done))
+        return task
+    
+    def _finished(self, match_id: str, task: asyncio.Task):
+        if self._inflight.get(match_id) is task:
+            del self._inflight[match_id]
+        if not task.cancelled():
+            # Retrieved so a failure nobody waited for isn't reported as unhandled
+            task.exception()
+    
+    async def _fetch(self, match: Match) -> Dict[str, Any]:
+        async with self._slots:
+            try:
+                with metrics.phase("enrich_fetch"):
+                    incidents, statistics = await asyncio.gather(
+                        self._get(INCIDENTS_FEED + match.id), self._get(STATISTICS_FEED + match.id)
+                    )
+            except Exception:
+                metrics.ENRICH_FETCHES.labels("error").inc()
+                self._failed[match.id] = time.monotonic() + ENRICH_RETRY_AFTER
+                raise
+        metrics.ENRICH_FETCHES.labels("ok").inc()
+        self._failed.pop(match.id, None)
+        
+        details = {
+            "events": parse_incidents(incidents) if incidents else [],
+            "statistics": parse_statistics(statistics) if statistics else [],
+            "fetchedAt": datetime.now(timezone.utc).isoformat(),
+        }
+        self._entries[match.id] = DetailEntry(details, _stamp(match), time.monotonic() + details_ttl(match.status))
+        return details
+    
+    async def _get(self, feed: str) -> Optional[str]:
+        """One detail feed body, None if the match has none (not started, no statistics)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=ENRICH_TIMEOUT, headers={"user-agent": USER_AGENT})
+        response = await self._client.get(
+            DETAIL_FEED_BASE + feed,
+            headers={"x-fsign": self._sign(), "referer": "https://www.flashscore.com/"},
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.text
+    
+    async def run(self, cache, interval: float = ENRICH_TTL_LIVE / 2):
+        """Keep popular live matches' details fresh until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                for match in self._popular_live(cache):
+                    if self._failed.get(match.id, 0.0) > time.monotonic():
+                        continue
+                    entry = self._entries.get(match.id)
+                    if entry is None or entry.stamp != _stamp(match) or entry.expires - interval <= time.monotonic():
+                        self.refresh(match)
+                self._prune(cache)
+            except Exception as e:
+                logger.error(f"Enrichment refresh error: {e}")
+    
+    def _popular_live(self, cache):
+        cutoff = time.monotonic() - ENRICH_POPULAR_WINDOW
+        live = []
+        for match_id, requested in self._requested.items():
+            match = cache.get_match(match_id)
+            if requested >= cutoff and match is not None and match.status in LIVE_STATUSES:
+                live.append(match)
+        live.sort(key=lambda match: self._requests[match.id], reverse=True)
+        return live[:ENRICH_POPULAR_MAX]
+    
+    def _prune(self, cache):
+        """Forget matches that left the cache or stopped being requested, and expired failures"""
+        now = time.monotonic()
+        cutoff = now - ENRICH_POPULAR_WINDOW
+        for match_id in [match_id for match_id, at in self._requested.items() if at < cutoff]:
+            del self._requested[match_id]
+            self._requests.pop(match_id, None)
+        for match_id in [match_id for match_id in self._entries if cache.get_match(match_id) is None]:
+            del self._entries[match_id]
+        for match_id in [match_id for match_id, until in self._failed.items() if until <= now]:
+            del self._failed[match_id]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self._entries),
+            "in_flight": len(self._inflight),
+            "backing_off": len(self._failed),
+            "popular": len(self._requested),
+            "lookups": dict(self.lookups),
+        }
+    
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
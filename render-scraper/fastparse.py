@@ -0,0 +1,396 @@
+"""
+Single-pass Flashscore match list parser built on lxml
+Walks each match row once instead of running a CSS select cascade per field
+"""
+
+import logging
+import re
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from ids import league_id, match_id as stable_match_id, native_match_id, team_id
+from models import Match, Team
+
+logger = logging.getLogger(__name__)
+
+FLASHSCORE_BASE = "https://www.flashscore.com"
+EMPTY_LOGO = "https://www.flashscore.com/res/image/empty-logo-team-share.gif"
+
+# Rows and league headers, in document order
+ROWS_XPATH = etree.XPath(
+    "//*[contains(@class, 'event__header') or contains(@class, 'event__match')]"
+)
+
+_MINUTE_RE = re.compile(r"(\d+)")
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+# League pages prefix the time with the day: "21.03. 20:45"
+_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.")
+# A dated row more than this far from now belongs to the previous or next year
+_HALF_YEAR = timedelta(days=183)
+
+
+def classify_stage(stage_text: Optional[str], class_str: str) -> Tuple[str, Optional[int]]:
+    """Map stage text and row classes to (status, minute)"""
+    status = "SCHEDULED"
+    minute = None
+    
+    if stage_text is not None:
+        stage_text = stage_text.upper()
+        
+        if "LIVE" in stage_text or stage_text.isdigit() or "'" in stage_text:
+            status = "LIVE"
+            # Extract minute
+            minute_match = _MINUTE_RE.search(stage_text)
+            if minute_match:
+                minute = int(minute_match.group(1))
+        
+        elif "HT" in stage_text or "HALF" in stage_text:
+            status = "HT"
+            minute = 45
+        
+        elif "FT" in stage_text or "FINISHED" in stage_text or "AET" in stage_text:
+            status = "FT"
+        
+        elif "POSTP" in stage_text:
+            status = "POSTPONED"
+        
+        elif "CANC" in stage_text:
+            status = "CANCELLED"
+    
+    # Also check for finished class
+    if "event--finished" in class_str or "finished" in class_str.lower():
+        status = "FT"
+    
+    # Check for live class
+    if "event--live" in class_str or "live" in class_str.lower():
+        if status == "SCHEDULED":
+            status = "LIVE"
+    
+    return status, minute
+
+
+def kickoff_from_text(time_text: Optional[str], now: Optional[datetime] = None) -> Optional[str]:
+    """Turn a "[DD.MM.] HH:MM" row time into an ISO timestamp
+    
+    None when the row shows no time (live and finished rows); the cache
+    then keeps the kickoff it already has. Dates carry no year, so the
+    one closest to `now` is used (31.12. seen on 2 January is last year).
+    """
+    if time_text:
+        now = now or datetime.now(timezone.utc)
+        time_match = _TIME_RE.search(time_text)
+        if time_match:
+            hour, minute = int(time_match.group(1)), int(time_match.group(2))
+            try:
+                kickoff = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                date_match = _DATE_RE.search(time_text)
+                if date_match:
+                    kickoff = kickoff.replace(month=int(date_match.group(2)), day=int(date_match.group(1)))
+                    if kickoff - now > _HALF_YEAR:
+                        kickoff = kickoff.replace(year=kickoff.year - 1)
+                    elif now - kickoff > _HALF_YEAR:
+                        kickoff = kickoff.replace(year=kickoff.year + 1)
+                return kickoff.isoformat()
+            except ValueError:
+                pass
+    return None
+
+
+@lru_cache(maxsize=4096)
+def absolute_logo(src: Optional[str]) -> Optional[str]:
+    """Make a logo URL absolute"""
+    if not src:
+        return None
+    if src.startswith("//"):
+        return f"https:{src}"
+    if src.startswith("/"):
+        return urljoin(FLASHSCORE_BASE, src)
+    return src
+
+
+def score_value(text: Optional[str]) -> Optional[int]:
+    if text and text.isdigit():
+        return int(text)
+    return None
+
+
+def build_match(
+    match_id: Optional[str],
+    home_team: str,
+    away_team: str,
+    home_score: Optional[int],
+    away_score: Optional[int],
+    status: str,
+    minute: Optional[int],
+    start_time: Optional[str],
+    home_logo: Optional[str],
+    away_logo: Optional[str],
+    league: Optional[str],
+    country: Optional[str],
+) -> Match:
+    """Assemble the match record shared by every parser
+    
+    `match_id` is the site's own ID; without one a stable ID is derived
+    from the teams and league.
+    """
+    return Match(
+        id=stable_match_id(match_id, home_team, away_team, league, country),
+        home=Team(
+            id=team_id(home_team),
+            name=home_team,
+            short_name=home_team[:3].upper() if home_team else "???",
+            logo=home_logo or EMPTY_LOGO
+        ),
+        away=Team(
+            id=team_id(away_team),
+            name=away_team,
+            short_name=away_team[:3].upper() if away_team else "???",
+            logo=away_logo or EMPTY_LOGO
+        ),
+        home_score=home_score,
+        away_score=away_score,
+        status=status,
+        minute=minute,
+        start_time=start_time,
+        league_id=league_id(league, country),
+        league_name=league or "Unknown League",
+        country=country or ""
+    )
+
+
+def _text(element) -> str:
+    """Equivalent of BeautifulSoup get_text(strip=True)"""
+    return "".join(part.strip() for part in element.itertext())
+
+
+def _parse_header(element) -> Optional[Tuple[str, str]]:
+    """Extract (league name, country) from a league header"""
+    name = fallback_name = country = flag_alt = None
+    
+    for child in element.iterdescendants():
+        if not isinstance(child.tag, str):
+            continue
+        class_attr = child.get("class") or ""
+        tokens = class_attr.split()
+        
+        if name is None and "event__title--name" in tokens:
+            name = _text(child)
+        if fallback_name is None and "title" in class_attr:
+            fallback_name = _text(child)
+        if country is None and "event__title--type" in tokens:
+            country = _text(child)
+        if flag_alt is None and child.tag == "img" and "flag" in class_attr:
+            flag_alt = child.get("alt", "")
+    
+    name = name or fallback_name
+    if not name:
+        return None
+    return name, country or flag_alt or ""
+
+
+def _has_ancestor_class(element, needle: str) -> bool:
+    # Like CSS descendant combinators, ancestors outside the row count too
+    parent = element.getparent()
+    while parent is not None:
+        if needle in (parent.get("class") or ""):
+            return True
+        parent = parent.getparent()
+    return False
+
+
+_UNSET = object()
+
+
+class _RowFields:
+    """First match per selector rank, mirroring the BeautifulSoup cascades"""
+    
+    __slots__ = ("home", "away", "home_score", "away_score", "stage", "time", "home_logo", "away_logo")
+    
+    def __init__(self):
+        # Each field keeps candidates by fallback rank: [primary, fallback, ...]
+        self.home = [_UNSET, _UNSET, _UNSET]
+        self.away = [_UNSET, _UNSET, _UNSET]
+        self.home_score = [_UNSET, _UNSET]
+        self.away_score = [_UNSET, _UNSET]
+        self.stage = [_UNSET, _UNSET]
+        self.time = [_UNSET, _UNSET]
+        self.home_logo = [_UNSET, _UNSET, _UNSET]
+        self.away_logo = [_UNSET, _UNSET, _UNSET]
+
+
+def _first_found(candidates: List[Any]) -> Optional[Any]:
+    """First rank whose selector matched an element"""
+    for value in candidates:
+        if value is not _UNSET:
+            return value
+    return None
+
+
+def _first_truthy(candidates: List[Any], accept=bool) -> Optional[Any]:
+    """First rank whose element yielded a usable value"""
+    for value in candidates:
+        if value is not _UNSET and accept(value):
+            return value
+    return None
+
+
+def _count_fallbacks(fields: _RowFields, fallbacks: Dict[str, int]):
+    """Count fields the primary selector missed but a fallback found"""
+    for name in _RowFields.__slots__:
+        primary, *others = getattr(fields, name)
+        if primary is _UNSET or not primary:
+            if any(value is not _UNSET and value for value in others):
+                fallbacks[name] += 1
+
+
+def _parse_row(
+    row,
+    league: Optional[str],
+    country: Optional[str],
+    fallbacks: Optional[Dict[str, int]] = None,
+) -> Optional[Match]:
+    """Extract every field of a match row in one descendant walk"""
+    fields = _RowFields()
+    images = []
+    
+    for child in row.iterdescendants():
+        tag = child.tag
+        if not isinstance(tag, str):
+            continue
+        if tag == "img":
+            images.append(child)
+        
+        class_attr = child.get("class")
+        if not class_attr:
+            continue
+        tokens = class_attr.split()
+        
+        if "participant--home" in class_attr:
+            if fields.home[0] is _UNSET and "event__participant--home" in tokens:
+                fields.home[0] = _text(child)
+            if fields.home[1] is _UNSET:
+                fields.home[1] = _text(child)
+        elif "participant--away" in class_attr:
+            if fields.away[0] is _UNSET and "event__participant--away" in tokens:
+                fields.away[0] = _text(child)
+            if fields.away[1] is _UNSET:
+                fields.away[1] = _text(child)
+        
+        if "Participant" in class_attr:
+            if fields.home[2] is _UNSET and "event__homeParticipant" in tokens:
+                fields.home[2] = _text(child)
+            if fields.away[2] is _UNSET and "event__awayParticipant" in tokens:
+                fields.away[2] = _text(child)
+        
+        if "score--home" in class_attr:
+            if fields.home_score[0] is _UNSET and "event__score--home" in tokens:
+                fields.home_score[0] = _text(child)
+            if fields.home_score[1] is _UNSET:
+                fields.home_score[1] = _text(child)
+        if "score--away" in class_attr:
+            if fields.away_score[0] is _UNSET and "event__score--away" in tokens:
+                fields.away_score[0] = _text(child)
+            if fields.away_score[1] is _UNSET:
+                fields.away_score[1] = _text(child)
+        
+        if "event__logo--" in class_attr:
+            if fields.home_logo[0] is _UNSET and "event__logo--home" in tokens:
+                fields.home_logo[0] = child.get("src") or child.get("data-src") or ""
+            if fields.away_logo[0] is _UNSET and "event__logo--away" in tokens:
+                fields.away_logo[0] = child.get("src") or child.get("data-src") or ""
+        
+        if "stage" in class_attr:
+            if fields.stage[0] is _UNSET and "event__stage--block" in tokens:
+                fields.stage[0] = _text(child)
+            if fields.stage[1] is _UNSET:
+                fields.stage[1] = _text(child)
+        
+        if "time" in class_attr:
+            if fields.time[0] is _UNSET and "event__time" in tokens:
+                fields.time[0] = _text(child)
+            if fields.time[1] is _UNSET:
+                fields.time[1] = _text(child)
+    
+    home_team = _first_truthy(fields.home)
+    away_team = _first_truthy(fields.away)
+    if not home_team or not away_team:
+        return None
+    
+    # Image fallbacks are rare, so resolve them only when the primary logo is missing
+    for side, logos in (("home", fields.home_logo), ("away", fields.away_logo)):
+        if logos[0] is not _UNSET and logos[0]:
+            continue
+        for image in images:
+            src = image.get("src") or image.get("data-src") or ""
+            if logos[1] is _UNSET and _has_ancestor_class(image, f"logo--{side}"):
+                logos[1] = src
+            if logos[2] is _UNSET and "logo" in (image.get("class") or "") and _has_ancestor_class(image, side):
+                logos[2] = src
+    
+    if fallbacks is not None:
+        _count_fallbacks(fields, fallbacks)
+    
+    # Site match ID; build_match derives one when the row has none
+    match_id = native_match_id(row.get("id", "") or row.get("data-id", ""))
+    
+    # Scores fall back to the next selector only when the first is not numeric
+    home_score = score_value(_first_truthy(fields.home_score, str.isdigit))
+    away_score = score_value(_first_truthy(fields.away_score, str.isdigit))
+    
+    status, minute = classify_stage(_first_found(fields.stage), " ".join((row.get("class") or "").split()))
+    
+    return build_match(
+        match_id,
+        home_team,
+        away_team,
+        home_score,
+        away_score,
+        status,
+        minute,
+        kickoff_from_text(_first_found(fields.time)),
+        absolute_logo(_first_truthy(fields.home_logo)),
+        absolute_logo(_first_truthy(fields.away_logo)),
+        league,
+        country,
+    )
+
+
+def parse_matches_fast(html: str, fallbacks: Optional[Dict[str, int]] = None) -> List[Match]:
+    """Parse the Flashscore match list in a single pass over the rows
+    
+    `fallbacks`, a Counter, receives the number of rows per field that
+    only a fallback selector could fill.
+    """
+    matches = []
+    if not html:
+        return matches
+    
+    root = etree.fromstring(html, etree.HTMLParser())
+    current_league = None
+    current_country = None
+    
+    for element in ROWS_XPATH(root):
+        try:
+            class_str = " ".join((element.get("class") or "").split())
+            
+            # Check if this is a league header
+            if "event__header" in class_str:
+                header = _parse_header(element)
+                if header:
+                    current_league, current_country = header
+                continue
+            
+            # Check if this is a match
+            match = _parse_row(element, current_league, current_country, fallbacks)
+            if match:
+                matches.append(match)
+        
+        except Exception as e:
+            logger.debug(f"Fast parser skipped event: {e}")
+            continue
+    
+    return matches
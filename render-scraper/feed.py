@@ -0,0 +1,252 @@
+"""
+Flashscore data feed ingestion
+Fetches and parses the compact feed the site itself renders from, skipping the DOM
+"""
+
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from fastparse import build_match
+from models import Match
+
+logger = logging.getLogger(__name__)
+
+# Today's football list; the page's own feed request overrides these once seen
+FEED_URL = os.environ.get("FEED_URL", "https://local-global.flashscore.ninja/2/x/feed/f_1_0_3_en_1")
+FEED_SIGN = os.environ.get("FEED_SIGN", "SW9D1eZo")
+# Optional directories to record fetched feeds to / replay them from (offline testing)
+FEED_RECORD_DIR = os.environ.get("FEED_RECORD_DIR")
+FEED_REPLAY_DIR = os.environ.get("FEED_REPLAY_DIR")
+
+FEED_REQUEST_RE = re.compile(r"/x/feed/f_\d+_")
+# Per-match detail feeds live next to the list feed: summary incidents and statistics
+DETAIL_FEED_BASE = FEED_URL[:FEED_URL.rindex("/") + 1]
+INCIDENTS_FEED = "df_sui_1_"
+STATISTICS_FEED = "df_st_1_"
+LOGO_BASE = "https://www.flashscore.com/res/image/data/"
+
+# Feed separators: records, fields, key/value
+RECORD_SEP = "~"
+FIELD_SEP = "¬"
+VALUE_SEP = "÷"
+
+# AB: stage type
+STAGE_SCHEDULED = "1"
+STAGE_LIVE = "2"
+STAGE_FINISHED = "3"
+
+# AC: detailed stage codes that need their own status
+DETAIL_STATUS = {
+    "38": "HT",
+    "4": "POSTPONED",
+    "5": "CANCELLED",
+}
+FIRST_HALF = "12"
+SECOND_HALF = "13"
+
+
+def _split_record(record: str) -> Dict[str, str]:
+    fields = {}
+    for field in record.split(FIELD_SEP):
+        key, sep, value = field.partition(VALUE_SEP)
+        if sep and key not in fields:
+            fields[key] = value
+    return fields
+
+
+def _score(value: Optional[str]) -> Optional[int]:
+    if value and value.isdigit():
+        return int(value)
+    return None
+
+
+def _status_and_minute(fields: Dict[str, str], kickoff: Optional[float]) -> tuple:
+    """Map feed stage codes to (status, minute)"""
+    detail = fields.get("AC", "")
+    if detail in DETAIL_STATUS:
+        status = DETAIL_STATUS[detail]
+        return status, 45 if status == "HT" else None
+    
+    stage = fields.get("AB")
+    if stage == STAGE_FINISHED:
+        return "FT", None
+    if stage != STAGE_LIVE:
+        return "SCHEDULED", None
+    
+    # The feed carries no running minute; estimate it from the kickoff
+    minute = None
+    if kickoff:
+        elapsed = int((time.time() - kickoff) // 60) + 1
+        if detail == FIRST_HALF:
+            minute = max(1, min(elapsed, 45))
+        elif detail == SECOND_HALF:
+            minute = max(46, min(elapsed - 15, 90))
+    return "LIVE", minute
+
+
+def parse_feed(text: str) -> List[Match]:
+    """Parse a Flashscore list feed into match dicts
+    
+    League records (ZA) precede their matches (AA), like headers and rows
+    in the DOM.
+    """
+    matches = []
+    league = None
+    country = None
+    
+    for record in text.split(RECORD_SEP):
+        if not record:
+            continue
+        fields = _split_record(record)
+        
+        try:
+            if "ZA" in fields:
+                # "ENGLAND: Premier League", same casing as the DOM header
+                prefix, sep, name = fields["ZA"].partition(": ")
+                league = name if sep else prefix
+                country = prefix if sep else fields.get("ZY", "")
+                continue
+            
+            match_id = fields.get("AA")
+            home_team, away_team = fields.get("AE"), fields.get("AF")
+            if not match_id or not home_team or not away_team:
+                continue
+            
+            kickoff = float(fields["AD"]) if fields.get("AD", "").isdigit() else None
+            status, minute = _status_and_minute(fields, kickoff)
+            start_time = datetime.fromtimestamp(kickoff, timezone.utc).isoformat() if kickoff else None
+            
+            matches.append(build_match(
+                match_id,
+                home_team,
+                away_team,
+                _score(fields.get("AG")),
+                _score(fields.get("AH")),
+                status,
+                minute,
+                start_time,
+                LOGO_BASE + fields["OA"] if fields.get("OA") else None,
+                LOGO_BASE + fields["OB"] if fields.get("OB") else None,
+                league,
+                country,
+            ))
+        
+        except Exception as e:
+            logger.debug(f"Error parsing feed record: {e}")
+            continue
+    
+    return matches
+
+
+def parse_incidents(text: str) -> List[Dict[str, Optional[str]]]:
+    """Goals, cards and substitutions from a summary incidents feed, in match order
+    
+    Period records (AC) precede their incidents; IA is the side (1 home,
+    2 away), IB the minute, IK the incident type and IF the player.
+    """
+    events = []
+    period = None
+    for record in text.split(RECORD_SEP):
+        fields = _split_record(record)
+        if "AC" in fields:
+            period = fields["AC"]
+            continue
+        if "IB" not in fields or "IK" not in fields:
+            continue
+        events.append({
+            "period": period,
+            "minute": fields["IB"],
+            "side": "home" if fields.get("IA") == "1" else "away",
+            "type": fields["IK"],
+            "player": fields.get("IF"),
+        })
+    return events
+
+
+def parse_statistics(text: str) -> List[Dict[str, str]]:
+    """Whole-match statistics (SG name, SH home, SI away) from a statistics feed
+    
+    The feed repeats the table per half after the full match (SE); only the
+    first section is kept.
+    """
+    stats = []
+    sections = 0
+    for record in text.split(RECORD_SEP):
+        fields = _split_record(record)
+        if "SE" in fields:
+            sections += 1
+            if sections > 1:
+                break
+            continue
+        if "SG" in fields:
+            stats.append({"name": fields["SG"], "home": fields.get("SH", ""), "away": fields.get("SI", "")})
+    return stats
+
+
+class FeedClient:
+    """Fetches the list feed with the browser context's cookies
+    
+    The feed URL and signature header are learned from the page's own feed
+    requests when available. With FEED_REPLAY_DIR set, recorded feed files
+    are served in order instead, so the feed mode works fully offline.
+    """
+    
+    def __init__(
+        self,
+        url: str = FEED_URL,
+        sign: str = FEED_SIGN,
+        record_dir: Optional[str] = FEED_RECORD_DIR,
+        replay_dir: Optional[str] = FEED_REPLAY_DIR,
+    ):
+        self.url = url
+        self.sign = sign
+        self._record_dir = Path(record_dir) if record_dir else None
+        self._replay: List[Path] = sorted(Path(replay_dir).glob("*.txt")) if replay_dir else []
+        self._replay_index = 0
+    
+    @property
+    def replaying(self) -> bool:
+        return bool(self._replay)
+    
+    def watch(self, page):
+        """Learn the feed URL and signature from the page's own requests"""
+        def on_request(request):
+            if FEED_REQUEST_RE.search(request.url):
+                sign = request.headers.get("x-fsign")
+                if request.url != self.url or (sign and sign != self.sign):
+                    logger.info(f"Using feed {request.url}")
+                self.url = request.url
+                self.sign = sign or self.sign
+        
+        page.on("request", on_request)
+    
+    async def fetch(self, context) -> Optional[str]:
+        """Get the current feed body, None if unavailable"""
+        if self._replay:
+            path = self._replay[self._replay_index % len(self._replay)]
+            self._replay_index += 1
+            return path.read_text(encoding="utf-8")
+        
+        if context is None:
+            return None
+        
+        response = await context.request.get(
+            self.url,
+            headers={"x-fsign": self.sign, "referer": "https://www.flashscore.com/"},
+            timeout=10000,
+        )
+        if not response.ok:
+            logger.warning(f"Feed request failed: HTTP {response.status}")
+            return None
+        
+        text = await response.text()
+        if self._record_dir:
+            self._record_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            (self._record_dir / f"feed_{stamp}.txt").write_text(text, encoding="utf-8")
+        return text
@@ -0,0 +1,105 @@
+"""
+Stable match, team and league IDs
+Derives identical IDs in every process and replica from site-native IDs or normalized names
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(value: str) -> bytes:
+    """BLAKE2b key for a configured secret; longer ones are hashed down to the 64-byte limit"""
+    key = value.encode("utf-8")
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return key
+
+
+# Key for the name hash; replicas that must agree on IDs need the same value
+ID_HASH_KEY = hash_key(os.environ.get("ID_HASH_KEY", "live-goal-hub"))
+# Optional JSON mapping table of alternative names to canonical ones:
+# {"teams": {"Man Utd": "Manchester United"}, "leagues": {"EPL": "Premier League"}}
+ID_ALIASES_PATH = os.environ.get("ID_ALIASES_PATH")
+
+DIGEST_SIZE = 8
+# Separates name parts inside the hashed key
+KEY_SEP = "\x1f"
+
+# DOM row IDs are "g_<sport>_<match>"; the feed uses the bare match part
+_ROW_ID_PREFIX = re.compile(r"^g_\d+_")
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Case-, width- and whitespace-insensitive form of a name"""
+    if not value:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", value).split()).casefold()
+
+
+def load_aliases(path: Optional[str] = ID_ALIASES_PATH) -> Dict[str, Dict[str, str]]:
+    """Read the alias table, keyed by kind and normalized alternative name"""
+    aliases: Dict[str, Dict[str, str]] = {"teams": {}, "leagues": {}}
+    if not path:
+        return aliases
+    
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error(f"Could not load ID aliases from {path}: {e}")
+        return aliases
+    
+    for kind, table in aliases.items():
+        for alias, canonical in (data.get(kind) or {}).items():
+            table[normalize_name(alias)] = normalize_name(canonical)
+    return aliases
+
+
+ALIASES = load_aliases()
+
+
+def stable_id(prefix: str, *parts: Optional[str]) -> str:
+    """Keyed BLAKE2b of the normalized parts, e.g. "team_3f1c0a9be2d47c61" """
+    key = KEY_SEP.join(normalize_name(part) for part in parts)
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=DIGEST_SIZE, key=ID_HASH_KEY)
+    return f"{prefix}_{digest.hexdigest()}"
+
+
+@lru_cache(maxsize=8192)
+def team_id(name: str) -> str:
+    """ID for a team name, resolving aliases"""
+    key = normalize_name(name)
+    return stable_id("team", ALIASES["teams"].get(key, key))
+
+
+@lru_cache(maxsize=2048)
+def league_id(name: Optional[str], country: Optional[str]) -> str:
+    """ID for a league; the country keeps same-named leagues apart"""
+    key = normalize_name(name or "unknown")
+    return stable_id("league", normalize_name(country), ALIASES["leagues"].get(key, key))
+
+
+def native_match_id(row_id: Optional[str]) -> str:
+    """Site match ID from a DOM row ID, empty if there is none"""
+    return _ROW_ID_PREFIX.sub("", row_id or "")
+
+
+def match_id(
+    native_id: Optional[str],
+    home_team: str,
+    away_team: str,
+    league: Optional[str],
+    country: Optional[str],
+) -> str:
+    """The site's own match ID when present, else derived from teams and league"""
+    if native_id:
+        return native_id
+    return stable_id("match", team_id(home_team), team_id(away_team), league_id(league, country))
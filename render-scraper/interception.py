@@ -0,0 +1,216 @@
+"""
+Browser request interception
+Allowlist-only resource loading, a content-addressed cache for static bundles and per-load traffic counts
+"""
+
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Hosts (and their subdomains) the page may load anything from; the feed host
+# flashscore.ninja has to stay reachable for the page's own live updates
+ALLOWED_HOSTS = tuple(
+    host.strip().lower() for host in os.environ.get("ALLOWED_HOSTS", "flashscore.com,flashscore.ninja").split(",")
+    if host.strip()
+)
+# Playwright resource types that are let through; the rows are built by the
+# site's scripts from its XHR feeds, so styles, images and fonts are not needed
+ALLOWED_RESOURCE_TYPES = frozenset(
+    kind.strip() for kind in os.environ.get("ALLOWED_RESOURCE_TYPES", "document,script,xhr,fetch").split(",")
+    if kind.strip()
+)
+# Static bundle cache size in MB; 0 fetches every bundle on every load
+STATIC_CACHE_MB = float(os.environ.get("STATIC_CACHE_MB", "64"))
+# Lifetime of a cached bundle whose response gives no max-age (seconds)
+STATIC_CACHE_TTL = float(os.environ.get("STATIC_CACHE_TTL", "3600"))
+
+# Resource types served through the static cache
+CACHEABLE_TYPES = frozenset({"script", "stylesheet"})
+# fetch() returns the decoded body, so these no longer describe it
+_DROPPED_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding"})
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def host_allowed(url: str, hosts: Tuple[str, ...] = ALLOWED_HOSTS) -> bool:
+    """True if the URL's host is one of `hosts` or a subdomain of one"""
+    host = (urlsplit(url).hostname or "").lower()
+    return any(host == allowed or host.endswith("." + allowed) for allowed in hosts)
+
+
+def cache_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds a response may be reused, None if it must not be stored"""
+    control = headers.get("cache-control", "").lower()
+    if "no-store" in control or "no-cache" in control or "private" in control:
+        return None
+    match = _MAX_AGE_RE.search(control)
+    if match:
+        return float(match.group(1)) or None
+    return STATIC_CACHE_TTL
+
+
+class StaticCache:
+    """Static bundles kept in memory across page loads, browser contexts and relaunches
+    
+    Bodies are stored once per SHA-256 digest, so the same bundle under
+    several URLs (cache-busting query strings, mirrors) costs its size once.
+    URLs map to a digest and headers; the least recently used URLs are
+    dropped, and bodies with them, once the total size exceeds the limit.
+    """
+    
+    def __init__(self, max_bytes: int = int(STATIC_CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._urls: "OrderedDict[str, Tuple[str, Dict[str, str], float]]" = OrderedDict()
+        self._bodies: Dict[str, bytes] = {}
+        self._refs: Counter = Counter()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+    
+    def get(self, url: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """(body, headers) for a fresh entry, None on a miss"""
+        entry = self._urls.get(url)
+        if entry is not None and entry[2] < time.monotonic():
+            self._drop(url)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._urls.move_to_end(url)
+        self.hits += 1
+        return self._bodies[entry[0]], entry[1]
+    
+    def put(self, url: str, body: bytes, headers: Dict[str, str], lifetime: float):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        if url in self._urls:
+            self._drop(url)
+        
+        digest = hashlib.sha256(body).hexdigest()
+        if digest not in self._bodies:
+            self._bodies[digest] = body
+            self._size += len(body)
+        self._refs[digest] += 1
+        kept = {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS}
+        self._urls[url] = (digest, kept, time.monotonic() + lifetime)
+        
+        while self._size > self.max_bytes and self._urls:
+            self._drop(next(iter(self._urls)))
+    
+    def _drop(self, url: str):
+        digest = self._urls.pop(url)[0]
+        self._refs[digest] -= 1
+        if self._refs[digest] <= 0:
+            del self._refs[digest]
+            self._size -= len(self._bodies.pop(digest))
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "urls": len(self._urls),
+            "bodies": len(self._bodies),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class RequestInterceptor:
+    """Route handler for a browser context
+    
+    Requests from other hosts or of unneeded types are aborted before they
+    leave the browser. Allowed scripts (and stylesheets, if allowed) go
+    through the static cache; everything else continues to the network.
+    Each request is counted as "network", "cached" or "blocked", with its
+    bytes, both in Prometheus and for the page load it belongs to between
+    begin() and end().
+    """
+    
+    def __init__(self, cache: Optional[StaticCache] = None):
+        self.cache = cache if cache is not None else StaticCache()
+        self._loads: Dict[object, Counter] = {}
+        self.last_load: Dict[str, int] = {}
+    
+    async def attach(self, context):
+        await context.route("**/*", self.handle)
+        context.on("requestfinished", self._on_finished)
+    
+    def begin(self, page):
+        """Start counting the traffic of a page load"""
+        self._loads[page] = Counter()
+    
+    def end(self, page) -> Dict[str, int]:
+        """Stop counting a page load and return its totals"""
+        counts = dict(self._loads.pop(page, Counter()))
+        self.last_load = counts
+        metrics.PAGE_LOAD_BYTES.observe(counts.get("network_bytes", 0))
+        logger.info(
+            f"Page load: {counts.get('network', 0)} requests / {counts.get('network_bytes', 0) // 1024} KB from the network, "
+            f"{counts.get('cached', 0)} / {counts.get('cached_bytes', 0) // 1024} KB cached, {counts.get('blocked', 0)} blocked"
+        )
+        return counts
+    
+    async def handle(self, route):
+        request = route.request
+        if request.resource_type not in ALLOWED_RESOURCE_TYPES or not host_allowed(request.url):
+            self._count(request, "blocked")
+            await route.abort("blockedbyclient")
+            return
+        
+        if request.resource_type not in CACHEABLE_TYPES or request.method != "GET" or not self.cache.enabled:
+            # Counted with its real size once it finishes
+            await route.continue_()
+            return
+        
+        hit = self.cache.get(request.url)
+        if hit is not None:
+            body, headers = hit
+            self._count(request, "cached", len(body))
+            await route.fulfill(status=200, headers=headers, body=body)
+            return
+        
+        response = await route.fetch()
+        body = await response.body()
+        self._count(request, "network", len(body))
+        lifetime = cache_lifetime(response.headers) if response.status == 200 else None
+        if lifetime:
+            self.cache.put(request.url, body, response.headers, lifetime)
+        await route.fulfill(response=response, body=body)
+    
+    async def _on_finished(self, request):
+        if request.resource_type in CACHEABLE_TYPES and request.method == "GET" and self.cache.enabled:
+            # Already counted by the route handler
+            return
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self._count(request, "network", sizes["responseHeadersSize"] + sizes["responseBodySize"])
+    
+    def _count(self, request, outcome: str, size: int = 0):
+        metrics.BROWSER_REQUESTS.labels(outcome).inc()
+        if size:
+            metrics.BROWSER_BYTES.labels(outcome).inc(size)
+        try:
+            load = self._loads.get(request.frame.page)
+        except Exception:
+            # Service worker requests have no frame
+            load = None
+        if load is not None:
+            load[outcome] += 1
+            if size:
+                load[f"{outcome}_bytes"] += size
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {"last_load": self.last_load, "static_cache": self.cache.get_stats()}
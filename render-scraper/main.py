@@ -4,17 +4,28 @@ Deploy this on Render as a Python Web Service
 """
 
 import asyncio
+import json
 import logging
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Dict, Any
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from scraper import FlashscoreScraper
-from cache import MatchCache
+from scraper import FlashscoreScraper, create_parse_pool
+from cache import MatchCache, SNAPSHOT_KINDS, parse_kickoff
+from broadcast import BroadcastHub, Subscriber
+from scheduler import AdaptiveScheduler
+from persistence import CACHE_SNAPSHOT_PATH, CACHE_SNAPSHOT_INTERVAL, SnapshotWriter, encode_snapshot, load_snapshot
+from backends import ROLE, CacheBackend, create_backend, follow
+from sources import Aggregator, create_sources
+from enrichment import Enricher
+from feed import FEED_SIGN
+from snapshots import CACHE_CONTROL, ResponseCoalescer, ResponseSnapshot
+from ratelimit import RateLimiter, RateLimitMiddleware
+import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -23,39 +34,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds between keep-alive messages on idle push connections
+PUSH_KEEPALIVE = 15
+
 # Global instances
 scraper: Optional[FlashscoreScraper] = None
 cache = MatchCache()
+hub = BroadcastHub()
+scheduler = AdaptiveScheduler(cache)
 scraper_task: Optional[asyncio.Task] = None
+targets_task: Optional[asyncio.Task] = None
+snapshot_task: Optional[asyncio.Task] = None
+snapshot_writer: Optional[SnapshotWriter] = None
+parse_pool = None
+backend: Optional[CacheBackend] = None
+replica_task: Optional[asyncio.Task] = None
+aggregator: Optional[Aggregator] = None
+source_tasks: List[asyncio.Task] = []
+enricher: Optional[Enricher] = None
+# Filtered and incremental responses, built once per cache version
+coalescer = ResponseCoalescer()
+rate_limiter = RateLimiter()
+enrich_task: Optional[asyncio.Task] = None
+# Set once Flashscore has been scraped, so other sources attach to its fixtures
+flashscore_ready = asyncio.Event()
+# Stores run one at a time, so changes reach push clients and the backend
+# in version order even when Flashscore targets and other sources overlap
+store_lock = asyncio.Lock()
+
+
+def apply_scrape(matches, source: str = "flashscore"):
+    """Merge, diff into the cache and pre-encode snapshots; runs in a worker thread"""
+    removed = []
+    if aggregator is not None:
+        matches = aggregator.merge(source, matches)
+        removed = aggregator.pop_replaced()
+    with metrics.phase("update_matches"):
+        changes = cache.update_matches(matches, removed)
+    if changes:
+        for kind in SNAPSHOT_KINDS:
+            cache.get_snapshot(kind)
+    return changes
+
+
+def export_shared():
+    """Encode the whole cache for the shared backend; runs in a worker thread"""
+    data = cache.export()
+    return data["epoch"], data["version"], encode_snapshot(data)
+
+
+async def share_changes(changes):
+    """Publish the cache and its new changes to API-only workers"""
+    if backend is None:
+        return
+    try:
+        epoch, version, snapshot = await asyncio.to_thread(export_shared)
+        await backend.publish(snapshot, epoch, version, changes)
+    except Exception as e:
+        logger.error(f"Shared cache publish error: {e}")
+
+
+async def store(matches, source: str = "flashscore"):
+    """Merge a scrape with the other sources, save it and push the changes"""
+    async with store_lock:
+        changes = await asyncio.to_thread(apply_scrape, matches, source)
+        hub.publish(changes)
+        if changes:
+            await share_changes(changes)
+    return changes
+
+
+async def source_loop(source):
+    """Polls one other score provider; waits briefly for Flashscore to go first"""
+    try:
+        await asyncio.wait_for(flashscore_ready.wait(), 60)
+    except asyncio.TimeoutError:
+        logger.warning(f"Flashscore not scraped yet, starting {source.name} anyway")
+    await aggregator.poll(source, lambda matches: store(matches, source.name))
 
 
 async def scraper_loop():
     """Background scraper loop - runs continuously"""
-    global scraper, cache
+    global scraper, cache, hub
     
     while True:
         try:
             if scraper is None:
-                scraper = FlashscoreScraper()
+                scraper = FlashscoreScraper(parse_pool=parse_pool)
                 await scraper.initialize()
             
             # Scrape all matches
             matches = await scraper.scrape_matches()
             
             if matches:
-                cache.update_matches(matches)
-                logger.info(f"Updated {len(matches)} matches in cache")
+                changes = await store(matches)
+                flashscore_ready.set()
+                scheduler.record_success()
+                metrics.SCRAPES.labels("ok").inc()
+                logger.info(f"Updated {len(matches)} matches in cache ({len(changes)} changed)")
+                delay = scheduler.next_interval().interval
             else:
+                # The page always lists matches, so an empty scrape means it failed
                 logger.warning("No matches scraped, keeping cached data")
+                metrics.SCRAPES.labels("empty").inc()
+                delay = scheduler.record_failure().interval
             
-            # Wait before next scrape (15 seconds for live updates)
-            await asyncio.sleep(15)
+            # In observe mode scrape_matches() already waits for the page to change
+            if not scraper.streaming or not matches:
+                await asyncio.sleep(delay)
             
         except Exception as e:
             logger.error(f"Scraper loop error: {e}")
+            metrics.SCRAPES.labels("error").inc()
             
-            # Try to restart scraper
-            if scraper:
+            # The scraper recovers its own page, context and browser; start over
+            # only if even relaunching the browser failed
+            if scraper and scraper.browser is None:
                 try:
                     await scraper.close()
                 except:
@@ -63,33 +157,110 @@ async def scraper_loop():
                 scraper = None
             
             # Wait before retry
+            await asyncio.sleep(scheduler.record_failure().interval)
+
+
+async def targets_loop():
+    """Scrapes the extra SCRAPE_TARGETS pages on their own cadences"""
+    while True:
+        try:
+            if scraper is None or scraper.context is None:
+                # scraper_loop owns the browser; wait for it
+                await asyncio.sleep(1)
+                continue
+            
+            delay = scraper.next_target_delay()
+            if delay is None:
+                return
+            if delay > 0:
+                await asyncio.sleep(min(delay, 1))
+                continue
+            
+            matches = await scraper.scrape_due_targets()
+            if matches:
+                changes = await store(matches)
+                logger.info(f"Updated {len(matches)} target matches in cache ({len(changes)} changed)")
+            
+        except Exception as e:
+            logger.error(f"Targets loop error: {e}")
             await asyncio.sleep(30)
 
 
+async def snapshot_loop():
+    """Periodically persists the cache for warm restarts"""
+    while True:
+        await asyncio.sleep(CACHE_SNAPSHOT_INTERVAL)
+        await asyncio.to_thread(snapshot_writer.save_if_changed)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown handlers"""
-    global scraper_task, scraper
+    global scraper_task, targets_task, snapshot_task, snapshot_writer, scraper, parse_pool
+    global backend, replica_task, aggregator, enricher, enrich_task
     
-    logger.info("Starting Flashscore scraper...")
+    backend = create_backend()
+    # Every worker enriches the matches its own clients ask for
+    enricher = Enricher(sign=lambda: scraper.feed.sign if scraper else FEED_SIGN)
+    enrich_task = asyncio.create_task(enricher.run(cache))
     
-    # Start background scraper
-    scraper_task = asyncio.create_task(scraper_loop())
+    if ROLE == "api":
+        # Serve the cache the scraper process publishes; no browser here
+        if backend is None:
+            logger.error("ROLE=api needs CACHE_BACKEND_URL; serving an empty cache")
+        else:
+            logger.info("Following the shared cache...")
+            replica_task = asyncio.create_task(follow(backend, cache, hub.publish))
+    else:
+        logger.info("Starting Flashscore scraper...")
+        parse_pool = create_parse_pool()
+        
+        # Serve the last known matches (marked stale) until the first scrape lands
+        if CACHE_SNAPSHOT_PATH:
+            await asyncio.to_thread(load_snapshot, cache)
+            snapshot_writer = SnapshotWriter(cache)
+            snapshot_task = asyncio.create_task(snapshot_loop())
+        
+        if cache.get_match_count():
+            await share_changes([])
+        
+        sources = create_sources()
+        if sources:
+            aggregator = Aggregator(sources)
+            aggregator.seed(cache.get_all_matches())
+        
+        # Start background scrapers
+        scraper_task = asyncio.create_task(scraper_loop())
+        targets_task = asyncio.create_task(targets_loop())
+        source_tasks.extend(asyncio.create_task(source_loop(source)) for source in sources)
     
     yield
     
     # Cleanup on shutdown
     logger.info("Shutting down scraper...")
     
-    if scraper_task:
-        scraper_task.cancel()
-        try:
-            await scraper_task
-        except asyncio.CancelledError:
-            pass
+    for task in (targets_task, scraper_task, snapshot_task, replica_task, enrich_task, *source_tasks):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    if snapshot_writer:
+        await asyncio.to_thread(snapshot_writer.save_if_changed)
     
     if scraper:
         await scraper.close()
+    
+    if parse_pool:
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+    
+    if backend:
+        await backend.close()
+    
+    if enricher:
+        await enricher.close()
 
 
 # Create FastAPI app
@@ -99,6 +270,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Inside CORS, so preflights pass and 429s carry the CORS headers
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 # CORS - Allow all origins for frontend access
 app.add_middleware(
     CORSMiddleware,
@@ -106,7 +279,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.register_collector(cache, hub, scheduler)
 
 
 @app.get("/")
@@ -114,22 +290,50 @@ async def root():
     """Health check endpoint"""
     return {
         "status": "ok",
+        "role": ROLE,
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "cached_matches": cache.get_match_count(),
-        "last_update": cache.get_last_update()
+        "last_update": cache.get_last_update(),
+        "version": cache.get_version(),
+        "cache": cache.get_stats(),
+        "scheduler": scheduler.get_stats(),
+        "browser_recoveries": dict(scraper.recoveries) if scraper else {},
+        "browser_traffic": scraper.interceptor.get_stats() if scraper else None,
+        "sources": aggregator.get_stats() if aggregator else None,
+        "enrichment": enricher.get_stats() if enricher else None,
+        "coalescing": coalescer.get_stats(),
+        "rate_limit": rate_limiter.get_stats(),
+        "push_clients": hub.get_subscriber_count()
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    body = metrics.render()
+    if body is None:
+        return JSONResponse(status_code=503, content={"error": "prometheus_client is not installed"})
+    return Response(content=body, headers={"Content-Type": metrics.CONTENT_TYPE_LATEST})
+
+
+def snapshot_response(request: Request, snapshot: ResponseSnapshot) -> Response:
+    """Serve a pre-encoded snapshot, honouring If-None-Match and Accept-Encoding"""
+    headers = {"ETag": snapshot.etag, "Vary": "Accept-Encoding", "Cache-Control": CACHE_CONTROL}
+    
+    if snapshot.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    
+    body, encoding = snapshot.select(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/live")
-async def get_live_matches():
+async def get_live_matches(request: Request):
     """Get only live matches"""
     try:
-        matches = cache.get_live_matches()
-        return JSONResponse(content={
-            "matches": matches,
-            "count": len(matches),
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        return snapshot_response(request, cache.get_snapshot("live"))
     except Exception as e:
         logger.error(f"Error getting live matches: {e}")
         return JSONResponse(
@@ -139,15 +343,10 @@ async def get_live_matches():
 
 
 @app.get("/api/today")
-async def get_today_matches():
+async def get_today_matches(request: Request):
     """Get all today's matches"""
     try:
-        matches = cache.get_all_matches()
-        return JSONResponse(content={
-            "matches": matches,
-            "count": len(matches),
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        return snapshot_response(request, cache.get_snapshot("today"))
     except Exception as e:
         logger.error(f"Error getting today matches: {e}")
         return JSONResponse(
@@ -157,15 +356,10 @@ async def get_today_matches():
 
 
 @app.get("/api/leagues")
-async def get_leagues():
+async def get_leagues(request: Request):
     """Get all leagues with matches"""
     try:
-        leagues = cache.get_leagues()
-        return JSONResponse(content={
-            "leagues": leagues,
-            "count": len(leagues),
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        return snapshot_response(request, cache.get_snapshot("leagues"))
     except Exception as e:
         logger.error(f"Error getting leagues: {e}")
         return JSONResponse(
@@ -174,13 +368,184 @@ async def get_leagues():
         )
 
 
+@app.get("/api/matches")
+async def find_matches(
+    request: Request,
+    status: Optional[str] = None,
+    league: Optional[str] = None,
+    country: Optional[str] = None,
+    team: Optional[str] = None,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+):
+    """Get matches filtered by status, league, country, team and kickoff range"""
+    start_ts = parse_kickoff(start)
+    end_ts = parse_kickoff(end)
+    if (start and start_ts is None) or (end and end_ts is None):
+        return JSONResponse(
+            status_code=400,
+            content={"error": "from/to must be ISO 8601 times", "matches": []}
+        )
+    
+    def build():
+        # One state for the matches and the version the ETag is made from
+        state = cache.get_state()
+        matches = cache.find_matches(
+            statuses=[s.strip() for s in status.split(",") if s.strip()] if status else None,
+            league_id=league,
+            country=country,
+            team=team,
+            start=start_ts,
+            end=end_ts,
+            state=state,
+        )
+        return {
+            "matches": [match.to_dict() for match in matches],
+            "count": len(matches),
+            "version": state.version,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    
+    try:
+        # The same filter from many clients is computed once per version
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        snapshot = await coalescer.get(f"{cache.get_epoch()}:matches?{query}", cache.get_version(), build, "matches")
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.error(f"Error finding matches: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to find matches", "matches": []}
+        )
+
+
+@app.get("/api/changes")
+async def get_changes(request: Request, since: int = 0):
+    """Get match changes recorded after version `since`"""
+    def build():
+        feed = cache.get_changes(since)
+        return {
+            **feed,
+            "count": len(feed["changes"]),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    
+    try:
+        snapshot = await coalescer.get(f"{cache.get_epoch()}:changes?{since}", cache.get_version(), build, "changes")
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.error(f"Error getting changes since {since}: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to get changes", "changes": []}
+        )
+
+
+async def change_events(subscriber: Subscriber, since: Optional[int]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Yield changes for a push client, None when a keep-alive is due
+    
+    Replays the change log after `since` first; the subscriber is registered
+    before the replay so nothing published in between is lost.
+    """
+    last_version = since if since is not None else cache.get_version()
+    
+    if since is not None:
+        feed = cache.get_changes(since)
+        if feed["reset"]:
+            yield {"op": "reset", "version": feed["version"]}
+        for change in feed["changes"]:
+            yield change
+        last_version = feed["version"]
+    
+    while True:
+        try:
+            changes = await subscriber.get(timeout=PUSH_KEEPALIVE)
+        except asyncio.TimeoutError:
+            yield None
+            continue
+        
+        if changes is None:
+            # Dropped as a slow consumer
+            return
+        for change in changes:
+            if change["op"] != "reset" and change["version"] <= last_version:
+                continue
+            last_version = change["version"]
+            yield change
+
+
+@app.get("/api/stream")
+async def stream_changes(request: Request, since: Optional[int] = None):
+    """Server-Sent Events stream of match changes"""
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    
+    subscriber = hub.subscribe()
+    
+    async def events():
+        try:
+            async for change in change_events(subscriber, since):
+                if change is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield (
+                    f"id: {change['version']}\n"
+                    f"event: {change['op']}\n"
+                    f"data: {json.dumps(change, separators=(',', ':'))}\n\n"
+                )
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/ws/live")
+async def websocket_changes(websocket: WebSocket, since: Optional[int] = None):
+    """WebSocket stream of match changes"""
+    await websocket.accept()
+    subscriber = hub.subscribe()
+    
+    async def push():
+        async for change in change_events(subscriber, since):
+            await websocket.send_json(change if change is not None else {"op": "ping"})
+        # Dropped as a slow consumer
+        await websocket.close(code=1013)
+    
+    async def watch_disconnect():
+        # Client messages are ignored; this returns once the socket closes
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    
+    tasks = [asyncio.create_task(push()), asyncio.create_task(watch_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception():
+                logger.debug(f"WebSocket push error: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscriber)
+
+
 @app.get("/api/match/{match_id}")
 async def get_match(match_id: str):
-    """Get single match by ID"""
+    """Get single match by ID, with its events and statistics when they can be fetched"""
     try:
         match = cache.get_match(match_id)
         if match:
-            return JSONResponse(content={"match": match})
+            details = await enricher.get(match) if enricher else None
+            return JSONResponse(
+                content={"match": match.to_dict(), "details": details},
+                headers={"Cache-Control": CACHE_CONTROL},
+            )
         return JSONResponse(
             status_code=404,
             content={"error": "Match not found"}
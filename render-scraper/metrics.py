@@ -0,0 +1,180 @@
+"""
+Prometheus metrics
+Scrape phase timings, API latency and response sizes, cache size and staleness, fallbacks and browser recoveries
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # Optional: without it /metrics is unavailable and recording is a no-op
+    REGISTRY = None
+    CONTENT_TYPE_LATEST = "text/plain"
+
+# Scrape phases range from a parse of a few ms to a page load near its timeout
+PHASE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# A page load ranges from everything cached to the site's full bundle set
+LOAD_BUCKETS = (16384, 65536, 262144, 524288, 1048576, 2097152, 4194304, 8388608, 16777216)
+
+
+class _NullMetric:
+    """Stands in for every metric when prometheus_client is not installed"""
+    
+    def labels(self, *args, **kwargs):
+        return self
+    
+    def observe(self, value):
+        pass
+    
+    def inc(self, amount=1):
+        pass
+    
+    def time(self):
+        return _NULL_TIMER
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+if REGISTRY is not None:
+    SCRAPE_PHASE_SECONDS = Histogram(
+        "scrape_phase_seconds", "Time spent in each phase of a scrape", ["phase"], buckets=PHASE_BUCKETS
+    )
+    SCRAPES = Counter("scrapes_total", "Scrape cycles by outcome", ["result"])
+    FALLBACKS = Counter("scrape_fallbacks_total", "Scrapes that needed a fallback path", ["kind"])
+    SELECTOR_FALLBACKS = Counter(
+        "selector_fallbacks_total", "Match row fields found only by a fallback selector", ["field"]
+    )
+    BROWSER_RECOVERIES = Counter("browser_recoveries_total", "Browser recoveries by tier", ["tier"])
+    BROWSER_REQUESTS = Counter(
+        "browser_requests_total", "Browser requests by outcome (network, cached, blocked)", ["outcome"]
+    )
+    BROWSER_BYTES = Counter("browser_bytes_total", "Browser response bytes by outcome", ["outcome"])
+    PAGE_LOAD_BYTES = Histogram("page_load_bytes", "Bytes downloaded per page load", buckets=LOAD_BUCKETS)
+    ENRICH_LOOKUPS = Counter(
+        "enrich_lookups_total", "Match detail lookups (hit, miss, coalesced into a running fetch, backoff after a failure)", ["result"]
+    )
+    ENRICH_FETCHES = Counter("enrich_fetches_total", "Match detail fetches by outcome", ["result"])
+    SOURCE_FETCHES = Counter("source_fetches_total", "Polls of other score providers by outcome", ["source", "result"])
+    RATE_LIMITED = Counter("http_rate_limited_total", "Requests answered 429 by the rate limiter", ["route"])
+    HTTP_LATENCY = Histogram(
+        "http_request_duration_seconds", "Time until the response starts", ["method", "route", "status"]
+    )
+    HTTP_RESPONSE_SIZE = Histogram(
+        "http_response_size_bytes", "Response body size as sent", ["route"], buckets=SIZE_BUCKETS
+    )
+else:
+    SCRAPE_PHASE_SECONDS = SCRAPES = FALLBACKS = SELECTOR_FALLBACKS = _NullMetric()
+    BROWSER_RECOVERIES = SOURCE_FETCHES = HTTP_LATENCY = HTTP_RESPONSE_SIZE = _NullMetric()
+    BROWSER_REQUESTS = BROWSER_BYTES = PAGE_LOAD_BYTES = ENRICH_LOOKUPS = ENRICH_FETCHES = RATE_LIMITED = _NullMetric()
+
+
+def phase(name: str):
+    """Context manager timing one scrape phase"""
+    return SCRAPE_PHASE_SECONDS.labels(name).time()
+
+
+def record_selector_fallbacks(fallbacks: Dict[str, int]):
+    """Add one parse's per-field fallback counts"""
+    for field, count in fallbacks.items():
+        SELECTOR_FALLBACKS.labels(field).inc(count)
+
+
+class CacheCollector:
+    """Reads cache, push and scheduler state when Prometheus scrapes, so the hot path pays nothing"""
+    
+    def __init__(self, cache, hub, scheduler):
+        self.cache = cache
+        self.hub = hub
+        self.scheduler = scheduler
+    
+    def collect(self):
+        stats = self.cache.get_stats()
+        yield GaugeMetricFamily("cache_matches", "Matches in the cache", value=stats["matches"])
+        yield GaugeMetricFamily("cache_live_matches", "Live matches in the cache", value=stats["live"])
+        yield GaugeMetricFamily("cache_bytes", "Approximate encoded size of the cached matches", value=stats["bytes"])
+        yield GaugeMetricFamily("cache_version", "Current change version", value=self.cache.get_version())
+        
+        evictions = CounterMetricFamily("cache_evictions", "Matches evicted from the cache", labels=["reason"])
+        for reason, count in stats["evictions"].items():
+            evictions.add_metric([reason], count)
+        yield evictions
+        
+        age = data_age(self.cache.get_last_update())
+        if age is not None:
+            yield GaugeMetricFamily("cache_data_age_seconds", "Seconds since the last successful cache update", value=age)
+        
+        yield GaugeMetricFamily("push_clients", "Connected SSE and WebSocket clients", value=self.hub.get_subscriber_count())
+        
+        decision = self.scheduler.get_stats()
+        if decision["interval"] is not None:
+            interval = GaugeMetricFamily("scrape_interval_seconds", "Current delay between scrapes", labels=["reason"])
+            interval.add_metric([decision["reason"]], decision["interval"])
+            yield interval
+        yield GaugeMetricFamily("scrape_consecutive_failures", "Failed scrapes in a row", value=decision["failures"])
+
+
+def data_age(last_update: Optional[str]) -> Optional[float]:
+    """Seconds since an ISO timestamp, None if there is none"""
+    if not last_update:
+        return None
+    return max(0.0, (datetime.now(timezone.utc) - datetime.fromisoformat(last_update)).total_seconds())
+
+
+def register_collector(cache, hub, scheduler):
+    if REGISTRY is not None:
+        REGISTRY.register(CacheCollector(cache, hub, scheduler))
+
+
+def render() -> Optional[bytes]:
+    """The exposition text, None without prometheus_client"""
+    if REGISTRY is None:
+        return None
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and response size per route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or REGISTRY is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        size = 0
+        
+        async def send_wrapper(message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                # Streams stay open; time to the first byte is the latency that matters
+                HTTP_LATENCY.labels(scope["method"], _route(scope), message["status"]).observe(time.perf_counter() - start)
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_RESPONSE_SIZE.labels(_route(scope)).observe(size)
+
+
+def _route(scope) -> str:
+    # Templates such as /api/match/{match_id} keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
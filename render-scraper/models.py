@@ -0,0 +1,130 @@
+"""
+Compact match records
+Immutable match and team tuples with shared strings, converted to API dicts only at the edge
+"""
+
+import sys
+from typing import Dict, Optional, Any, NamedTuple
+
+
+class Team(NamedTuple):
+    """One side of a match"""
+    id: str
+    name: str
+    short_name: str
+    logo: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "shortName": self.short_name,
+            "logo": self.logo
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Team":
+        return cls(data["id"], data["name"], data["shortName"], data["logo"])
+
+
+class Match(NamedTuple):
+    """A match as stored in the cache
+    
+    Tuples carry no per-instance dict and compare field by field, so an
+    unchanged match is recognised without building any API payload.
+    """
+    id: str
+    home: Team
+    away: Team
+    home_score: Optional[int]
+    away_score: Optional[int]
+    status: str
+    minute: Optional[int]
+    # None when the source didn't show a kickoff
+    start_time: Optional[str]
+    league_id: str
+    league_name: str
+    country: str
+    # Restored from disk and not yet confirmed by a scrape
+    stale: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The API representation"""
+        data = {
+            "id": self.id,
+            "homeTeam": self.home.to_dict(),
+            "awayTeam": self.away.to_dict(),
+            "homeScore": self.home_score,
+            "awayScore": self.away_score,
+            "status": self.status,
+            "minute": self.minute,
+            "startTime": self.start_time,
+            "leagueId": self.league_id,
+            "leagueName": self.league_name,
+            "country": self.country
+        }
+        if self.stale:
+            data["stale"] = True
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Match":
+        return cls(
+            data["id"],
+            Team.from_dict(data["homeTeam"]),
+            Team.from_dict(data["awayTeam"]),
+            data.get("homeScore"),
+            data.get("awayScore"),
+            data["status"],
+            data.get("minute"),
+            data.get("startTime"),
+            data["leagueId"],
+            data["leagueName"],
+            data.get("country", ""),
+            bool(data.get("stale")),
+        )
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if value else value
+
+
+class TeamRegistry:
+    """Shares one Team record and one copy of each repeated string
+    
+    Parsers may run in other processes, so records arrive with private
+    string copies; the cache passes new records through here before
+    storing them.
+    """
+    
+    def __init__(self):
+        self._teams: Dict[Team, Team] = {}
+    
+    def team(self, team: Team) -> Team:
+        shared = self._teams.get(team)
+        if shared is None:
+            shared = Team(*(_intern(value) for value in team))
+            self._teams[shared] = shared
+        return shared
+    
+    def match(self, match: Match) -> Match:
+        """Return `match` using shared teams and strings"""
+        return match._replace(
+            home=self.team(match.home),
+            away=self.team(match.away),
+            status=_intern(match.status),
+            league_id=_intern(match.league_id),
+            league_name=_intern(match.league_name),
+            country=_intern(match.country),
+        )
+    
+    def retain(self, matches) -> None:
+        """Forget teams that no longer appear in `matches`"""
+        teams = {}
+        for match in matches:
+            teams[match.home] = match.home
+            teams[match.away] = match.away
+        self._teams = teams
+    
+    def __len__(self) -> int:
+        return len(self._teams)
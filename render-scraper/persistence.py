@@ -0,0 +1,117 @@
+"""
+Cache snapshot persistence
+Saves the match cache to disk periodically and restores it on startup for a warm start
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from cache import MatchCache
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON is always available
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file; empty disables persistence
+CACHE_SNAPSHOT_PATH = os.environ.get("CACHE_SNAPSHOT_PATH", "cache-snapshot.bin")
+# Seconds between snapshots (only written when the cache changed)
+CACHE_SNAPSHOT_INTERVAL = float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", "30"))
+
+# File header: magic, format version, encoding
+MAGIC = b"LGH1"
+ENCODING_MSGPACK = b"M"
+ENCODING_JSON = b"J"
+
+
+def encode_snapshot(data: Dict[str, Any]) -> bytes:
+    """Serialize exported cache data, msgpack when available"""
+    if msgpack is not None:
+        return MAGIC + ENCODING_MSGPACK + msgpack.packb(data, use_bin_type=True)
+    return MAGIC + ENCODING_JSON + json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def decode_snapshot(raw: bytes) -> Dict[str, Any]:
+    """Parse a snapshot written by encode_snapshot"""
+    if not raw.startswith(MAGIC):
+        raise ValueError("Not a cache snapshot")
+    encoding, body = raw[len(MAGIC):len(MAGIC) + 1], raw[len(MAGIC) + 1:]
+    
+    if encoding == ENCODING_JSON:
+        return json.loads(body)
+    if encoding == ENCODING_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Snapshot is msgpack encoded but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    raise ValueError(f"Unknown snapshot encoding: {encoding!r}")
+
+
+def save_snapshot(cache: MatchCache, path: str = CACHE_SNAPSHOT_PATH) -> int:
+    """Write the cache atomically and return the number of bytes written"""
+    raw = encode_snapshot(cache.export())
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Write next to the target and rename, so a crash never leaves a torn file;
+    # the temp name is unique so workers sharing the path never write one file
+    fd, temp = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return len(raw)
+
+
+def load_snapshot(cache: MatchCache, path: str = CACHE_SNAPSHOT_PATH) -> int:
+    """Restore the cache from disk, returning the number of matches loaded"""
+    target = Path(path)
+    if not target.exists():
+        return 0
+    
+    try:
+        started = time.perf_counter()
+        count = cache.restore(decode_snapshot(target.read_bytes()))
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"Restored {count} matches from {target} in {elapsed:.0f} ms")
+        return count
+    except Exception as e:
+        # A bad snapshot must never stop the service from starting
+        logger.error(f"Could not restore cache snapshot {target}: {e}")
+        return 0
+
+
+class SnapshotWriter:
+    """Persists the cache whenever its version moved since the last write"""
+    
+    def __init__(self, cache: MatchCache, path: str = CACHE_SNAPSHOT_PATH):
+        self.cache = cache
+        self.path = path
+        self._saved_version: Optional[int] = None
+    
+    def save_if_changed(self) -> bool:
+        """Write a snapshot if the cache changed; runs in a worker thread"""
+        version = self.cache.get_version()
+        if version == self._saved_version:
+            return False
+        
+        try:
+            size = save_snapshot(self.cache, self.path)
+        except Exception as e:
+            logger.error(f"Could not write cache snapshot {self.path}: {e}")
+            return False
+        
+        self._saved_version = version
+        logger.debug(f"Saved cache snapshot version {version} ({size} bytes)")
+        return True
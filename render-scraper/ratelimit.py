@@ -0,0 +1,173 @@
+"""
+Per-client rate limiting
+Token buckets per client IP and route template, answering 429 with Retry-After once a bucket runs dry
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from starlette.routing import Match as RouteMatch
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sustained requests per second and burst size allowed per client and route;
+# a rate of 0 turns limiting off
+RATE_LIMIT_RPS = float(os.environ.get("RATE_LIMIT_RPS", "5"))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "30"))
+# Per-route overrides, e.g. "/api/matches=1/10,/api/match/{match_id}=5/30"
+RATE_LIMIT_ROUTES = os.environ.get("RATE_LIMIT_ROUTES", "")
+# Proxies in front of the app (Render's load balancer is one); the client is
+# taken from X-Forwarded-For that many entries from the right
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+
+# Health checks and Prometheus scrapes are never limited
+EXEMPT_PATHS = ("/", "/metrics")
+# Full buckets are dropped once this many are tracked
+MAX_BUCKETS = 100000
+
+
+def parse_route_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Route template -> (rate, burst) from "path=rate/burst,..." """
+    limits = {}
+    for item in spec.split(","):
+        path, sep, value = item.strip().rpartition("=")
+        rate, slash, burst = value.partition("/")
+        try:
+            if not sep or not slash:
+                raise ValueError(item)
+            limits[path] = (float(rate), float(burst))
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring rate limit spec {item.strip()!r}")
+    return limits
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` per second"""
+    
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+    
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """Spend a token; 0 if one was available, else seconds until one is"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    """Buckets keyed by (client, route template)"""
+    
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_RPS,
+        burst: float = RATE_LIMIT_BURST,
+        routes: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.default = (rate, burst)
+        self.routes = routes if routes is not None else parse_route_limits(RATE_LIMIT_ROUTES)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+    
+    def check(self, client: str, route: str, now: Optional[float] = None) -> float:
+        """0 if the request may proceed, else seconds until it may be retried"""
+        rate, burst = self.routes.get(route, self.default)
+        if rate <= 0 or burst <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get((client, route))
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[(client, route)] = TokenBucket(burst, now)
+        return bucket.take(rate, burst, now)
+    
+    def _prune(self, now: float):
+        """Forget buckets that have refilled completely; they start full anyway"""
+        for key, bucket in list(self._buckets.items()):
+            rate, burst = self.routes.get(key[1], self.default)
+            if bucket.tokens + (now - bucket.updated) * rate >= burst:
+                del self._buckets[key]
+        if len(self._buckets) >= MAX_BUCKETS:
+            # Everyone is mid-burst; resetting beats growing without bound
+            self._buckets.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {"buckets": len(self._buckets)}
+
+
+def client_address(scope, hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """The client IP, read from X-Forwarded-For behind `hops` trusted proxies"""
+    if hops > 0:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                addresses = [address.strip() for address in value.decode("latin-1").split(",")]
+                if len(addresses) >= hops:
+                    return addresses[-hops]
+                return addresses[0]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def find_route(scope):
+    """The route a request will be dispatched to, None if there is none"""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == RouteMatch.FULL:
+            return route
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing a RateLimiter on HTTP requests"""
+    
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+        self._proxy_warned = TRUSTED_PROXY_HOPS > 0
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        if not self._proxy_warned and any(name == b"x-forwarded-for" for name, _ in scope.get("headers", ())):
+            self._proxy_warned = True
+            logger.warning("Request came through a proxy but TRUSTED_PROXY_HOPS is 0; all its clients share one rate limit")
+        
+        # Limits apply per route template, so /api/match/{match_id} is one route
+        route = find_route(scope)
+        template = getattr(route, "path", None) or "unmatched"
+        retry_after = self.limiter.check(client_address(scope), template)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+        
+        # Lets the metrics middleware label the response with the template
+        scope["route"] = route
+        metrics.RATE_LIMITED.labels(template).inc()
+        retry_after = math.ceil(retry_after)
+        body = json.dumps({"error": "Too many requests", "retryAfter": retry_after}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,112 @@
+"""
+Adaptive scrape scheduler
+Picks the next scrape interval from what is in the cache, with jittered backoff on failures
+"""
+
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional, Any, NamedTuple
+
+from cache import MatchCache
+
+logger = logging.getLogger(__name__)
+
+# Interval while matches are live or about to kick off (seconds)
+LIVE_INTERVAL = float(os.environ.get("SCHEDULE_LIVE_INTERVAL", "10"))
+# Longest interval when nothing is live or imminent
+IDLE_INTERVAL = float(os.environ.get("SCHEDULE_IDLE_INTERVAL", "300"))
+# Poll tightly from this long before a scheduled kickoff...
+KICKOFF_LEAD = 5 * 60
+# ...until the site reports it started, or this long after kickoff
+KICKOFF_GRACE = 30 * 60
+
+# Failure backoff: first retry after BACKOFF_BASE, doubling up to BACKOFF_MAX
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = float(os.environ.get("SCHEDULE_BACKOFF_MAX", "300"))
+
+
+class ScheduleDecision(NamedTuple):
+    """How long to wait before the next scrape, and why"""
+    interval: float
+    reason: str
+
+
+class AdaptiveScheduler:
+    """Derives the scrape interval from match state in the cache
+    
+    Live matches or a kickoff within KICKOFF_LEAD keep the interval at
+    LIVE_INTERVAL. Otherwise it stretches towards IDLE_INTERVAL, waking up
+    just before the next scheduled kickoff. Consecutive failures use
+    jittered exponential backoff, so retries don't hammer a struggling site
+    in lockstep.
+    """
+    
+    def __init__(
+        self,
+        cache: MatchCache,
+        live_interval: float = LIVE_INTERVAL,
+        idle_interval: float = IDLE_INTERVAL,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        self.cache = cache
+        self.live_interval = live_interval
+        self.idle_interval = max(idle_interval, live_interval)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failures = 0
+        self.last_decision: Optional[ScheduleDecision] = None
+    
+    def next_interval(self, now: Optional[float] = None) -> ScheduleDecision:
+        """Interval after a successful scrape"""
+        now = time.time() if now is None else now
+        decision = self._decide(now)
+        if self.last_decision is None or decision.reason != self.last_decision.reason:
+            logger.info(f"Scrape interval {decision.interval:.0f}s ({decision.reason})")
+        self.last_decision = decision
+        return decision
+    
+    def _decide(self, now: float) -> ScheduleDecision:
+        stats = self.cache.get_stats()
+        if stats["matches"] == 0:
+            return ScheduleDecision(self.live_interval, "empty")
+        if stats["live"]:
+            return ScheduleDecision(self.live_interval, "live")
+        
+        # Matches past kickoff that the site still lists as scheduled start any moment
+        next_kickoff = self.cache.get_next_kickoff(now - KICKOFF_GRACE)
+        if next_kickoff is None:
+            return ScheduleDecision(self.idle_interval, "idle")
+        
+        until_lead = next_kickoff - KICKOFF_LEAD - now
+        if until_lead <= 0:
+            return ScheduleDecision(self.live_interval, "kickoff")
+        return ScheduleDecision(
+            max(self.live_interval, min(self.idle_interval, until_lead)),
+            "waiting for kickoff",
+        )
+    
+    def record_success(self):
+        """Reset the failure backoff"""
+        if self.failures:
+            logger.info(f"Scraping recovered after {self.failures} failures")
+        self.failures = 0
+    
+    def record_failure(self) -> ScheduleDecision:
+        """Register a failed scrape and get the backoff before retrying"""
+        self.failures += 1
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        decision = ScheduleDecision(random.uniform(self.backoff_base / 2, ceiling), "backoff")
+        self.last_decision = decision
+        return decision
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Current decision for the health endpoint"""
+        decision = self.last_decision
+        return {
+            "interval": round(decision.interval, 1) if decision else None,
+            "reason": decision.reason if decision else None,
+            "failures": self.failures,
+        }
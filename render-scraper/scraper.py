@@ -5,25 +5,231 @@ Handles JavaScript rendering and anti-bot measures
 
 import asyncio
 import logging
+import multiprocessing
+import os
 import re
-from datetime import datetime, timezone
-from typing import List, Dict, Optional, Any
-from urllib.parse import urljoin
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from bs4 import BeautifulSoup
 
+from fastparse import parse_matches_fast, classify_stage, kickoff_from_text, absolute_logo, build_match
+from ids import native_match_id
+from feed import FeedClient, parse_feed
+from interception import RequestInterceptor
+import metrics
+from models import Match
+from targets import ScrapeTarget, SCRAPE_CONCURRENCY, apply_target, parse_targets
+
 logger = logging.getLogger(__name__)
 
 # Flashscore URLs
 FLASHSCORE_BASE = "https://www.flashscore.com"
 FLASHSCORE_MATCHES = "https://www.flashscore.com/"
 
+# "dom" reloads and parses the page each cycle; "feed" reads the site's data feed,
+# using DOM as fallback; "observe" keeps one page open and streams changed rows
+SCRAPE_MODE = os.environ.get("SCRAPE_MODE", "dom")
+
+# Observe mode: full re-parse of the open page / full reload intervals (seconds)
+OBSERVE_RESYNC = float(os.environ.get("OBSERVE_RESYNC", "60"))
+OBSERVE_RELOAD = float(os.environ.get("OBSERVE_RELOAD", "900"))
+OBSERVE_DEBOUNCE_MS = int(os.environ.get("OBSERVE_DEBOUNCE_MS", "250"))
+
+OBSERVER_BINDING = "__liveGoalRows"
+
+# Whole-scrape time limit before the page is treated as hung (seconds)
+SCRAPE_TIMEOUT = float(os.environ.get("SCRAPE_TIMEOUT", "60"))
+# Watchdog: how often to probe the page, how long it may take to answer,
+# and the JS heap size that triggers a proactive context swap
+WATCHDOG_INTERVAL = float(os.environ.get("WATCHDOG_INTERVAL", "60"))
+WATCHDOG_TIMEOUT = 5.0
+BROWSER_HEAP_LIMIT_MB = float(os.environ.get("BROWSER_HEAP_LIMIT_MB", "512"))
+CLOSE_TIMEOUT = 5.0
+
+# Page readiness: longest wait for the first match row (seconds), then the
+# row list counts as rendered once its rows and their text stay unchanged for
+# READY_QUIET_MS, checked every READY_POLL_MS, giving up after READY_SETTLE_MAX seconds
+READY_TIMEOUT = float(os.environ.get("READY_TIMEOUT", "15"))
+READY_QUIET_MS = int(os.environ.get("READY_QUIET_MS", "300"))
+READY_POLL_MS = int(os.environ.get("READY_POLL_MS", "100"))
+READY_SETTLE_MAX = float(os.environ.get("READY_SETTLE_MAX", "5"))
+
+MATCH_ROW_SELECTOR = ".event__match"
+# Any event markup at all; present when the site renders rows under other class names
+EVENT_MARKUP_SELECTOR = "[class*='event']"
+
+# Resolves once the rows' count and text checksum hold still for quietMs
+READY_SCRIPT = """
+async ([selector, pollMs, quietMs, maxMs]) => {
+    const start = performance.now();
+    const sample = () => {
+        const rows = document.querySelectorAll(selector);
+        let hash = rows.length;
+        for (const row of rows) {
+            const text = row.textContent;
+            for (let i = 0; i < text.length; i++) {
+                hash = (hash * 31 + text.charCodeAt(i)) | 0;
+            }
+        }
+        return [rows.length, hash];
+    };
+    
+    let [rows, hash] = sample();
+    let stableSince = performance.now();
+    while (performance.now() - start < maxMs) {
+        await new Promise((resolve) => setTimeout(resolve, pollMs));
+        const [count, current] = sample();
+        if (count !== rows || current !== hash) {
+            [rows, hash] = [count, current];
+            stableSince = performance.now();
+        } else if (performance.now() - stableSince >= quietMs) {
+            return {stable: true, rows};
+        }
+    }
+    return {stable: false, rows};
+}
+"""
+
+# Calendar arrows used to move a target page to another day
+CALENDAR_NEXT = "[data-day-picker-arrow='next'], .calendar__navigation--tomorrow"
+CALENDAR_PREV = "[data-day-picker-arrow='prev'], .calendar__navigation--yesterday"
+# The first row's ID, and whether it has changed; the old day's rows stay
+# in place for a moment after a calendar click
+FIRST_ROW_SCRIPT = "(selector) => document.querySelector(selector)?.id || null"
+DAY_CHANGED_SCRIPT = "([selector, firstId]) => document.querySelector(selector)?.id !== firstId"
+
+# Reports changed match rows (with their league header) to OBSERVER_BINDING
+OBSERVER_SCRIPT = """
+([binding, debounceMs]) => {
+    if (window.__liveGoalObserver) {
+        window.__liveGoalObserver.disconnect();
+    }
+    const pending = new Set();
+    let timer = null;
+    
+    const headerOf = (row) => {
+        for (let el = row.previousElementSibling; el; el = el.previousElementSibling) {
+            if (String(el.className).includes("event__header")) {
+                return el;
+            }
+        }
+        return null;
+    };
+    
+    const flush = () => {
+        timer = null;
+        const rows = [];
+        for (const row of pending) {
+            const header = row.isConnected ? headerOf(row) : null;
+            // Rows without a header would lose their league; the resync covers them
+            if (header) {
+                rows.push(header.outerHTML + row.outerHTML);
+            }
+        }
+        pending.clear();
+        if (rows.length) {
+            window[binding](rows);
+        }
+    };
+    
+    const track = (node) => {
+        const el = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+        if (!el) {
+            return;
+        }
+        const row = el.closest(".event__match");
+        if (row) {
+            pending.add(row);
+        } else if (el.querySelectorAll) {
+            el.querySelectorAll(".event__match").forEach((match) => pending.add(match));
+        }
+    };
+    
+    const observer = new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            track(mutation.target);
+            mutation.addedNodes.forEach(track);
+        }
+        if (pending.size && !timer) {
+            timer = setTimeout(flush, debounceMs);
+        }
+    });
+    observer.observe(document.body, {
+        subtree: true,
+        childList: true,
+        characterData: true,
+        attributes: true,
+        attributeFilter: ["class"],
+    });
+    window.__liveGoalObserver = observer;
+}
+"""
+
+# Where HTML parsing runs: "thread" / "process" pool, or "inline" on the event loop
+PARSE_POOL = os.environ.get("PARSE_POOL", "thread")
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "2"))
+
+
+def create_parse_pool(kind: str = PARSE_POOL, workers: int = PARSE_WORKERS) -> Optional[Executor]:
+    """Create the executor used for HTML parsing, None to parse inline"""
+    if kind == "process":
+        # Spawned workers avoid forking a process that runs Chromium and threads
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    return None
+
+
+# Key in a parse's fallback counts for a page the fast parser couldn't handle
+BS4_FALLBACK = "bs4"
+
+
+def parse_html_counted(html: str) -> Tuple[List[Match], Dict[str, int]]:
+    """Parse a match list page and count selector fallback hits by field
+    
+    Module level so process pools can pickle it; the parsers are static, so
+    no scraper (targets, feed client, interceptor) is built per parse.
+    """
+    fallbacks: Dict[str, int] = Counter()
+    return FlashscoreScraper._parse_matches(html, fallbacks), dict(fallbacks)
+
 
 class FlashscoreScraper:
     """Playwright-based Flashscore scraper with anti-bot handling"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        parse_pool: Optional[Executor] = None,
+        mode: str = SCRAPE_MODE,
+        feed: Optional[FeedClient] = None,
+        targets: Optional[List[ScrapeTarget]] = None,
+        concurrency: int = SCRAPE_CONCURRENCY,
+    ):
+        self.parse_pool = parse_pool
+        self.mode = mode
+        self.feed = feed or FeedClient()
+        # Extra targets share the browser context through a small pool of tabs
+        self.targets = parse_targets() if targets is None else targets
+        self._target_slots = asyncio.Semaphore(max(1, concurrency))
+        self._idle_pages: List[Page] = []
+        self._target_due: Dict[str, float] = {}
+        # Observe mode state
+        self._observed_page: Optional[Page] = None
+        self._pending_rows: List[str] = []
+        self._rows_ready = asyncio.Event()
+        self._last_reload = 0.0
+        self._last_resync = 0.0
+        # Recovery state: consecutive failures pick the tier, counts feed the health endpoint
+        self._failures = 0
+        self._spare_task: Optional[asyncio.Task] = None
+        self._last_health_check = 0.0
+        self.recoveries: Counter = Counter()
+        # Outlives contexts and relaunches so cached bundles survive recoveries
+        self.interceptor = RequestInterceptor()
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
@@ -47,29 +253,9 @@ class FlashscoreScraper:
                 ]
             )
             
-            # Create context with realistic browser settings
-            self.context = await self.browser.new_context(
-                viewport={"width": 1280, "height": 800},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                locale="en-US",
-                timezone_id="UTC",
-                # Block unnecessary resources for speed
-                bypass_csp=True,
-            )
-            
-            # Block images, fonts, media for faster loading
-            await self.context.route(
-                re.compile(r"\.(png|jpg|jpeg|gif|svg|ico|woff|woff2|ttf|mp4|webm|mp3)$"),
-                lambda route: route.abort()
-            )
-            
-            # Block tracking/analytics
-            await self.context.route(
-                re.compile(r"(google-analytics|googletagmanager|facebook|analytics)"),
-                lambda route: route.abort()
-            )
-            
-            self.page = await self.context.new_page()
+            self.context = await self._new_context()
+            self.page = await self._new_page()
+            self._warm_spare()
             
             logger.info("Playwright browser initialized successfully")
             
@@ -77,13 +263,140 @@ class FlashscoreScraper:
             logger.error(f"Failed to initialize Playwright: {e}")
             raise
     
+    async def _new_context(self) -> BrowserContext:
+        """Create a browser context with realistic settings and resource blocking"""
+        context = await self.browser.new_context(
+            viewport={"width": 1280, "height": 800},
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            locale="en-US",
+            timezone_id="UTC",
+            bypass_csp=True,
+        )
+        
+        # Only what renders the match rows is loaded; static bundles come from the local cache
+        await self.interceptor.attach(context)
+        return context
+    
+    async def _new_page(self) -> Page:
+        """Open the main scraping page in the current context"""
+        page = await self.context.new_page()
+        self.feed.watch(page)
+        return page
+    
+    def _warm_spare(self):
+        """Start preparing a standby context in the background"""
+        if self._spare_task is None and self.browser is not None:
+            self._spare_task = asyncio.create_task(self._new_context())
+    
+    async def _take_spare(self) -> BrowserContext:
+        """Get the standby context, creating one if it isn't ready or failed"""
+        task, self._spare_task = self._spare_task, None
+        if task is not None:
+            try:
+                return await task
+            except Exception as e:
+                logger.warning(f"Standby context failed: {e}")
+        return await self._new_context()
+    
+    async def recover(self):
+        """Restore a working page after a failed scrape, cheapest fix first
+        
+        Consecutive failures escalate from a new page (milliseconds) to the
+        standby context (no browser launch) to relaunching Chromium. The
+        level resets after the next successful scrape.
+        """
+        self._failures += 1
+        try:
+            if self._failures == 1 and self.context is not None:
+                self._count_recovery("page")
+                await self._recycle_page()
+                return
+            if self._failures == 2 and self.browser is not None and self.browser.is_connected():
+                self._count_recovery("context")
+                await self._recycle_context()
+                return
+        except Exception as e:
+            logger.error(f"Recovery failed, relaunching browser: {e}")
+        
+        self._count_recovery("browser")
+        await self._restart_browser()
+        # A fresh browser starts the escalation over
+        self._failures = 0
+    
+    def _count_recovery(self, tier: str):
+        self.recoveries[tier] += 1
+        metrics.BROWSER_RECOVERIES.labels(tier).inc()
+    
+    async def _recycle_page(self):
+        """Replace the main page, keeping the context and its cookies"""
+        old_page, self.page = self.page, await self._new_page()
+        await self._close_quietly(old_page)
+        logger.info("Recovered with a new page")
+    
+    async def _recycle_context(self):
+        """Swap in the standby context and warm a new one"""
+        old_context = self.context
+        self.context = await self._take_spare()
+        self.page = await self._new_page()
+        self._warm_spare()
+        
+        # Pooled target tabs belong to the old context
+        self._idle_pages = []
+        await self._close_quietly(old_context)
+        logger.info("Recovered with the standby context")
+    
+    async def _restart_browser(self):
+        """Relaunch Playwright and Chromium from scratch"""
+        await self.close()
+        await self.initialize()
+        logger.info("Recovered by relaunching the browser")
+    
+    @staticmethod
+    async def _close_quietly(target):
+        if target is None:
+            return
+        try:
+            await asyncio.wait_for(target.close(), CLOSE_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Error closing {type(target).__name__}: {e}")
+    
+    async def check_health(self):
+        """Recycle the page or context if it hangs or its heap grows too large
+        
+        Called between scrapes, so nothing is using the page at the time.
+        """
+        if self.page is None or time.monotonic() - self._last_health_check < WATCHDOG_INTERVAL:
+            return
+        self._last_health_check = time.monotonic()
+        
+        try:
+            heap = await asyncio.wait_for(
+                self.page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0"),
+                WATCHDOG_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning(f"Page unresponsive ({str(e) or type(e).__name__}), recycling it")
+            self._count_recovery("hung")
+            await self._recycle_page()
+            return
+        
+        heap_mb = heap / (1024 * 1024)
+        if heap_mb > BROWSER_HEAP_LIMIT_MB:
+            logger.warning(f"Page heap at {heap_mb:.0f} MB, recycling context")
+            self._count_recovery("memory")
+            await self._recycle_context()
+    
     async def close(self):
         """Clean up browser resources"""
         try:
+            if self._spare_task is not None:
+                self._spare_task.cancel()
+                self._spare_task = None
+            self._idle_pages = []
             if self.page:
-                await self.page.close()
+                await self._close_quietly(self.page)
             if self.context:
-                await self.context.close()
+                await self._close_quietly(self.context)
             if self.browser:
                 await self.browser.close()
             if self.playwright:
@@ -91,51 +404,296 @@ class FlashscoreScraper:
             logger.info("Playwright browser closed")
         except Exception as e:
             logger.error(f"Error closing browser: {e}")
+        finally:
+            self.playwright = self.browser = self.context = self.page = None
+    
+    @property
+    def streaming(self) -> bool:
+        """True when scrape_matches() itself waits for changes (observe mode)"""
+        return self.mode == "observe"
     
-    async def scrape_matches(self) -> List[Dict[str, Any]]:
-        """Scrape all matches from Flashscore homepage"""
+    async def scrape_matches(self) -> List[Match]:
+        """Scrape all matches, recovering the browser and retrying once on failure"""
+        # Observe mode legitimately waits up to OBSERVE_RESYNC for changes
+        timeout = SCRAPE_TIMEOUT + (OBSERVE_RESYNC if self.mode == "observe" else 0)
+        
+        for attempt in range(2):
+            try:
+                matches = await asyncio.wait_for(self._scrape_once(), timeout)
+            except Exception as e:
+                logger.error(f"Scrape error: {str(e) or type(e).__name__}")
+                await self.recover()
+                continue
+            
+            if matches:
+                self._failures = 0
+                await self.check_health()
+            return matches
+        
+        return []
+    
+    async def _scrape_once(self) -> List[Match]:
+        if self.mode == "observe":
+            return await self.scrape_observed()
+        
+        if self.mode == "feed":
+            matches = await self.scrape_feed()
+            if matches:
+                return matches
+            logger.warning("Feed unavailable, falling back to DOM scraping")
+            metrics.FALLBACKS.labels("feed_to_dom").inc()
+        
+        return await self.scrape_page()
+    
+    async def scrape_page(self) -> List[Match]:
+        """Load the Flashscore homepage and parse every match row"""
         matches = []
         
+        if not self.page:
+            await self.initialize()
+        
+        page = self.page
+        self.interceptor.begin(page)
         try:
-            if not self.page:
-                await self.initialize()
-            
             # Navigate to Flashscore
             logger.info("Loading Flashscore...")
-            await self.page.goto(FLASHSCORE_MATCHES, wait_until="domcontentloaded", timeout=30000)
-            
-            # Wait for match content to load
-            try:
-                await self.page.wait_for_selector(".event__match", timeout=15000)
-            except:
-                logger.warning("Timeout waiting for matches, trying alternative selector")
-                try:
-                    await self.page.wait_for_selector("[class*='event']", timeout=10000)
-                except:
-                    logger.error("No matches found on page")
-                    return matches
+            with metrics.phase("goto"):
+                await page.goto(FLASHSCORE_MATCHES, wait_until="domcontentloaded", timeout=30000)
             
-            # Small delay to let JS finish
-            await asyncio.sleep(2)
+            if not await self.wait_until_ready(page):
+                logger.error("No matches found on page")
+                return matches
             
             # Get page HTML
+            with metrics.phase("content"):
+                html = await page.content()
+        finally:
+            self.interceptor.end(page)
+        matches = await self.parse(html)
+        
+        logger.info(f"Scraped {len(matches)} matches")
+        
+        return matches
+    
+    async def wait_until_ready(self, page: Page) -> bool:
+        """Wait until the match list has rendered and stopped changing
+        
+        Returns as soon as the rows hold still instead of after a fixed
+        delay. False if no event markup showed up at all.
+        """
+        start = time.monotonic()
+        with metrics.phase("wait_for_selector"):
+            try:
+                await page.wait_for_selector(MATCH_ROW_SELECTOR, state="attached", timeout=READY_TIMEOUT * 1000)
+                selector = MATCH_ROW_SELECTOR
+            except Exception:
+                # Check once instead of waiting again on a broader selector
+                if await page.query_selector(EVENT_MARKUP_SELECTOR) is None:
+                    return False
+                logger.warning("No match rows, parsing alternative event markup")
+                metrics.FALLBACKS.labels("wait_selector").inc()
+                selector = EVENT_MARKUP_SELECTOR
+        rows_at = time.monotonic()
+        
+        with metrics.phase("settle"):
+            result = await page.evaluate(
+                READY_SCRIPT, [selector, READY_POLL_MS, READY_QUIET_MS, READY_SETTLE_MAX * 1000]
+            )
+        if not result["stable"]:
+            # A busy live page may never hold still; parse what is there
+            metrics.FALLBACKS.labels("settle_timeout").inc()
+        
+        logger.info(
+            f"Page ready: first rows after {rows_at - start:.2f}s, {result['rows']} rows "
+            f"{'settled' if result['stable'] else 'still changing'} after {time.monotonic() - rows_at:.2f}s"
+        )
+        return True
+    
+    async def scrape_observed(self) -> List[Match]:
+        """Return matches whose rows changed on the open page
+        
+        The page is loaded once and a MutationObserver streams changed rows
+        back, so this usually returns within a second of a goal. When the
+        page is quiet for OBSERVE_RESYNC seconds the whole open page is
+        re-parsed (without reloading) to correct any drift, and every
+        OBSERVE_RELOAD seconds it is reloaded from scratch.
+        """
+        now = time.monotonic()
+        if self._observed_page is None or self._observed_page is not self.page \
+                or now - self._last_reload > OBSERVE_RELOAD:
+            matches = await self.scrape_page()
+            if matches:
+                await self._install_observer()
+                self._last_reload = self._last_resync = time.monotonic()
+            return matches
+        
+        timeout = max(0.0, self._last_resync + OBSERVE_RESYNC - now)
+        try:
+            await asyncio.wait_for(self._rows_ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        
+        rows, self._pending_rows = self._pending_rows, []
+        self._rows_ready.clear()
+        if rows:
+            return await self._run_parser(parse_matches_fast, "".join(rows))
+        
+        return await self._resync()
+    
+    async def _install_observer(self):
+        """Expose the row callback and start observing the loaded page"""
+        if self._observed_page is not self.page:
+            await self.page.expose_binding(OBSERVER_BINDING, self._on_rows)
+            self._observed_page = self.page
+        self._pending_rows = []
+        self._rows_ready.clear()
+        await self.page.evaluate(OBSERVER_SCRIPT, [OBSERVER_BINDING, OBSERVE_DEBOUNCE_MS])
+        logger.info("Observing Flashscore page for live changes")
+    
+    def _on_rows(self, source, rows: List[str]):
+        self._pending_rows.extend(rows)
+        self._rows_ready.set()
+    
+    async def _resync(self) -> List[Match]:
+        """Re-parse the open page and make sure the observer is still attached"""
+        try:
+            if not await self.page.evaluate("() => Boolean(window.__liveGoalObserver)"):
+                # The site navigated or reloaded itself
+                await self._install_observer()
             html = await self.page.content()
-            matches = self._parse_matches(html)
-            
-            logger.info(f"Scraped {len(matches)} matches")
-            
+            matches = await self.parse(html)
+            self._last_resync = time.monotonic()
+            logger.info(f"Resynced {len(matches)} matches from open page")
+            return matches
         except Exception as e:
-            logger.error(f"Scrape error: {e}")
-            # Try to recover
+            logger.error(f"Resync error: {e}")
+            # Forces a full reload on the next cycle
+            self._observed_page = None
+            return []
+    
+    def next_target_delay(self) -> Optional[float]:
+        """Seconds until the next extra target is due, None without targets"""
+        if not self.targets:
+            return None
+        due = min(self._target_due.get(target.name, 0.0) for target in self.targets)
+        return max(0.0, due - time.monotonic())
+    
+    async def scrape_due_targets(self) -> List[Match]:
+        """Scrape every extra target whose cadence has elapsed, concurrently"""
+        now = time.monotonic()
+        due = [target for target in self.targets if self._target_due.get(target.name, 0.0) <= now]
+        if not due:
+            return []
+        
+        for target in due:
+            self._target_due[target.name] = now + target.cadence
+        
+        results = await asyncio.gather(*(self.scrape_target(target) for target in due))
+        return [match for matches in results for match in matches]
+    
+    async def scrape_target(self, target: ScrapeTarget) -> List[Match]:
+        """Load one target in a pooled tab and parse it into its key space"""
+        async with self._target_slots:
+            if not self.context:
+                # The browser belongs to scraper_loop; try again once it is up
+                logger.debug(f"Browser not running, skipping target {target.name}")
+                return []
+            page = self._idle_pages.pop() if self._idle_pages else await self.context.new_page()
+            
+            self.interceptor.begin(page)
             try:
-                await self.close()
-                await self.initialize()
-            except:
-                pass
+                await page.goto(target.url, wait_until="domcontentloaded", timeout=30000)
+                for _ in range(abs(target.day_offset)):
+                    await self.change_day(page, forward=target.day_offset > 0)
+                if not await self.wait_until_ready(page):
+                    raise RuntimeError("no match rows")
+                html = await page.content()
+            except Exception as e:
+                logger.warning(f"Target {target.name} scrape error: {e}")
+                # The tab may be stuck mid-navigation; don't hand it out again
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+                return []
+            finally:
+                self.interceptor.end(page)
+            
+            self._idle_pages.append(page)
         
+        matches = apply_target(await self.parse(html), target)
+        logger.info(f"Scraped {len(matches)} matches from {target.name}")
+        return matches
+    
+    async def change_day(self, page: Page, forward: bool):
+        """Click to the next or previous day and wait until its rows replace the current ones"""
+        try:
+            await page.wait_for_selector(MATCH_ROW_SELECTOR, state="attached", timeout=READY_TIMEOUT * 1000)
+            first_id = await page.evaluate(FIRST_ROW_SCRIPT, MATCH_ROW_SELECTOR)
+        except Exception:
+            # A day without matches; wait_until_ready waits for the new rows
+            first_id = None
+        
+        await page.click(CALENDAR_NEXT if forward else CALENDAR_PREV, timeout=10000)
+        if first_id:
+            await page.wait_for_function(
+                DAY_CHANGED_SCRIPT, arg=[MATCH_ROW_SELECTOR, first_id], timeout=READY_TIMEOUT * 1000
+            )
+    
+    async def scrape_feed(self) -> List[Match]:
+        """Fetch and parse the data feed, empty if it can't be obtained"""
+        try:
+            if not self.page and not self.feed.replaying:
+                await self.initialize()
+            
+            with metrics.phase("feed_fetch"):
+                text = await self.feed.fetch(self.context)
+            if not text:
+                return []
+            
+            with metrics.phase("feed_parse"):
+                matches = await self._run_parser(parse_feed, text)
+            logger.info(f"Scraped {len(matches)} matches from feed")
+            return matches
+            
+        except Exception as e:
+            logger.warning(f"Feed scrape error: {e}")
+            return []
+    
+    async def parse(self, html: str) -> List[Match]:
+        """Parse page HTML in the parse pool so the event loop stays responsive"""
+        with metrics.phase("parse"):
+            # Counted in the worker and returned, as process pools can't touch our metrics
+            matches, fallbacks = await self._run_parser(parse_html_counted, html)
+        if fallbacks.pop(BS4_FALLBACK, 0):
+            metrics.FALLBACKS.labels("bs4_parser").inc()
+        metrics.record_selector_fallbacks(fallbacks)
         return matches
     
-    def _parse_matches(self, html: str) -> List[Dict[str, Any]]:
+    async def _run_parser(self, parser, text: str) -> List[Match]:
+        if self.parse_pool is None:
+            return parser(text)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_pool, parser, text)
+    
+    @staticmethod
+    def _parse_matches(html: str, fallbacks: Optional[Dict[str, int]] = None) -> List[Match]:
+        """Parse matches with the fast lxml parser, falling back to BeautifulSoup"""
+        try:
+            matches = parse_matches_fast(html, fallbacks)
+            if matches or "event__match" not in html:
+                return matches
+            logger.warning("Fast parser found no matches, falling back to BeautifulSoup")
+        except Exception as e:
+            logger.warning(f"Fast parser failed, falling back to BeautifulSoup: {e}")
+        
+        if fallbacks is not None:
+            fallbacks[BS4_FALLBACK] += 1
+        return FlashscoreScraper._parse_matches_bs4(html)
+    
+    @staticmethod
+    def _parse_matches_bs4(html: str) -> List[Match]:
         """Parse matches from HTML using BeautifulSoup"""
         matches = []
         soup = BeautifulSoup(html, "lxml")
@@ -153,7 +711,7 @@ class FlashscoreScraper:
                 
                 # Check if this is a league header
                 if "event__header" in class_str:
-                    league_info = self._parse_league_header(event)
+                    league_info = FlashscoreScraper._parse_league_header(event)
                     if league_info:
                         current_league = league_info.get("name")
                         current_country = league_info.get("country")
@@ -161,7 +719,7 @@ class FlashscoreScraper:
                 
                 # Check if this is a match
                 if "event__match" in class_str:
-                    match = self._parse_match(event, current_league, current_country)
+                    match = FlashscoreScraper._parse_match(event, current_league, current_country)
                     if match:
                         matches.append(match)
                         
@@ -171,7 +729,8 @@ class FlashscoreScraper:
         
         return matches
     
-    def _parse_league_header(self, element) -> Optional[Dict[str, str]]:
+    @staticmethod
+    def _parse_league_header(element) -> Optional[Dict[str, str]]:
         """Parse league header to extract league name and country"""
         try:
             # Try multiple selectors for league name
@@ -208,29 +767,27 @@ class FlashscoreScraper:
         
         return None
     
-    def _parse_match(self, element, league: str, country: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_match(element, league: str, country: str) -> Optional[Match]:
         """Parse single match element"""
         try:
-            # Get match ID from element
+            # Get match ID from element (build_match derives one if missing)
             match_id = element.get("id", "")
             if not match_id:
                 # Try data attribute
                 match_id = element.get("data-id", "")
-            if not match_id:
-                # Generate from content hash
-                match_id = f"match_{hash(str(element))}"
             
             # Clean match ID
-            match_id = match_id.replace("g_1_", "").replace("g_2_", "")
+            match_id = native_match_id(match_id)
             
             # Parse teams
-            home_team = self._get_text_safe(element, [
+            home_team = FlashscoreScraper._get_text_safe(element, [
                 ".event__participant--home",
                 "[class*='participant--home']",
                 ".event__homeParticipant"
             ])
             
-            away_team = self._get_text_safe(element, [
+            away_team = FlashscoreScraper._get_text_safe(element, [
                 ".event__participant--away", 
                 "[class*='participant--away']",
                 ".event__awayParticipant"
@@ -240,48 +797,40 @@ class FlashscoreScraper:
                 return None
             
             # Parse scores
-            home_score = self._get_score(element, "home")
-            away_score = self._get_score(element, "away")
+            home_score = FlashscoreScraper._get_score(element, "home")
+            away_score = FlashscoreScraper._get_score(element, "away")
             
             # Parse status and minute
-            status, minute = self._parse_status(element)
+            status, minute = FlashscoreScraper._parse_status(element)
             
             # Parse time
-            start_time = self._parse_time(element)
+            start_time = FlashscoreScraper._parse_time(element)
             
             # Get team logos (if available)
-            home_logo = self._get_logo(element, "home")
-            away_logo = self._get_logo(element, "away")
-            
-            return {
-                "id": match_id,
-                "homeTeam": {
-                    "id": f"team_{hash(home_team)}",
-                    "name": home_team,
-                    "shortName": home_team[:3].upper() if home_team else "???",
-                    "logo": home_logo or f"https://www.flashscore.com/res/image/empty-logo-team-share.gif"
-                },
-                "awayTeam": {
-                    "id": f"team_{hash(away_team)}",
-                    "name": away_team,
-                    "shortName": away_team[:3].upper() if away_team else "???",
-                    "logo": away_logo or f"https://www.flashscore.com/res/image/empty-logo-team-share.gif"
-                },
-                "homeScore": home_score,
-                "awayScore": away_score,
-                "status": status,
-                "minute": minute,
-                "startTime": start_time,
-                "leagueId": f"league_{hash(league or 'unknown')}",
-                "leagueName": league or "Unknown League",
-                "country": country or ""
-            }
+            home_logo = FlashscoreScraper._get_logo(element, "home")
+            away_logo = FlashscoreScraper._get_logo(element, "away")
+            
+            return build_match(
+                match_id,
+                home_team,
+                away_team,
+                home_score,
+                away_score,
+                status,
+                minute,
+                start_time,
+                home_logo,
+                away_logo,
+                league,
+                country,
+            )
             
         except Exception as e:
             logger.debug(f"Error parsing match: {e}")
             return None
     
-    def _get_text_safe(self, element, selectors: List[str]) -> Optional[str]:
+    @staticmethod
+    def _get_text_safe(element, selectors: List[str]) -> Optional[str]:
         """Try multiple selectors to get text content"""
         for selector in selectors:
             try:
@@ -294,7 +843,8 @@ class FlashscoreScraper:
                 continue
         return None
     
-    def _get_score(self, element, team: str) -> Optional[int]:
+    @staticmethod
+    def _get_score(element, team: str) -> Optional[int]:
         """Parse score for home or away team"""
         selectors = [
             f".event__score--{team}",
@@ -313,56 +863,25 @@ class FlashscoreScraper:
         
         return None
     
-    def _parse_status(self, element) -> tuple:
+    @staticmethod
+    def _parse_status(element) -> tuple:
         """Parse match status and minute"""
-        status = "SCHEDULED"
-        minute = None
-        
         try:
             # Check for live indicator
             stage_elem = element.select_one(".event__stage--block")
             if not stage_elem:
                 stage_elem = element.select_one("[class*='stage']")
             
-            if stage_elem:
-                stage_text = stage_elem.get_text(strip=True).upper()
-                
-                if "LIVE" in stage_text or stage_text.isdigit() or "'" in stage_text:
-                    status = "LIVE"
-                    # Extract minute
-                    minute_match = re.search(r"(\d+)", stage_text)
-                    if minute_match:
-                        minute = int(minute_match.group(1))
-                        
-                elif "HT" in stage_text or "HALF" in stage_text:
-                    status = "HT"
-                    minute = 45
-                    
-                elif "FT" in stage_text or "FINISHED" in stage_text or "AET" in stage_text:
-                    status = "FT"
-                    
-                elif "POSTP" in stage_text:
-                    status = "POSTPONED"
-                    
-                elif "CANC" in stage_text:
-                    status = "CANCELLED"
+            stage_text = stage_elem.get_text(strip=True) if stage_elem else None
+            return classify_stage(stage_text, " ".join(element.get("class", [])))
             
-            # Also check for finished class
-            classes = " ".join(element.get("class", []))
-            if "event--finished" in classes or "finished" in classes.lower():
-                status = "FT"
-                
-            # Check for live class
-            if "event--live" in classes or "live" in classes.lower():
-                if status == "SCHEDULED":
-                    status = "LIVE"
-                    
         except Exception as e:
             logger.debug(f"Error parsing status: {e}")
         
-        return status, minute
+        return "SCHEDULED", None
     
-    def _parse_time(self, element) -> str:
+    @staticmethod
+    def _parse_time(element) -> Optional[str]:
         """Parse match start time"""
         try:
             time_elem = element.select_one(".event__time")
@@ -370,19 +889,14 @@ class FlashscoreScraper:
                 time_elem = element.select_one("[class*='time']")
             
             if time_elem:
-                time_text = time_elem.get_text(strip=True)
-                # Parse HH:MM format
-                time_match = re.search(r"(\d{1,2}):(\d{2})", time_text)
-                if time_match:
-                    hour, minute = int(time_match.group(1)), int(time_match.group(2))
-                    now = datetime.now(timezone.utc)
-                    return now.replace(hour=hour, minute=minute, second=0, microsecond=0).isoformat()
+                return kickoff_from_text(time_elem.get_text(strip=True))
         except:
             pass
         
-        return datetime.now(timezone.utc).isoformat()
+        return None
     
-    def _get_logo(self, element, team: str) -> Optional[str]:
+    @staticmethod
+    def _get_logo(element, team: str) -> Optional[str]:
         """Get team logo URL"""
         try:
             selectors = [
@@ -396,11 +910,7 @@ class FlashscoreScraper:
                 if img:
                     src = img.get("src") or img.get("data-src")
                     if src:
-                        if src.startswith("//"):
-                            return f"https:{src}"
-                        elif src.startswith("/"):
-                            return urljoin(FLASHSCORE_BASE, src)
-                        return src
+                        return absolute_logo(src)
         except:
             pass
         
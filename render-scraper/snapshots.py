@@ -0,0 +1,128 @@
+"""
+Pre-encoded API response snapshots
+Encodes a payload once per cache generation, with compressed variants and an ETag, and shares it among identical requests
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Any, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
+
+# Bodies below this size are served uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# How long browsers and CDNs may reuse a match response, and how much longer
+# a CDN may keep serving it while it fetches the next one (seconds)
+CACHE_MAX_AGE = int(os.environ.get("CACHE_MAX_AGE", "5"))
+CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("CACHE_STALE_WHILE_REVALIDATE", "30"))
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}, stale-while-revalidate={CACHE_STALE_WHILE_REVALIDATE}"
+
+
+def encode_json(payload: Any) -> bytes:
+    """Compact JSON encoding shared by all snapshots"""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class ResponseSnapshot:
+    """Immutable encoded response body for one cache generation"""
+    
+    __slots__ = ("version", "etag", "body", "gzip", "brotli")
+    
+    def __init__(self, payload: Dict[str, Any], version: int, etag: str):
+        self.version = version
+        self.etag = etag
+        self.body = encode_json(payload)
+        self.gzip: Optional[bytes] = None
+        self.brotli: Optional[bytes] = None
+        
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            self.gzip = gzip.compress(self.body, compresslevel=6)
+            if brotli is not None:
+                self.brotli = brotli.compress(self.body, quality=5)
+    
+    def select(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Pick the best body for an Accept-Encoding header"""
+        accepted = {
+            token.split(";")[0].strip().lower()
+            for token in accept_encoding.split(",")
+        }
+        if self.brotli is not None and "br" in accepted:
+            return self.brotli, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
+    
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Check an If-None-Match header against this snapshot's ETag"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.etag in tags
+
+
+class ResponseCoalescer:
+    """Builds each distinct response once per cache generation
+    
+    Identical requests share the snapshot built for their key and version;
+    ones arriving while it is being built wait for that build instead of
+    starting their own. Entries of other versions are dropped once a new
+    version is requested; keys should include anything else that changes
+    the response, such as the cache epoch.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], asyncio.Future]" = OrderedDict()
+        self._version = 0
+        self.builds = 0
+        self.shared = 0
+    
+    async def get(self, key: str, version: int, build: Callable[[], Dict[str, Any]], etag_prefix: str) -> ResponseSnapshot:
+        """The snapshot for `key` at `version`, building it in a worker thread if needed
+        
+        The cache may move on before the build runs, so the snapshot's
+        version and ETag come from the "version" of the payload `build`
+        returns, never from the requested one.
+        """
+        entry = self._entries.get((key, version))
+        if entry is not None:
+            self.shared += 1
+            self._entries.move_to_end((key, version))
+            return await asyncio.shield(entry)
+        
+        if version != self._version:
+            self._version = version
+            for stale in [stale for stale in self._entries if stale[1] != version]:
+                del self._entries[stale]
+        
+        self.builds += 1
+        def encode() -> ResponseSnapshot:
+            payload = build()
+            built = payload["version"]
+            return ResponseSnapshot(payload, built, f'"{etag_prefix}-{built}-{zlib.crc32(key.encode("utf-8")):08x}"')
+        
+        entry = asyncio.ensure_future(asyncio.to_thread(encode))
+        self._entries[(key, version)] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        try:
+            return await asyncio.shield(entry)
+        except Exception:
+            # Let the next request try again
+            if self._entries.get((key, version)) is entry:
+                del self._entries[(key, version)]
+            raise
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "builds": self.builds, "shared": self.shared}
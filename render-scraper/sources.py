@@ -0,0 +1,580 @@
+"""
+Multi-source aggregation
+Fetches other score providers next to Flashscore, resolves their matches to one fixture and merges the freshest fields
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import httpx
+except ImportError:  # Optional: only needed when SOURCES is set
+    httpx = None
+
+import metrics
+from cache import parse_kickoff
+from fastparse import build_match
+from ids import ALIASES, normalize_name
+from models import Match
+
+logger = logging.getLogger(__name__)
+
+# Comma separated extra providers: sofascore, fotmob, thesportsdb
+SOURCES = os.environ.get("SOURCES", "")
+SOURCE_TIMEOUT = float(os.environ.get("SOURCE_TIMEOUT", "10"))
+THESPORTSDB_KEY = os.environ.get("THESPORTSDB_KEY", "3")
+# Optional directories to record fetched payloads to / replay them from, one
+# subdirectory per source (offline testing)
+SOURCE_RECORD_DIR = os.environ.get("SOURCE_RECORD_DIR")
+SOURCE_REPLAY_DIR = os.environ.get("SOURCE_REPLAY_DIR")
+
+# Matches from two sources are one fixture when their teams agree and their
+# kickoffs are this close, in seconds; teams alone decide when either has no kickoff
+RESOLVE_KICKOFF_WINDOW = 90 * 60
+# Fixtures no source has reported for this long are forgotten, in seconds
+MERGE_TTL = 12 * 3600
+# Highest first: whose IDs, names, logos and league a merged match keeps,
+# and who wins a tie between equally fresh values
+SOURCE_PRIORITY = ("flashscore", "sofascore", "fotmob", "thesportsdb")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Words that differ between providers' spellings of the same club
+_NAME_NOISE = {"fc", "cf", "afc", "sc", "ac", "fk", "sk", "cd", "ud", "sv", "bk", "club", "the"}
+_NON_WORD = re.compile(r"[^\w\s]")
+_MINUTE_RE = re.compile(r"(\d+)")
+_SQUAD_MARKER = re.compile(r"^(u\d{2}|\d+|ii|b|w|women|youth|reserves)$")
+
+
+def team_key(name: Optional[str]) -> str:
+    """Team name reduced to what providers agree on: aliases resolved, no accents, punctuation or "FC" """
+    key = normalize_name(name)
+    key = ALIASES["teams"].get(key, key)
+    key = "".join(c for c in unicodedata.normalize("NFKD", key) if not unicodedata.combining(c))
+    words = [word for word in _NON_WORD.sub(" ", key).split() if word not in _NAME_NOISE]
+    return " ".join(words) or key
+
+
+def _similar(a: str, b: str) -> bool:
+    """Same team keys, or one extends the other ("wolverhampton" / "wolverhampton wanderers")
+    
+    Youth, reserve and women's sides never count as the senior team.
+    """
+    if a == b:
+        return True
+    words_a, words_b = set(a.split()), set(b.split())
+    if any(_SQUAD_MARKER.match(word) for word in words_a ^ words_b):
+        return False
+    return words_a <= words_b or words_b <= words_a
+
+
+def _minute(text: Any) -> Optional[int]:
+    found = _MINUTE_RE.search(str(text)) if text is not None else None
+    return int(found.group(1)) if found else None
+
+
+def _score(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+
+class SourceAdapter:
+    """One score provider: which URLs to fetch and how to read them
+    
+    fetch() returns the decoded JSON bodies of one poll; with a replay
+    directory it serves recorded polls in order instead, so parse() can be
+    exercised without network access.
+    """
+    
+    name = ""
+    # Seconds between polls
+    cadence = 30.0
+    
+    def __init__(self, record_dir: Optional[str] = SOURCE_RECORD_DIR, replay_dir: Optional[str] = SOURCE_REPLAY_DIR):
+        self._record_dir = Path(record_dir) / self.name if record_dir else None
+        self._replay: List[Path] = sorted((Path(replay_dir) / self.name).glob("*.json")) if replay_dir else []
+        self._replay_index = 0
+    
+    def urls(self) -> List[str]:
+        raise NotImplementedError
+    
+    def parse(self, payloads: List[Any]) -> List[Match]:
+        raise NotImplementedError
+    
+    @property
+    def replaying(self) -> bool:
+        return bool(self._replay)
+    
+    async def fetch(self, client) -> List[Any]:
+        if self._replay:
+            path = self._replay[self._replay_index % len(self._replay)]
+            self._replay_index += 1
+            return json.loads(path.read_text(encoding="utf-8"))
+        
+        responses = await asyncio.gather(*(client.get(url) for url in self.urls()))
+        payloads = []
+        for response in responses:
+            response.raise_for_status()
+            payloads.append(response.json())
+        
+        if self._record_dir:
+            self._record_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            (self._record_dir / f"{self.name}_{stamp}.json").write_text(json.dumps(payloads), encoding="utf-8")
+        return payloads
+
+
+class SofascoreSource(SourceAdapter):
+    """Sofascore's JSON API: the day's schedule plus the live list, which updates sooner"""
+    
+    name = "sofascore"
+    cadence = 15.0
+    API = "https://api.sofascore.com/api/v1"
+    # status.code values for the halves and the break
+    FIRST_HALF, SECOND_HALF, HALFTIME = 6, 7, 31
+    
+    def urls(self) -> List[str]:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return [
+            f"{self.API}/sport/football/scheduled-events/{today}",
+            f"{self.API}/sport/football/events/live",
+        ]
+    
+    def parse(self, payloads: List[Any]) -> List[Match]:
+        # Later payloads (live) replace the schedule's copy of an event
+        events = {}
+        for payload in payloads:
+            for event in payload.get("events") or []:
+                events[event.get("id")] = event
+        
+        matches = []
+        for event in events.values():
+            try:
+                matches.append(self._parse_event(event))
+            except Exception as e:
+                logger.debug(f"Skipped {self.name} event: {e}")
+        return matches
+    
+    def _parse_event(self, event: Dict[str, Any]) -> Match:
+        status_info = event.get("status") or {}
+        kind, code = status_info.get("type"), status_info.get("code")
+        minute = None
+        if kind == "inprogress":
+            status = "HT" if code == self.HALFTIME else "LIVE"
+            minute = 45 if status == "HT" else self._running_minute(event, code)
+        else:
+            status = {"finished": "FT", "postponed": "POSTPONED", "canceled": "CANCELLED"}.get(kind, "SCHEDULED")
+        
+        tournament = event.get("tournament") or {}
+        home, away = event["homeTeam"], event["awayTeam"]
+        return build_match(
+            f"{self.name}:{event['id']}",
+            home["name"],
+            away["name"],
+            _score((event.get("homeScore") or {}).get("current")),
+            _score((event.get("awayScore") or {}).get("current")),
+            status,
+            minute,
+            _iso(event.get("startTimestamp")),
+            f"{self.API}/team/{home['id']}/image" if home.get("id") else None,
+            f"{self.API}/team/{away['id']}/image" if away.get("id") else None,
+            tournament.get("name"),
+            (tournament.get("category") or {}).get("name"),
+        )
+    
+    def _running_minute(self, event: Dict[str, Any], code: Optional[int]) -> Optional[int]:
+        started = (event.get("time") or {}).get("currentPeriodStartTimestamp")
+        if not started:
+            return None
+        elapsed = int((time.time() - started) // 60) + 1
+        if code == self.SECOND_HALF:
+            return max(46, min(45 + elapsed, 90))
+        return max(1, min(elapsed, 45))
+
+
+class FotmobSource(SourceAdapter):
+    """FotMob's matches-by-date API, grouped by league"""
+    
+    name = "fotmob"
+    cadence = 20.0
+    
+    def urls(self) -> List[str]:
+        return [f"https://www.fotmob.com/api/matches?date={datetime.now(timezone.utc).strftime('%Y%m%d')}"]
+    
+    def parse(self, payloads: List[Any]) -> List[Match]:
+        matches = []
+        for payload in payloads:
+            for league in payload.get("leagues") or []:
+                for match in league.get("matches") or []:
+                    try:
+                        matches.append(self._parse_match(match, league))
+                    except Exception as e:
+                        logger.debug(f"Skipped {self.name} match: {e}")
+        return matches
+    
+    def _parse_match(self, match: Dict[str, Any], league: Dict[str, Any]) -> Match:
+        status_info = match.get("status") or {}
+        reason = ((status_info.get("reason") or {}).get("short") or "").upper()
+        minute = None
+        if status_info.get("cancelled"):
+            status = "POSTPONED" if "PP" in reason or "POSTP" in reason else "CANCELLED"
+        elif status_info.get("finished"):
+            status = "FT"
+        elif status_info.get("started"):
+            status = "HT" if reason == "HT" else "LIVE"
+            minute = 45 if status == "HT" else _minute((status_info.get("liveTime") or {}).get("short"))
+        else:
+            status = "SCHEDULED"
+        
+        home, away = match["home"], match["away"]
+        started = status not in ("SCHEDULED", "POSTPONED", "CANCELLED")
+        return build_match(
+            f"{self.name}:{match['id']}",
+            home["name"],
+            away["name"],
+            _score(home.get("score")) if started else None,
+            _score(away.get("score")) if started else None,
+            status,
+            minute,
+            _iso(parse_kickoff(status_info.get("utcTime"))),
+            f"https://images.fotmob.com/image_resources/logo/teamlogo/{home['id']}_small.png" if home.get("id") else None,
+            f"https://images.fotmob.com/image_resources/logo/teamlogo/{away['id']}_small.png" if away.get("id") else None,
+            league.get("name"),
+            league.get("ccode"),
+        )
+
+
+class TheSportsDBSource(SourceAdapter):
+    """TheSportsDB's events-by-day API; slow to update, mostly fills gaps"""
+    
+    name = "thesportsdb"
+    cadence = 120.0
+    
+    STATUSES = {
+        "NS": "SCHEDULED", "NOT STARTED": "SCHEDULED", "TBD": "SCHEDULED",
+        "HT": "HT", "HALFTIME": "HT",
+        "1H": "LIVE", "2H": "LIVE", "ET": "LIVE", "LIVE": "LIVE",
+        "FT": "FT", "AET": "FT", "PEN": "FT", "MATCH FINISHED": "FT",
+        "PST": "POSTPONED", "POSTPONED": "POSTPONED",
+        "CANC": "CANCELLED", "CANCELLED": "CANCELLED",
+    }
+    
+    def urls(self) -> List[str]:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return [f"https://www.thesportsdb.com/api/v1/json/{THESPORTSDB_KEY}/eventsday.php?d={today}&s=Soccer"]
+    
+    def parse(self, payloads: List[Any]) -> List[Match]:
+        matches = []
+        for payload in payloads:
+            for event in payload.get("events") or []:
+                try:
+                    matches.append(self._parse_event(event))
+                except Exception as e:
+                    logger.debug(f"Skipped {self.name} event: {e}")
+        return matches
+    
+    def _parse_event(self, event: Dict[str, Any]) -> Match:
+        status = self.STATUSES.get((event.get("strStatus") or "NS").upper(), "SCHEDULED")
+        minute = _minute(event.get("strProgress")) if status == "LIVE" else (45 if status == "HT" else None)
+        kickoff = parse_kickoff(event.get("strTimestamp"))
+        if kickoff is None and event.get("dateEvent"):
+            kickoff = parse_kickoff(f"{event['dateEvent']}T{event.get('strTime') or '00:00:00'}")
+        
+        return build_match(
+            f"{self.name}:{event['idEvent']}",
+            event["strHomeTeam"],
+            event["strAwayTeam"],
+            _score(event.get("intHomeScore")),
+            _score(event.get("intAwayScore")),
+            status,
+            minute,
+            _iso(kickoff),
+            event.get("strHomeTeamBadge"),
+            event.get("strAwayTeamBadge"),
+            event.get("strLeague"),
+            event.get("strCountry"),
+        )
+
+
+ADAPTERS = {adapter.name: adapter for adapter in (SofascoreSource, FotmobSource, TheSportsDBSource)}
+
+
+def create_sources(spec: str = SOURCES) -> List[SourceAdapter]:
+    """Adapters named in a SOURCES value"""
+    sources = []
+    for name in (part.strip().lower() for part in spec.split(",")):
+        if not name:
+            continue
+        if name not in ADAPTERS:
+            logger.warning(f"Ignoring unknown source {name!r}")
+            continue
+        sources.append(ADAPTERS[name]())
+    return sources
+
+
+class Observation(NamedTuple):
+    """A source's latest value for one field group and when that source last changed it"""
+    value: Any
+    changed_at: float
+    rank: int
+
+
+class Fixture:
+    """One real match as seen by every source that reported it"""
+    
+    __slots__ = ("id", "base", "base_rank", "kickoff", "home_key", "away_key", "reported", "minutes", "seen_at")
+    
+    def __init__(self, match: Match, rank: int):
+        self.id = match.id
+        self.base = match
+        self.base_rank = rank
+        self.kickoff = parse_kickoff(match.start_time)
+        self.home_key = team_key(match.home.name)
+        self.away_key = team_key(match.away.name)
+        # Keyed by (source, "score" | "status")
+        self.reported: Dict[Tuple[str, str], Observation] = {}
+        self.minutes: Dict[str, Optional[int]] = {}
+        self.seen_at = 0.0
+    
+    @property
+    def sources(self) -> Set[str]:
+        return {source for source, _ in self.reported} | set(self.minutes)
+    
+    def observe(self, source: str, match: Match, rank: int, now: float):
+        """Record a source's report
+        
+        A value counts as fresh from the moment its source changed it. A
+        source's first report gets time 0, so a provider that joins late
+        with an outdated score cannot override one that has already seen
+        the goal.
+        """
+        if rank <= self.base_rank:
+            self.base, self.base_rank = match, rank
+        if self.kickoff is None:
+            # Flashscore rows of matches already under way show no kickoff
+            self.kickoff = parse_kickoff(match.start_time)
+        
+        groups = [("status", match.status)]
+        if match.home_score is not None or match.away_score is not None:
+            groups.append(("score", (match.home_score, match.away_score)))
+        for group, value in groups:
+            previous = self.reported.get((source, group))
+            if previous is not None and previous.value == value:
+                continue
+            self.reported[(source, group)] = Observation(value, now if previous is not None else 0.0, rank)
+        
+        self.minutes[source] = match.minute
+        self.seen_at = now
+    
+    def _freshest(self, group: str) -> Optional[Tuple[str, Observation]]:
+        candidates = [(source, seen) for (source, name), seen in self.reported.items() if name == group]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda item: (item[1].changed_at, -item[1].rank))
+    
+    def merged(self) -> Match:
+        match = self.base._replace(id=self.id)
+        if match.start_time is None and self.kickoff is not None:
+            match = match._replace(start_time=datetime.fromtimestamp(self.kickoff, timezone.utc).isoformat())
+        status = self._freshest("status")
+        if status is not None:
+            # The minute comes with the status it belongs to
+            match = match._replace(status=status[1].value, minute=self.minutes.get(status[0]))
+        score = self._freshest("score")
+        if score is not None:
+            match = match._replace(home_score=score[1].value[0], away_score=score[1].value[1])
+        return match
+
+
+class Aggregator:
+    """Resolves every source's matches to fixtures and merges them
+    
+    Each fixture keeps the identity (ID, names, logos, league) of the
+    highest-priority source that reported it, so Flashscore IDs stay stable;
+    scores and status come from whichever source changed them last. A
+    fixture first reported by a provider takes the Flashscore ID once
+    Flashscore lists it, and pop_replaced() hands out the ID it gave up.
+    """
+    
+    def __init__(self, sources: List[SourceAdapter]):
+        self.sources = sources
+        self._fixtures: Dict[str, Fixture] = {}
+        # (source, source's match ID) -> fixture
+        self._links: Dict[Tuple[str, str], Fixture] = {}
+        # Team key -> fixture IDs, for resolving unlinked matches
+        self._by_team: Dict[str, Set[str]] = {}
+        # Fixture IDs given up for a higher-priority source's ID
+        self._replaced: List[str] = []
+        self._last_prune = 0.0
+        self.stats: Dict[str, Dict[str, Any]] = {
+            source.name: {"matches": 0, "linked": 0, "failures": 0, "last_success": None} for source in sources
+        }
+    
+    def seed(self, matches: List[Match]):
+        """Start from matches already in the cache, e.g. restored from disk"""
+        for match in matches:
+            prefix = match.id.split(":", 1)[0]
+            self.merge(prefix if prefix in SOURCE_PRIORITY else "flashscore", [match])
+    
+    def merge(self, source: str, matches: List[Match]) -> List[Match]:
+        """Take one source's scrape and return the merged fixtures it touched"""
+        now = time.time()
+        rank = SOURCE_PRIORITY.index(source) if source in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+        touched: Dict[str, Fixture] = {}
+        linked = 0
+        
+        for match in matches:
+            fixture = self._resolve(source, match, rank)
+            fixture.observe(source, match, rank, now)
+            if fixture.base.id != fixture.id:
+                self._adopt_id(fixture)
+            touched[fixture.id] = fixture
+            if fixture.id != match.id:
+                linked += 1
+        
+        if source in self.stats:
+            self.stats[source]["matches"] = len(matches)
+            self.stats[source]["linked"] = linked
+        if now - self._last_prune > 600:
+            self._prune(now)
+        return [fixture.merged() for fixture in touched.values()]
+    
+    def pop_replaced(self) -> List[str]:
+        """IDs of fixtures re-keyed since the last call, to remove from the cache"""
+        replaced, self._replaced = self._replaced, []
+        return replaced
+    
+    def _resolve(self, source: str, match: Match, rank: int) -> Fixture:
+        fixture = self._links.get((source, match.id))
+        if fixture is not None:
+            return fixture
+        
+        fixture = self._fixtures.get(match.id) or self._find(source, match)
+        if fixture is None:
+            fixture = Fixture(match, rank)
+            self._fixtures[fixture.id] = fixture
+            for key in (fixture.home_key, fixture.away_key):
+                self._by_team.setdefault(key, set()).add(fixture.id)
+        
+        self._links[(source, match.id)] = fixture
+        return fixture
+    
+    def _adopt_id(self, fixture: Fixture):
+        """Re-key a fixture under the ID of its new highest-priority source"""
+        old_id = fixture.id
+        fixture.id = fixture.base.id
+        del self._fixtures[old_id]
+        self._fixtures[fixture.id] = fixture
+        for key in (fixture.home_key, fixture.away_key):
+            ids = self._by_team[key]
+            ids.discard(old_id)
+            ids.add(fixture.id)
+        self._replaced.append(old_id)
+    
+    def _find(self, source: str, match: Match) -> Optional[Fixture]:
+        """The closest-kickoff fixture with the same teams that this source hasn't reported yet
+        
+        A fixture or match without a kickoff can't be placed in time, so it
+        matches on teams alone, after any fixture within the kickoff window.
+        """
+        kickoff = parse_kickoff(match.start_time)
+        home, away = team_key(match.home.name), team_key(match.away.name)
+        best, best_gap = None, None
+        
+        for fixture_id in self._by_team.get(home, set()) | self._by_team.get(away, set()):
+            fixture = self._fixtures.get(fixture_id)
+            if fixture is None or source in fixture.sources:
+                continue
+            # One side may be spelled differently; the other must match exactly
+            if not ((fixture.home_key == home and _similar(fixture.away_key, away))
+                    or (fixture.away_key == away and _similar(fixture.home_key, home))):
+                continue
+            if kickoff is None or fixture.kickoff is None:
+                gap = RESOLVE_KICKOFF_WINDOW + 1
+            else:
+                gap = abs(fixture.kickoff - kickoff)
+                if gap > RESOLVE_KICKOFF_WINDOW:
+                    continue
+            if best_gap is None or gap < best_gap:
+                best, best_gap = fixture, gap
+        return best
+    
+    def _prune(self, now: float):
+        self._last_prune = now
+        expired = {fixture_id for fixture_id, fixture in self._fixtures.items() if now - fixture.seen_at > MERGE_TTL}
+        if not expired:
+            return
+        for fixture_id in expired:
+            del self._fixtures[fixture_id]
+        self._links = {link: fixture for link, fixture in self._links.items() if fixture.id not in expired}
+        for key in list(self._by_team):
+            self._by_team[key] -= expired
+            if not self._by_team[key]:
+                del self._by_team[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "fixtures": len(self._fixtures),
+            "sources": {
+                name: {
+                    **stats,
+                    "last_success": round(now - stats["last_success"], 1) if stats["last_success"] else None,
+                }
+                for name, stats in self.stats.items()
+            },
+        }
+    
+    async def poll(self, source: SourceAdapter, store: Callable[[List[Match]], Awaitable[Any]]):
+        """Fetch one source on its cadence forever, handing its matches to `store`
+        
+        `store` is expected to merge() them and save the result. Every
+        source runs in its own task, so a slow or blocked provider only
+        delays itself.
+        """
+        if httpx is None and not source.replaying:
+            logger.error(f"Source {source.name} needs the httpx package")
+            return
+        
+        stats = self.stats[source.name]
+        client = httpx.AsyncClient(
+            timeout=SOURCE_TIMEOUT, headers={"user-agent": USER_AGENT}, follow_redirects=True
+        ) if httpx is not None else None
+        try:
+            while True:
+                try:
+                    with metrics.phase(f"source_{source.name}"):
+                        payloads = await asyncio.wait_for(source.fetch(client), SOURCE_TIMEOUT * 2)
+                        matches = await asyncio.to_thread(source.parse, payloads)
+                    await store(matches)
+                    stats["failures"] = 0
+                    stats["last_success"] = time.time()
+                    metrics.SOURCE_FETCHES.labels(source.name, "ok").inc()
+                    logger.info(f"Merged {len(matches)} matches from {source.name} ({stats['linked']} linked)")
+                    delay = source.cadence
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    stats["failures"] += 1
+                    metrics.SOURCE_FETCHES.labels(source.name, "error").inc()
+                    delay = min(source.cadence * 2 ** stats["failures"], 600)
+                    logger.warning(f"Source {source.name} failed ({str(e) or type(e).__name__}), retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+        finally:
+            if client is not None:
+                await client.aclose()
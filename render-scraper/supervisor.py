@@ -0,0 +1,112 @@
+"""
+Process supervisor
+Runs the scraper and N API worker processes that share the cache through a memory-mapped file
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+PORT = int(os.environ.get("PORT", "8000"))
+# The scraper process serves its own health endpoint here, on localhost only
+SCRAPER_PORT = int(os.environ.get("SCRAPER_PORT", str(PORT + 1)))
+API_WORKERS = int(os.environ.get("API_WORKERS", str(os.cpu_count() or 1)))
+# /dev/shm keeps the shared file in memory
+SHARED_CACHE_PATH = os.environ.get(
+    "SHARED_CACHE_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "livegoal-cache")
+)
+
+# Restart backoff for a crashing scraper process, in seconds
+RESTART_DELAY_MIN = 1
+RESTART_DELAY_MAX = 60
+# A scraper that ran this long is considered healthy again
+RESTART_RESET_AFTER = 60
+
+
+def spawn(role: str, args: List[str]) -> subprocess.Popen:
+    """Start a uvicorn process serving main:app in the given role"""
+    env = {**os.environ, "ROLE": role, "CACHE_BACKEND_URL": f"mmap://{SHARED_CACHE_PATH}"}
+    command = [sys.executable, "-m", "uvicorn", "main:app", *args]
+    logger.info(f"Starting {role} process: {' '.join(command[2:])}")
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def spawn_scraper() -> subprocess.Popen:
+    return spawn("scraper", ["--host", "127.0.0.1", "--port", str(SCRAPER_PORT)])
+
+
+def spawn_api() -> subprocess.Popen:
+    return spawn("api", ["--host", "0.0.0.0", "--port", str(PORT), "--workers", str(API_WORKERS)])
+
+
+def stop(process: Optional[subprocess.Popen], timeout: float = 10):
+    """Terminate a child, killing it if it doesn't exit in time"""
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main() -> int:
+    stopping = False
+    
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    scraper = spawn_scraper()
+    api = spawn_api()
+    started = time.monotonic()
+    delay = RESTART_DELAY_MIN
+    restart_at: Optional[float] = None
+    
+    try:
+        while not stopping:
+            time.sleep(0.5)
+            
+            if api.poll() is not None:
+                logger.error(f"API workers exited with code {api.returncode}, shutting down")
+                return api.returncode or 1
+            
+            # The API keeps serving the last published cache while the scraper restarts
+            if restart_at is None and scraper.poll() is not None:
+                if time.monotonic() - started > RESTART_RESET_AFTER:
+                    delay = RESTART_DELAY_MIN
+                logger.error(f"Scraper exited with code {scraper.returncode}, restarting in {delay}s")
+                restart_at = time.monotonic() + delay
+                delay = min(delay * 2, RESTART_DELAY_MAX)
+            
+            if restart_at is not None and time.monotonic() >= restart_at:
+                scraper = spawn_scraper()
+                started = time.monotonic()
+                restart_at = None
+        
+        logger.info("Shutting down...")
+        return 0
+    
+    finally:
+        stop(api)
+        stop(scraper)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Scrape targets for the shared browser
+Describes the extra sport, date and league pages scraped next to the football homepage
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from models import Match
+
+logger = logging.getLogger(__name__)
+
+FLASHSCORE_BASE = "https://www.flashscore.com"
+
+# Comma separated target specs, e.g. "tennis,football@+1,football/england/premier-league:120"
+SCRAPE_TARGETS = os.environ.get("SCRAPE_TARGETS", "")
+# Target pages loaded at the same time (one browser tab each)
+SCRAPE_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", "3"))
+
+# The homepage is football; its ids stay unprefixed
+DEFAULT_SPORT = "football"
+
+# Seconds between scrapes when a spec gives no cadence
+TODAY_CADENCE = 15
+OTHER_DAY_CADENCE = 300
+LEAGUE_CADENCE = 120
+
+
+class ScrapeTarget(NamedTuple):
+    """One page to scrape on its own cadence"""
+    name: str
+    url: str
+    sport: str
+    cadence: float
+    # Prefix for match, team and league ids; empty for the homepage sport
+    namespace: str
+    # Days from today shown by the page (navigated with the calendar arrows)
+    day_offset: int = 0
+
+
+def sport_url(sport: str) -> str:
+    if sport == DEFAULT_SPORT:
+        return f"{FLASHSCORE_BASE}/"
+    return f"{FLASHSCORE_BASE}/{sport}/"
+
+
+def parse_target(spec: str) -> ScrapeTarget:
+    """Build a target from "<sport>[@<+/-days>|/<country>/<league>][:<seconds>]" """
+    spec = spec.strip()
+    path, _, cadence = spec.partition(":")
+    day_offset = 0
+    
+    if "/" in path:
+        sport = path.split("/", 1)[0]
+        url = f"{FLASHSCORE_BASE}/{path.strip('/')}/"
+        default_cadence = LEAGUE_CADENCE
+    else:
+        sport, _, days = path.partition("@")
+        day_offset = int(days) if days else 0
+        url = sport_url(sport)
+        default_cadence = TODAY_CADENCE if day_offset == 0 else OTHER_DAY_CADENCE
+    
+    if not sport:
+        raise ValueError(f"Invalid scrape target: {spec!r}")
+    
+    return ScrapeTarget(
+        name=path,
+        url=url,
+        sport=sport,
+        cadence=float(cadence or default_cadence),
+        namespace="" if sport == DEFAULT_SPORT else sport,
+        day_offset=day_offset,
+    )
+
+
+def parse_targets(specs: str = SCRAPE_TARGETS) -> List[ScrapeTarget]:
+    """Parse SCRAPE_TARGETS, skipping invalid entries and the homepage itself"""
+    targets = []
+    seen = {DEFAULT_SPORT}
+    
+    for spec in specs.split(","):
+        if not spec.strip():
+            continue
+        try:
+            target = parse_target(spec)
+        except ValueError as e:
+            logger.error(f"Ignoring scrape target {spec!r}: {e}")
+            continue
+        if target.name in seen:
+            continue
+        seen.add(target.name)
+        targets.append(target)
+    
+    return targets
+
+
+def _shift_start_time(start_time: Optional[str], days: int) -> Optional[str]:
+    if not start_time:
+        return start_time
+    try:
+        return (datetime.fromisoformat(start_time) + timedelta(days=days)).isoformat()
+    except ValueError:
+        return start_time
+
+
+def apply_target(matches: List[Match], target: ScrapeTarget) -> List[Match]:
+    """Move parsed matches into the target's key space and day"""
+    if not target.namespace and not target.day_offset:
+        return matches
+    
+    result = []
+    for match in matches:
+        if target.namespace:
+            match = match._replace(
+                id=f"{target.namespace}:{match.id}",
+                home=match.home._replace(id=f"{target.namespace}:{match.home.id}"),
+                away=match.away._replace(id=f"{target.namespace}:{match.away.id}"),
+                league_id=f"{target.namespace}:{match.league_id}",
+            )
+        if target.day_offset:
+            # Row times are HH:MM, which the parsers place on today
+            match = match._replace(start_time=_shift_start_time(match.start_time, target.day_offset))
+        result.append(match)
+    return result
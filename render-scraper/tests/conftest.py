@@ -0,0 +1,21 @@
+"""
+Shared test setup
+Puts the service modules on the path and locates the recorded fixtures
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Recorded feed bodies (feed/) and provider polls (sources/<provider>/),
+# laid out the way FEED_RECORD_DIR and SOURCE_RECORD_DIR write them
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def fixtures_dir() -> Path:
+    return FIXTURES_DIR
@@ -0,0 +1,126 @@
+"""
+Shared cache backend tests: a replica following a writer through follow()
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from backends import MmapBackend, RedisBackend, follow
+from benchmarks.fixtures import make_matches, tick
+from cache import SNAPSHOT_KINDS, MatchCache
+from persistence import encode_snapshot
+
+
+@pytest.fixture(params=["redis", "mmap"])
+def make_backend(request, tmp_path, monkeypatch):
+    """Factory for backends that share one store, like separate worker processes"""
+    if request.param == "mmap":
+        path = str(tmp_path / "cache.mmap")
+        return lambda: MmapBackend(path)
+    
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr("backends.aioredis.from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return lambda: RedisBackend("redis://fake")
+
+
+async def publish(backend, cache, changes):
+    data = cache.export()
+    await backend.publish(encode_snapshot(data), data["epoch"], data["version"], changes)
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the replica")
+        await asyncio.sleep(0.05)
+
+
+def snapshot(cache):
+    return sorted((match.id, match.status, match.home_score, match.away_score) for match in cache.get_all_matches())
+
+
+def run_replica(make_backend, scenario):
+    async def main():
+        writer_backend, replica_backend = make_backend(), make_backend()
+        writer, replica = MatchCache(), MatchCache()
+        received = []
+        task = asyncio.create_task(follow(replica_backend, replica, received.extend))
+        try:
+            await scenario(writer_backend, writer, replica, received)
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            await writer_backend.close()
+            await replica_backend.close()
+    
+    asyncio.run(main())
+
+
+def test_replica_loads_then_applies_changes(make_backend):
+    async def scenario(backend, writer, replica, received):
+        rng = random.Random(1)
+        matches = make_matches(100)
+        await publish(backend, writer, writer.update_matches(matches))
+        await wait_until(lambda: replica.get_version() == writer.get_version())
+        assert received[0] == {"op": "reset", "version": writer.get_version()}
+        
+        for _ in range(3):
+            matches = tick(matches, rng)
+            changes = writer.update_matches(matches)
+            await publish(backend, writer, changes)
+            await wait_until(lambda: replica.get_version() == writer.get_version())
+        
+        assert replica.get_epoch() == writer.get_epoch()
+        assert snapshot(replica) == snapshot(writer)
+        # Every change after the initial load arrived once, in version order
+        versions = [change["version"] for change in received[1:]]
+        assert versions == sorted(set(versions))
+        assert versions[-1] == writer.get_version()
+        # Encoded off the event loop, before the first request asks
+        assert set(replica.get_state().snapshots) == set(SNAPSHOT_KINDS)
+    
+    run_replica(make_backend, scenario)
+
+
+def test_replica_reloads_after_a_missed_publish(make_backend):
+    async def scenario(backend, writer, replica, received):
+        rng = random.Random(2)
+        matches = make_matches(50)
+        await publish(backend, writer, writer.update_matches(matches))
+        await wait_until(lambda: replica.get_version() == writer.get_version())
+        
+        # A write whose publish never happened leaves a gap in the versions
+        matches = tick(matches, rng)
+        writer.update_matches(matches)
+        matches = tick(matches, rng)
+        await publish(backend, writer, writer.update_matches(matches))
+        await wait_until(lambda: replica.get_version() == writer.get_version())
+        
+        assert snapshot(replica) == snapshot(writer)
+        assert received[-1] == {"op": "reset", "version": writer.get_version()}
+    
+    run_replica(make_backend, scenario)
+
+
+def test_replica_follows_a_restarted_writer(make_backend):
+    async def scenario(backend, writer, replica, received):
+        await publish(backend, writer, writer.update_matches(make_matches(50)))
+        await wait_until(lambda: replica.get_version() == writer.get_version())
+        
+        restarted = MatchCache()
+        restarted.update_matches(make_matches(20, seed=3))
+        await publish(backend, restarted, [])
+        await wait_until(lambda: replica.get_epoch() == restarted.get_epoch())
+        
+        assert replica.get_match_count() == 20
+        assert received[-1]["op"] == "reset"
+    
+    run_replica(make_backend, scenario)
@@ -0,0 +1,182 @@
+"""
+MatchCache diffing, eviction and change log tests
+"""
+
+import json
+import time
+
+import pytest
+
+from cache import MatchCache
+from fastparse import build_match
+
+
+def make_match(match_id, status="SCHEDULED", home_score=None, away_score=None, start_time="2026-04-11T14:00:00+00:00",
+               home="Arsenal", away="Chelsea"):
+    minute = 30 if status == "LIVE" else None
+    return build_match(match_id, home, away, home_score, away_score, status, minute, start_time,
+                       None, None, "Premier League", "England")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache, starting now"""
+    now = [time.time()]
+    monkeypatch.setattr("cache.time.time", lambda: now[0])
+    return now
+
+
+def test_new_matches_are_added():
+    cache = MatchCache()
+    changes = cache.update_matches([make_match("a"), make_match("b", home="Liverpool", away="Everton")])
+    
+    assert [(change["id"], change["op"], change["version"]) for change in changes] == [("a", "add", 1), ("b", "add", 2)]
+    assert changes[0]["fields"]["homeTeam"]["name"] == "Arsenal"
+    assert cache.get_version() == 2
+    assert cache.get_match_count() == 2
+
+
+def test_unchanged_matches_record_nothing():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    
+    assert cache.update_matches([make_match("a")]) == []
+    assert cache.get_version() == 1
+
+
+def test_update_carries_only_changed_fields():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    
+    changes = cache.update_matches([make_match("a", status="LIVE", home_score=1, away_score=0)])
+    
+    assert len(changes) == 1
+    assert changes[0]["op"] == "update"
+    assert changes[0]["fields"] == {"homeScore": 1, "awayScore": 0, "status": "LIVE", "minute": 30}
+    assert cache.get_match("a").home_score == 1
+
+
+def test_rows_without_kickoff_keep_the_known_one():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    
+    # Live rows show the minute instead of the kickoff
+    changes = cache.update_matches([make_match("a", status="LIVE", home_score=0, away_score=0, start_time=None)])
+    assert "startTime" not in changes[0]["fields"]
+    assert cache.get_match("a").start_time == "2026-04-11T14:00:00+00:00"
+    
+    again = make_match("a", status="LIVE", home_score=0, away_score=0, start_time=None)
+    assert cache.update_matches([again]) == []
+
+
+def test_league_left_empty_by_a_move_is_dropped():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    
+    moved = make_match("a")._replace(league_id="league_cup", league_name="FA Cup")
+    cache.update_matches([moved])
+    
+    assert [league["id"] for league in cache.get_leagues()] == ["league_cup"]
+
+
+def test_matches_unseen_past_their_ttl_are_evicted(clock):
+    cache = MatchCache(ttls={"FT": 60})
+    cache.update_matches([make_match("a", status="FT", home_score=1, away_score=0), make_match("b")])
+    
+    clock[0] += 120
+    changes = cache.update_matches([make_match("b")])
+    
+    assert changes == [{"id": "a", "op": "remove", "version": 3}]
+    assert cache.get_match("a") is None
+    assert cache.get_stats()["evictions"] == {"ttl": 1}
+
+
+def test_nothing_is_evicted_without_fresh_data(clock):
+    cache = MatchCache(ttls={"FT": 60})
+    cache.update_matches([make_match("a", status="FT", home_score=1, away_score=0)])
+    
+    clock[0] += 120
+    # A failed scrape stores nothing and must not empty the cache
+    cache.update_matches([])
+    
+    assert cache.get_match("a") is not None
+
+
+def test_budget_evicts_finished_matches_first_and_never_live_ones(clock):
+    cache = MatchCache(max_entries=3)
+    cache.update_matches([
+        make_match("live", status="LIVE", home_score=0, away_score=0),
+        make_match("done", status="FT", home_score=2, away_score=1, home="Liverpool", away="Everton"),
+        make_match("next", home="Newcastle", away="Brighton"),
+    ])
+    
+    clock[0] += 1
+    changes = cache.update_matches([make_match("later", home="Sevilla", away="Betis")])
+    
+    assert [change for change in changes if change["op"] == "remove"] == [{"id": "done", "op": "remove", "version": 5}]
+    assert sorted(match.id for match in cache.get_all_matches()) == ["later", "live", "next"]
+    
+    clock[0] += 1
+    cache.update_matches([make_match("another", home="Ajax", away="PSV")])
+    assert "live" in {match.id for match in cache.get_all_matches()}
+
+
+def test_replaced_ids_are_removed_with_the_update():
+    cache = MatchCache()
+    cache.update_matches([make_match("sofascore:1")])
+    
+    changes = cache.update_matches([make_match("KxPq2vLm")], removed=["sofascore:1", "unknown"])
+    
+    assert [(change["id"], change["op"]) for change in changes] == [("KxPq2vLm", "add"), ("sofascore:1", "remove")]
+    assert [match.id for match in cache.get_all_matches()] == ["KxPq2vLm"]
+
+
+def test_unchanged_scrape_keeps_snapshots_consistent():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    snapshot = cache.get_snapshot("today")
+    
+    cache.update_matches([make_match("a")])
+    
+    # Same version, so the same body and ETag; nothing in it went stale
+    assert cache.get_snapshot("today") is snapshot
+    assert json.loads(snapshot.body) == {"matches": [make_match("a").to_dict()], "count": 1, "version": 1}
+
+
+def test_get_changes_returns_everything_after_since():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    cache.update_matches([make_match("a", status="LIVE", home_score=0, away_score=0)])
+    
+    feed = cache.get_changes(1)
+    assert feed["reset"] is False
+    assert feed["version"] == 2
+    assert [change["version"] for change in feed["changes"]] == [2]
+    
+    assert cache.get_changes(0)["changes"][0]["op"] == "add"
+    assert cache.get_changes(2) == {"version": 2, "reset": False, "changes": []}
+
+
+def test_get_changes_resets_a_version_from_the_future():
+    cache = MatchCache()
+    cache.update_matches([make_match("a")])
+    
+    # E.g. a client that kept its version across a server restart
+    assert cache.get_changes(5) == {"version": 1, "reset": True, "changes": []}
+
+
+def test_get_changes_resets_a_version_older_than_the_log():
+    cache = MatchCache(change_log_size=2)
+    cache.update_matches([make_match("a"), make_match("b", home="Liverpool", away="Everton")])
+    cache.update_matches([make_match("a", status="LIVE", home_score=0, away_score=0)])
+    
+    # Versions 2 and 3 are kept: 1 can still be served, 0 can't
+    assert cache.get_changes(1)["reset"] is False
+    assert cache.get_changes(0) == {"version": 3, "reset": True, "changes": []}
+
+
+def test_get_changes_on_an_empty_cache():
+    cache = MatchCache()
+    
+    assert cache.get_changes(0) == {"version": 0, "reset": False, "changes": []}
+    assert cache.get_changes(1)["reset"] is True
@@ -0,0 +1,27 @@
+"""
+Row field parsing tests
+"""
+
+from datetime import datetime, timezone
+
+from fastparse import kickoff_from_text
+
+NEW_YEAR = datetime(2027, 1, 2, 10, 0, tzinfo=timezone.utc)
+NEW_YEARS_EVE = datetime(2026, 12, 31, 10, 0, tzinfo=timezone.utc)
+
+
+def test_time_only_rows_are_today():
+    assert kickoff_from_text("20:45", now=NEW_YEAR) == "2027-01-02T20:45:00+00:00"
+
+
+def test_dated_rows_take_the_nearest_year():
+    assert kickoff_from_text("15.01. 18:30", now=NEW_YEAR) == "2027-01-15T18:30:00+00:00"
+    # Results from just before the new year
+    assert kickoff_from_text("31.12. 20:00", now=NEW_YEAR) == "2026-12-31T20:00:00+00:00"
+    # Fixtures just after it
+    assert kickoff_from_text("03.01. 15:00", now=NEW_YEARS_EVE) == "2027-01-03T15:00:00+00:00"
+
+
+def test_rows_without_a_time_have_no_kickoff():
+    assert kickoff_from_text("Postp.", now=NEW_YEAR) is None
+    assert kickoff_from_text(None) is None
@@ -0,0 +1,61 @@
+"""
+Data feed parsing tests on a recorded list feed
+"""
+
+import asyncio
+
+import pytest
+
+from fastparse import EMPTY_LOGO
+from feed import FeedClient, LOGO_BASE, parse_feed
+
+
+@pytest.fixture
+def matches(fixtures_dir):
+    client = FeedClient(replay_dir=str(fixtures_dir / "feed"))
+    text = asyncio.run(client.fetch(None))
+    return {match.id: match for match in parse_feed(text)}
+
+
+def test_every_complete_row_is_parsed(matches):
+    # The Getafe row has no away team and is skipped
+    assert list(matches) == [
+        "KxPq2vLm", "Wm4TnB8c", "Qe7RsD2f", "Zt9YcH3j", "Hb5GkM1n", "Vd6LpR4s", "Pc2XhS5u",
+    ]
+
+
+def test_stage_codes_map_to_statuses(matches):
+    assert {match_id: match.status for match_id, match in matches.items()} == {
+        "KxPq2vLm": "LIVE",
+        "Wm4TnB8c": "HT",
+        "Qe7RsD2f": "FT",
+        "Zt9YcH3j": "SCHEDULED",
+        "Hb5GkM1n": "LIVE",
+        "Vd6LpR4s": "POSTPONED",
+        "Pc2XhS5u": "SCHEDULED",
+    }
+    assert matches["Wm4TnB8c"].minute == 45
+
+
+def test_scores_and_teams(matches):
+    arsenal = matches["KxPq2vLm"]
+    assert (arsenal.home.name, arsenal.away.name) == ("Arsenal", "Chelsea")
+    assert (arsenal.home_score, arsenal.away_score) == (1, 0)
+    assert arsenal.home.logo == LOGO_BASE + "pIyFtNcV-zjoz0wuD.png"
+    
+    newcastle = matches["Zt9YcH3j"]
+    assert (newcastle.home_score, newcastle.away_score) == (None, None)
+    assert newcastle.home.logo == EMPTY_LOGO
+
+
+def test_league_headers_apply_to_following_rows(matches):
+    assert (matches["Qe7RsD2f"].league_name, matches["Qe7RsD2f"].country) == ("Premier League", "ENGLAND")
+    assert (matches["Hb5GkM1n"].league_name, matches["Hb5GkM1n"].country) == ("LaLiga", "SPAIN")
+    assert matches["KxPq2vLm"].league_id == matches["Zt9YcH3j"].league_id != matches["Hb5GkM1n"].league_id
+
+
+def test_kickoff_is_utc_and_missing_kickoffs_stay_missing(matches):
+    assert matches["KxPq2vLm"].start_time == "2026-04-11T14:00:00+00:00"
+    # No AD field: the kickoff is unknown, not "now"
+    assert matches["Hb5GkM1n"].start_time is None
+    assert matches["Hb5GkM1n"].minute is None
@@ -0,0 +1,24 @@
+"""
+Stable ID derivation tests
+"""
+
+import hashlib
+
+from ids import hash_key, team_id
+
+
+def test_hash_keys_past_the_blake2b_limit_are_hashed_down():
+    long_key = hash_key("s" * 100)
+    
+    assert len(long_key) == 64
+    assert long_key == hash_key("s" * 100)
+    # Usable as a key, where the raw secret would raise ValueError
+    hashlib.blake2b(b"Arsenal", digest_size=8, key=long_key)
+
+
+def test_short_hash_keys_are_used_as_is():
+    assert hash_key("live-goal-hub") == b"live-goal-hub"
+
+
+def test_team_ids_ignore_case_and_spacing():
+    assert team_id("Manchester  United") == team_id("manchester united")
@@ -0,0 +1,73 @@
+"""
+Fast parser parity with the BeautifulSoup parser on the recorded page corpus
+"""
+
+import os
+from collections import Counter
+
+import pytest
+
+import scraper
+from benchmarks.fixtures import CORPUS_DIR
+from fastparse import parse_matches_fast
+from scraper import BS4_FALLBACK, FlashscoreScraper, parse_html_counted
+
+# Rows per field that only a fallback selector fills, as recorded
+FALLBACKS = {
+    "small": {
+        "home": 12, "away": 12, "home_logo": 14, "away_logo": 14,
+        "home_score": 4, "away_score": 4, "time": 1,
+    },
+    "typical": {
+        "home": 155, "away": 155, "home_logo": 176, "away_logo": 176,
+        "home_score": 19, "away_score": 19, "time": 14, "stage": 17,
+    },
+}
+
+
+def load_page(name):
+    with open(os.path.join(CORPUS_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(params=sorted(FALLBACKS))
+def page(request):
+    return request.param, load_page(request.param)
+
+
+def test_fast_parser_matches_beautifulsoup(page):
+    _, html = page
+    fast = parse_matches_fast(html)
+    
+    assert fast
+    assert fast == FlashscoreScraper._parse_matches_bs4(html)
+
+
+def test_fallback_counts(page):
+    name, html = page
+    fallbacks = Counter()
+    parse_matches_fast(html, fallbacks)
+    
+    assert dict(fallbacks) == FALLBACKS[name]
+
+
+def test_counted_parse_stays_on_the_fast_parser(page):
+    name, html = page
+    matches, fallbacks = parse_html_counted(html)
+    
+    assert BS4_FALLBACK not in fallbacks
+    assert fallbacks == FALLBACKS[name]
+    assert len(matches) == len(parse_matches_fast(html))
+
+
+def test_fast_parser_failure_falls_back_to_beautifulsoup(monkeypatch):
+    html = load_page("small")
+    
+    def broken(html, fallbacks=None):
+        raise ValueError("unparseable")
+    monkeypatch.setattr(scraper, "parse_matches_fast", broken)
+    
+    matches, fallbacks = parse_html_counted(html)
+    
+    assert fallbacks == {BS4_FALLBACK: 1}
+    assert matches == FlashscoreScraper._parse_matches_bs4(html)
@@ -0,0 +1,22 @@
+"""
+Cache snapshot save and restore tests
+"""
+
+from cache import MatchCache
+from fastparse import build_match
+from persistence import load_snapshot, save_snapshot
+
+
+def test_snapshot_round_trip_leaves_no_temp_files(tmp_path):
+    cache = MatchCache()
+    cache.update_matches([build_match("a", "Arsenal", "Chelsea", 1, 0, "LIVE", 30, None, None, None, "Premier League", "England")])
+    path = tmp_path / "cache-snapshot.bin"
+    
+    save_snapshot(cache, str(path))
+    save_snapshot(cache, str(path))
+    
+    assert [entry.name for entry in tmp_path.iterdir()] == ["cache-snapshot.bin"]
+    restored = MatchCache()
+    assert load_snapshot(restored, str(path)) == 1
+    assert restored.get_match("a").home_score == 1
+    assert restored.get_epoch() == cache.get_epoch()
@@ -0,0 +1,36 @@
+"""
+Response snapshot and coalescing tests
+"""
+
+import asyncio
+import json
+
+from snapshots import ResponseCoalescer
+
+
+def test_coalesced_snapshot_is_labelled_with_the_version_it_was_built_from():
+    coalescer = ResponseCoalescer()
+    
+    # Requested at version 4, but the cache moved to 5 before the build ran
+    snapshot = asyncio.run(coalescer.get("matches?", 4, lambda: {"matches": [], "version": 5}, "matches"))
+    
+    assert snapshot.version == 5
+    assert snapshot.etag.startswith('"matches-5-')
+    assert json.loads(snapshot.body)["version"] == 5
+
+
+def test_identical_requests_share_one_build():
+    coalescer = ResponseCoalescer()
+    builds = []
+    
+    def build():
+        builds.append(1)
+        return {"changes": [], "version": 7}
+    
+    async def main():
+        return await asyncio.gather(*(coalescer.get("changes?3", 7, build, "changes") for _ in range(5)))
+    
+    snapshots = asyncio.run(main())
+    
+    assert len(builds) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
@@ -0,0 +1,141 @@
+"""
+Aggregator resolution tests on recorded Flashscore and provider payloads
+"""
+
+import asyncio
+
+import pytest
+
+from feed import FeedClient, parse_feed
+from sources import Aggregator, FotmobSource, SofascoreSource, TheSportsDBSource
+
+
+def replay(source):
+    return source.parse(asyncio.run(source.fetch(None)))
+
+
+@pytest.fixture
+def flashscore(fixtures_dir):
+    client = FeedClient(replay_dir=str(fixtures_dir / "feed"))
+    return parse_feed(asyncio.run(client.fetch(None)))
+
+
+@pytest.fixture
+def sources(fixtures_dir):
+    replay_dir = str(fixtures_dir / "sources")
+    return {
+        "sofascore": SofascoreSource(replay_dir=replay_dir),
+        "fotmob": FotmobSource(replay_dir=replay_dir),
+        "thesportsdb": TheSportsDBSource(replay_dir=replay_dir),
+    }
+
+
+@pytest.fixture
+def aggregator(flashscore, sources):
+    aggregator = Aggregator(list(sources.values()))
+    aggregator.merge("flashscore", flashscore)
+    return aggregator
+
+
+def test_flashscore_matches_pass_through_unchanged(flashscore):
+    merged = Aggregator([]).merge("flashscore", flashscore)
+    
+    assert merged == flashscore
+
+
+def test_provider_events_resolve_to_flashscore_fixtures(aggregator, sources):
+    merged = {match.id: match for match in aggregator.merge("sofascore", replay(sources["sofascore"]))}
+    
+    assert set(merged) == {
+        # Same names and kickoff
+        "KxPq2vLm",
+        # "Tottenham Hotspur" extends "Tottenham"
+        "Qe7RsD2f",
+        # Accents and "Deportivo" don't matter
+        "Pc2XhS5u",
+        # No kickoff on the Flashscore row: resolved on teams alone
+        "Hb5GkM1n",
+        # Not on Flashscore
+        "sofascore:12437005",
+        # Same teams, but kickoff five hours after the league match: a different fixture
+        "sofascore:12437006",
+    }
+    assert merged["KxPq2vLm"].home.name == "Arsenal"
+    assert merged["Qe7RsD2f"].away.name == "Tottenham"
+    assert aggregator.get_stats()["sources"]["sofascore"]["linked"] == 4
+
+
+def test_first_provider_kickoff_fills_a_missing_one(aggregator, sources):
+    merged = {match.id: match for match in aggregator.merge("sofascore", replay(sources["sofascore"]))}
+    
+    assert merged["Hb5GkM1n"].start_time == "2026-04-11T13:00:00+00:00"
+    assert merged["KxPq2vLm"].start_time == "2026-04-11T14:00:00+00:00"
+
+
+def test_later_sources_resolve_against_the_provider_kickoff(aggregator, sources):
+    aggregator.merge("sofascore", replay(sources["sofascore"]))
+    
+    merged = {match.id: match for match in aggregator.merge("thesportsdb", replay(sources["thesportsdb"]))}
+    
+    assert set(merged) == {"Hb5GkM1n", "Vd6LpR4s"}
+    assert merged["Vd6LpR4s"].status == "POSTPONED"
+
+
+def test_fotmob_matches_resolve_with_one_side_spelled_differently(aggregator, sources):
+    merged = {match.id: match for match in aggregator.merge("fotmob", replay(sources["fotmob"]))}
+    
+    assert set(merged) == {"KxPq2vLm", "Zt9YcH3j"}
+    assert merged["Zt9YcH3j"].away.name == "Brighton"
+
+
+def test_the_source_that_changed_a_score_last_wins(aggregator, flashscore, sources):
+    sofascore = sources["sofascore"]
+    first = {match.id: match for match in aggregator.merge("sofascore", replay(sofascore))}
+    # Both agree on 1-0; Flashscore keeps priority
+    assert (first["KxPq2vLm"].home_score, first["KxPq2vLm"].away_score) == (1, 0)
+    
+    # The second recorded poll has Arsenal's second goal
+    second = {match.id: match for match in aggregator.merge("sofascore", replay(sofascore))}
+    assert second["KxPq2vLm"].home_score == 2
+    
+    # Flashscore still showing 1-0 must not take the goal back
+    again = {match.id: match for match in aggregator.merge("flashscore", flashscore)}
+    assert again["KxPq2vLm"].home_score == 2
+    
+    # A provider joining late with an old score doesn't override it either
+    late = {match.id: match for match in aggregator.merge("fotmob", replay(sources["fotmob"]))}
+    assert late["KxPq2vLm"].home_score == 2
+
+
+def test_fixture_takes_the_flashscore_id_when_flashscore_lists_it(flashscore, sources):
+    # The provider polled before Flashscore's first scrape
+    aggregator = Aggregator(list(sources.values()))
+    first = {match.id for match in aggregator.merge("sofascore", replay(sources["sofascore"]))}
+    assert "sofascore:12437001" in first
+    assert aggregator.pop_replaced() == []
+    
+    merged = {match.id for match in aggregator.merge("flashscore", flashscore)}
+    
+    assert "KxPq2vLm" in merged and "sofascore:12437001" not in merged
+    assert "sofascore:12437001" in aggregator.pop_replaced()
+    assert aggregator.pop_replaced() == []
+    # The provider's next poll lands on the re-keyed fixture
+    again = {match.id for match in aggregator.merge("sofascore", replay(sources["sofascore"]))}
+    assert "KxPq2vLm" in again and "sofascore:12437001" not in again
+
+
+def test_live_row_without_kickoff_is_not_duplicated(flashscore):
+    # Flashscore shows no kickoff once a match is under way, and the
+    # provider's kickoff is well outside the resolution window of "now"
+    live = [match for match in flashscore if match.id == "Hb5GkM1n"]
+    aggregator = Aggregator([])
+    aggregator.merge("flashscore", live)
+    
+    event = {
+        "id": 9, "homeTeam": {"name": "Real Madrid"}, "awayTeam": {"name": "Girona"},
+        "homeScore": {"current": 2}, "awayScore": {"current": 1}, "status": {"type": "inprogress", "code": 7},
+        "startTimestamp": 1775912400 - 100 * 60,
+    }
+    merged = aggregator.merge("sofascore", SofascoreSource(replay_dir=None).parse([{"events": [event]}]))
+    
+    assert [match.id for match in merged] == ["Hb5GkM1n"]
@@ -16,7 +16,10 @@ export const MatchCard = forwardRef<HTMLDivElement, MatchCardProps>(
     const isLive = match.status === 'LIVE' || match.status === 'HT';
     const isScheduled = match.status === 'SCHEDULED';
 
-    const formatTime = (dateString: string) => {
+    const formatTime = (dateString: string | null) => {
+      if (!dateString) {
+        return '--:--';
+      }
       try {
         return format(new Date(dateString), 'HH:mm');
       } catch {
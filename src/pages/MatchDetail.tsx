@@ -107,10 +107,12 @@ const MatchDetail = () => {
               <div className="text-center">
                 <p className="text-3xl font-bold">vs</p>
                 <p className="text-sm text-muted-foreground mt-2">
-                  {new Date(match.startTime).toLocaleTimeString([], { 
-                    hour: '2-digit', 
-                    minute: '2-digit' 
-                  })}
+                  {match.startTime
+                    ? new Date(match.startTime).toLocaleTimeString([], { 
+                        hour: '2-digit', 
+                        minute: '2-digit' 
+                      })
+                    : '--:--'}
                 </p>
               </div>
             ) : (
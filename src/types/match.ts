@@ -15,7 +15,7 @@ export interface Match {
   awayScore: number | null;
   status: MatchStatus;
   minute: number | null;
-  startTime: string;
+  startTime: string | null;
   leagueId: string;
 }
 